@@ -0,0 +1,199 @@
+"""
+Mediciones del cliente de OpenAI contra el servidor simulado.
+
+Arranca `MockOpenAIServer` (o usa el servidor de --base-url), configura el
+cliente con esa URL base y mide:
+
+- throughput: peticiones por segundo y latencias sin streaming
+- ttft: tiempo hasta el primer fragmento y tokens por segundo en streaming
+- retries: comportamiento de los reintentos con errores 429 y 5xx simulados
+
+Uso:
+
+    python -m benchmarks.bench_client --requests 200 --concurrency 32
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from benchmarks.mock_server import MockOpenAIServer, MockServerConfig
+from chat_gpt_local.api.errors import OpenAIClientError
+from chat_gpt_local.api.http_pool import aclose_async_http_client
+from chat_gpt_local.api.openai_client import OpenAIClient
+from chat_gpt_local.api.scheduler import RateLimitScheduler
+from chat_gpt_local.config.settings import settings
+from chat_gpt_local.utils.helpers import percentile
+
+BENCHMARKS = ("throughput", "ttft", "retries")
+
+
+@dataclass
+class BenchmarkResult:
+    """Resultado de una medición."""
+
+    name: str
+    requests: int = 0
+    failed: int = 0
+    elapsed: float = 0.0
+    latencies: List[float] = field(default_factory=list)
+    first_token: List[float] = field(default_factory=list)
+    tokens: int = 0
+    retries: int = 0
+
+    def format(self) -> str:
+        """Devuelve el resultado como texto legible."""
+        lines = [
+            f"[{self.name}] {self.requests} peticiones ({self.failed} con error) "
+            f"en {self.elapsed:.2f} s - {self.requests / self.elapsed:.1f} peticiones/s",
+            f"  latencia p50 {percentile(self.latencies, 0.50) * 1000:.1f} ms"
+            f" - p95 {percentile(self.latencies, 0.95) * 1000:.1f} ms",
+        ]
+        if self.first_token:
+            lines.append(
+                f"  TTFT p50 {percentile(self.first_token, 0.50) * 1000:.1f} ms"
+                f" - p95 {percentile(self.first_token, 0.95) * 1000:.1f} ms"
+                f" - {self.tokens / self.elapsed:.0f} fragmentos/s"
+            )
+        if self.retries:
+            lines.append(f"  reintentos: {self.retries}")
+        return "\n".join(lines)
+
+
+async def _measure(
+    name: str,
+    count: int,
+    concurrency: int,
+    scheduler: RateLimitScheduler,
+    request: Callable[[int, BenchmarkResult], Awaitable[None]],
+) -> BenchmarkResult:
+    """Ejecuta `count` peticiones con concurrencia limitada y mide su latencia."""
+    result = BenchmarkResult(name)
+    semaphore = asyncio.Semaphore(concurrency)
+    retries_before = scheduler.retries
+
+    async def one(index: int) -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await request(index, result)
+            except OpenAIClientError:
+                result.failed += 1
+            result.latencies.append(time.perf_counter() - started)
+            result.requests += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(count)))
+    result.elapsed = time.perf_counter() - started
+    result.retries = scheduler.retries - retries_before
+    return result
+
+
+def _messages(name: str, index: int) -> List[Dict[str, str]]:
+    """Mensajes distintos por petición, para que no se agrupen ni se cacheen."""
+    return [{"role": "user", "content": f"{name} {index}"}]
+
+
+async def run_benchmarks(
+    count: int, concurrency: int, names: List[str]
+) -> List[BenchmarkResult]:
+    """
+    Ejecuta las mediciones indicadas contra `settings.base_url`.
+
+    Args:
+        count: Peticiones por medición
+        concurrency: Peticiones simultáneas como máximo
+        names: Las mediciones a ejecutar (throughput, ttft, retries)
+
+    Returns:
+        Los resultados de cada medición
+    """
+    client = OpenAIClient()
+    # Esperas cortas: se mide el comportamiento de los reintentos, no su duración
+    scheduler = RateLimitScheduler(client, base_delay=0.01, max_delay=0.5)
+
+    async def complete(index: int, result: BenchmarkResult) -> None:
+        await scheduler.complete(_messages(result.name, index), use_cache=False)
+
+    async def stream(index: int, result: BenchmarkResult) -> None:
+        started = time.perf_counter()
+        first = True
+        async for _ in scheduler.stream(_messages(result.name, index), use_cache=False):
+            if first:
+                result.first_token.append(time.perf_counter() - started)
+                first = False
+            result.tokens += 1
+
+    operations = {"throughput": complete, "ttft": stream, "retries": complete}
+    results = []
+    try:
+        await client.awarm_up()
+        for name in names:
+            results.append(
+                await _measure(name, count, concurrency, scheduler, operations[name])
+            )
+    finally:
+        await aclose_async_http_client()
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Punto de entrada de las mediciones."""
+    parser = argparse.ArgumentParser(description="Mediciones del cliente de OpenAI.")
+    parser.add_argument("--base-url", help="Servidor a medir (por defecto, uno simulado)")
+    parser.add_argument("--requests", type=int, default=100, help="Peticiones por medición")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.05,
+                        help="Latencia simulada del servidor, en segundos")
+    parser.add_argument("--tokens-per-second", type=float, default=200.0,
+                        help="Velocidad de generación simulada")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.2,
+                        help="Fracción de respuestas 429 en la medición de reintentos")
+    parser.add_argument("--error-rate", type=float, default=0.05,
+                        help="Fracción de respuestas 500 en la medición de reintentos")
+    parser.add_argument(
+        "benchmarks", nargs="*",
+        help=f"Mediciones a ejecutar: {', '.join(BENCHMARKS)} (por defecto, todas)",
+    )
+    args = parser.parse_args(argv)
+    args.benchmarks = args.benchmarks or list(BENCHMARKS)
+    unknown = set(args.benchmarks) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"mediciones desconocidas: {', '.join(sorted(unknown))}")
+
+    settings.openai_api_key = settings.openai_api_key or "sk-mock"
+    settings.cache_enabled = False
+
+    if args.base_url:
+        settings.base_url = args.base_url
+        results = asyncio.run(
+            run_benchmarks(args.requests, args.concurrency, args.benchmarks)
+        )
+        for result in results:
+            print(result.format())
+        return 0
+
+    config = MockServerConfig(
+        latency=args.latency, tokens_per_second=args.tokens_per_second, seed=0
+    )
+    with MockOpenAIServer(config) as server:
+        settings.base_url = server.base_url
+        for name in args.benchmarks:
+            # Solo la medición de reintentos inyecta fallos
+            failing = name == "retries"
+            config.rate_limit_rate = args.rate_limit_rate if failing else 0.0
+            config.error_rate = args.error_rate if failing else 0.0
+            results = asyncio.run(run_benchmarks(args.requests, args.concurrency, [name]))
+            print(results[0].format())
+        print(
+            f"Servidor: {server.requests} peticiones recibidas, "
+            f"{server.rate_limited} respuestas 429, {server.errors} respuestas 500"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
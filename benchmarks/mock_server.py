@@ -0,0 +1,317 @@
+"""
+Servidor local compatible con la API de chat completions de OpenAI.
+
+Sustituye a la API real en pruebas y mediciones: responde a
+`POST /v1/chat/completions`, con y sin streaming (SSE), y permite simular la
+latencia de la red, la velocidad de generación, errores del servidor y
+respuestas 429. También imita la caché de prompts: los mensajes iniciales que
+coinciden con los de la petición anterior se informan como `cached_tokens`.
+Solo usa la biblioteca estándar.
+
+Uso desde la línea de comandos:
+
+    python -m benchmarks.mock_server --port 8000 --latency 0.2 --tokens-per-second 50
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Optional
+
+
+@dataclass
+class MockServerConfig:
+    """Comportamiento simulado del servidor."""
+
+    latency: float = 0.0  # Segundos antes de la primera respuesta
+    tokens_per_second: float = 0.0  # Ritmo de los fragmentos en streaming (0 = sin límite)
+    completion_tokens: int = 20  # Tokens de cada respuesta
+    error_rate: float = 0.0  # Fracción de peticiones que responden 500
+    rate_limit_rate: float = 0.0  # Fracción de peticiones que responden 429
+    retry_after: float = 0.05  # Valor de retry-after en las respuestas 429
+    seed: Optional[int] = None
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # Admite ráfagas de conexiones simultáneas
+
+
+class MockOpenAIServer:
+    """Servidor HTTP en segundo plano que imita la API de OpenAI."""
+
+    def __init__(
+        self,
+        config: Optional[MockServerConfig] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ) -> None:
+        """
+        Inicializa el servidor sin arrancarlo.
+
+        Args:
+            config: El comportamiento simulado (por defecto, sin fallos ni esperas)
+            host: La dirección en la que escuchar
+            port: El puerto (0 = uno libre cualquiera)
+        """
+        self.config = config or MockServerConfig()
+        self.requests = 0
+        self.errors = 0
+        self.rate_limited = 0
+        self._random = random.Random(self.config.seed)
+        self._last_messages: List[Any] = []
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._httpd = _Server((host, port), _make_handler(self))
+
+    @property
+    def base_url(self) -> str:
+        """URL base para configurar el cliente (OPENAI_BASE_URL)."""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "MockOpenAIServer":
+        """Arranca el servidor en un hilo en segundo plano."""
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever,
+            kwargs={"poll_interval": 0.05},
+            name="mock-openai-server",
+            daemon=True,
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Detiene el servidor y cierra el socket."""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> "MockOpenAIServer":
+        return self.start()
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.stop()
+
+    def next_outcome(self) -> int:
+        """Decide el código de estado de la siguiente petición."""
+        with self._lock:
+            self.requests += 1
+            roll = self._random.random()
+            if roll < self.config.rate_limit_rate:
+                self.rate_limited += 1
+                return 429
+            if roll < self.config.rate_limit_rate + self.config.error_rate:
+                self.errors += 1
+                return 500
+            return 200
+
+    def usage(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Calcula el recuento aproximado de tokens de una petición.
+
+        Los mensajes iniciales idénticos a los de la petición anterior cuentan
+        como servidos desde la caché de prompts.
+        """
+        messages = body.get("messages", [])
+        with self._lock:
+            previous, self._last_messages = self._last_messages, messages
+        shared = 0
+        for old, new in zip(previous, messages):
+            if old != new:
+                break
+            shared += 1
+        prompt_tokens = sum(_message_tokens(m) for m in messages)
+        cached_tokens = sum(_message_tokens(m) for m in messages[:shared])
+        completion_tokens = self.config.completion_tokens
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": cached_tokens},
+        }
+
+
+def _completion_tokens(count: int) -> Iterator[str]:
+    """Genera los fragmentos de texto de una respuesta simulada."""
+    for i in range(count):
+        yield f"token{i} " if i < count - 1 else f"token{i}"
+
+
+def _make_handler(server: MockOpenAIServer) -> type:
+    """Crea la clase que atiende las peticiones del servidor indicado."""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True  # Cada fragmento SSE sale en cuanto se escribe
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass  # Sin registro por petición: distorsionaría las mediciones
+
+        def do_HEAD(self) -> None:
+            self.send_response(200)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def do_POST(self) -> None:
+            length = int(self.headers.get("Content-Length", "0"))
+            try:
+                body = json.loads(self.rfile.read(length) or b"{}")
+            except json.JSONDecodeError:
+                self._send_json(400, _error("JSON no válido", "invalid_request_error"))
+                return
+            if self.path.rstrip("/") != "/v1/chat/completions":
+                self._send_json(404, _error("Ruta desconocida", "invalid_request_error"))
+                return
+
+            config = server.config
+            if config.latency > 0:
+                time.sleep(config.latency)
+
+            status = server.next_outcome()
+            if status == 429:
+                self._send_json(
+                    429,
+                    _error("Límite de uso simulado", "rate_limit_exceeded"),
+                    {
+                        "retry-after-ms": str(int(config.retry_after * 1000)),
+                        "x-ratelimit-remaining-requests": "0",
+                    },
+                )
+            elif status == 500:
+                self._send_json(500, _error("Error simulado", "server_error"))
+            elif body.get("stream"):
+                self._stream(body)
+            else:
+                self._complete(body)
+
+        def _complete(self, body: Dict[str, Any]) -> None:
+            content = "".join(_completion_tokens(server.config.completion_tokens))
+            self._send_json(200, {
+                "id": f"chatcmpl-{uuid.uuid4().hex}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "mock"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }],
+                "usage": server.usage(body),
+            })
+
+        def _stream(self, body: Dict[str, Any]) -> None:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+
+            completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+            usage = server.usage(body)
+            interval = (
+                1.0 / server.config.tokens_per_second
+                if server.config.tokens_per_second > 0 else 0.0
+            )
+            try:
+                for text in _completion_tokens(server.config.completion_tokens):
+                    self._send_event(_chunk(completion_id, body, {"content": text}, None))
+                    if interval:
+                        time.sleep(interval)
+                self._send_event(_chunk(completion_id, body, {}, "stop"))
+                if (body.get("stream_options") or {}).get("include_usage"):
+                    usage_chunk = _chunk(completion_id, body, {}, None)
+                    usage_chunk.update(choices=[], usage=usage)
+                    self._send_event(usage_chunk)
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # El cliente cerró el stream (p. ej. al cancelar)
+
+        def _send_event(self, payload: Dict[str, Any]) -> None:
+            self.wfile.write(f"data: {json.dumps(payload)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        def _send_json(
+            self, status: int, payload: Dict[str, Any],
+            headers: Optional[Dict[str, str]] = None,
+        ) -> None:
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+    return Handler
+
+
+def _error(message: str, code: str) -> Dict[str, Any]:
+    """Cuerpo de error con el formato de la API de OpenAI."""
+    return {"error": {"message": message, "type": code, "param": None, "code": code}}
+
+
+def _message_tokens(message: Dict[str, Any]) -> int:
+    """Recuento aproximado de tokens de un mensaje."""
+    return (len(str(message.get("content", ""))) + 3) // 4
+
+
+def _chunk(
+    completion_id: str, body: Dict[str, Any], delta: Dict[str, str],
+    finish_reason: Optional[str],
+) -> Dict[str, Any]:
+    """Fragmento SSE con el formato de la API de OpenAI."""
+    return {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": body.get("model", "mock"),
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+
+
+def main() -> None:
+    """Arranca el servidor simulado en primer plano."""
+    parser = argparse.ArgumentParser(description="Servidor local compatible con OpenAI.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="Segundos antes de responder")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0,
+                        help="Ritmo de los fragmentos en streaming (0 = sin límite)")
+    parser.add_argument("--completion-tokens", type=int, default=20,
+                        help="Tokens de cada respuesta")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="Fracción de peticiones que responden 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0,
+                        help="Fracción de peticiones que responden 429")
+    args = parser.parse_args()
+
+    config = MockServerConfig(
+        latency=args.latency,
+        tokens_per_second=args.tokens_per_second,
+        completion_tokens=args.completion_tokens,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+    )
+    server = MockOpenAIServer(config, args.host, args.port).start()
+    print(f"Servidor simulado en {server.base_url} (Ctrl+C para salir)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
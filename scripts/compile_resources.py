@@ -1,6 +1,11 @@
 #!/usr/bin/env python
 """
-Script para compilar los recursos Qt (.qrc) a módulos Python.
+Script para compilar los recursos Qt (.qrc) a un paquete binario (.rcc).
+
+La aplicación registra el paquete con `QResource.registerResource`, que lo mapea
+en memoria en lugar de cargar las fuentes como literales de un módulo Python. Los
+archivos se guardan sin comprimir: un recurso comprimido se descomprime en una
+copia cada vez que se lee, en lugar de leerse del paquete mapeado.
 """
 
 import os
@@ -15,67 +20,62 @@ def main():
     resources_dir = os.path.join('src', 'chat_gpt_local', 'gui', 'resources')
     qrc_file = os.path.join(resources_dir, 'resources.qrc')
     
-    # Ruta para el archivo Python compilado
-    py_file = os.path.join(resources_dir, 'resources_rc.py')
+    # Ruta para el paquete binario
+    rcc_file = os.path.join(resources_dir, 'resources.rcc')
     
     # Métodos para compilar recursos en orden de preferencia
     compilation_methods = [
-        compile_with_pyrcc6,
-        compile_with_pyqt_rcc,
-        compile_with_system_rcc
+        compile_with_system_rcc,
+        compile_with_pyside_rcc,
+        compile_with_python,
     ]
     
     for method in compilation_methods:
-        if method(qrc_file, py_file):
-            print(f"Recursos compilados exitosamente: {py_file}")
+        if method(qrc_file, rcc_file):
+            print(f"Recursos compilados exitosamente: {rcc_file}")
             return 0
     
     print("Error: No se pudo compilar los recursos. Ningún método de compilación disponible.")
     return 1
 
-def compile_with_pyrcc6(qrc_file, py_file):
-    """Intenta compilar usando pyrcc6."""
+def compile_with_system_rcc(qrc_file, rcc_file):
+    """
+    Intenta compilar usando el comando rcc del sistema.
+    Este método funciona si Qt está instalado en el sistema.
+    """
     try:
-        command = ['pyrcc6', qrc_file, '-o', py_file]
-        subprocess.run(command, check=True)
-        return True
+        # Primero intentar con rcc-qt6
+        for rcc_command in ['rcc-qt6', 'rcc']:
+            if shutil.which(rcc_command):
+                command = [
+                    rcc_command, '--binary', '--no-compress', qrc_file, '-o', rcc_file
+                ]
+                subprocess.run(command, check=True)
+                return True
+        return False
     except (subprocess.CalledProcessError, FileNotFoundError):
         return False
 
-def compile_with_pyqt_rcc(qrc_file, py_file):
-    """Intenta compilar usando pyqt6-rcc."""
+def compile_with_pyside_rcc(qrc_file, rcc_file):
+    """Intenta compilar usando pyside6-rcc (el rcc de Qt incluido con PySide6)."""
     try:
-        command = ['pyqt6-rcc', qrc_file, '-o', py_file]
+        command = ['pyside6-rcc', '--binary', '--no-compress', qrc_file, '-o', rcc_file]
         subprocess.run(command, check=True)
         return True
     except (subprocess.CalledProcessError, FileNotFoundError):
         return False
 
-def compile_with_system_rcc(qrc_file, py_file):
+def compile_with_python(qrc_file, rcc_file):
     """
-    Intenta compilar usando el comando rcc del sistema.
-    Este método funciona si Qt está instalado en el sistema.
+    Genera el paquete sin herramientas externas (PyQt6 no incluye rcc).
+    El resultado es equivalente al de `rcc --binary` sin compresión.
     """
+    sys.path.insert(0, 'src')
     try:
-        # Primero intentar con rcc-qt6
-        for rcc_command in ['rcc-qt6', 'rcc']:
-            if shutil.which(rcc_command):
-                # Crear archivo XML temporal
-                xml_file = f"{qrc_file}.xml"
-                command = [rcc_command, '--project', '-o', xml_file, qrc_file]
-                subprocess.run(command, check=True)
-                
-                # Compilar a código Python
-                command = [rcc_command, '--generator', 'python', '-o', py_file, xml_file]
-                subprocess.run(command, check=True)
-                
-                # Limpiar archivo temporal
-                if os.path.exists(xml_file):
-                    os.remove(xml_file)
-                
-                return True
-        return False
-    except (subprocess.CalledProcessError, FileNotFoundError):
+        from chat_gpt_local.gui.resources.rcc import write_rcc
+        write_rcc(qrc_file, rcc_file)
+        return True
+    except (ImportError, OSError):
         return False
 
 if __name__ == "__main__":
@@ -0,0 +1,430 @@
+"""
+Backends con varios servidores compatibles con la API de OpenAI.
+
+`MultiEndpointBackend` reparte las peticiones entre varios `OpenAIClient`
+(p. ej. la API alojada y un servidor de inferencia local):
+
+- Conmutación por error: si un servidor falla, la petición pasa al siguiente y
+  el que falló queda relegado al final de la lista durante un tiempo.
+- Peticiones de cobertura (hedging, opcional): si el servidor principal no ha
+  entregado el primer token tras su p95 histórico, se lanza la misma petición
+  en el siguiente y se usa la que responda antes; la otra se cancela.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    Protocol,
+    Sequence,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+from chat_gpt_local.api.cancellation import CancellationToken, cancel_scope
+from chat_gpt_local.api.errors import OpenAIClientError, RequestCancelledError
+from chat_gpt_local.api.openai_client import Messages, OpenAIClient
+from chat_gpt_local.config.settings import settings
+from chat_gpt_local.utils.helpers import percentile
+
+T = TypeVar('T')
+
+# Segundos que un servidor que ha fallado pasa al final de la lista
+FAILOVER_COOLDOWN = 30.0
+# Muestras necesarias antes de usar el p95 medido como espera de cobertura
+MIN_HEDGE_SAMPLES = 20
+
+# Primer fragmento de un stream junto con el resto del stream
+_StreamStart = Tuple[AsyncIterator[str], Optional[str]]
+
+
+class ChatBackend(Protocol):
+    """Interfaz asíncrona que usa el planificador de peticiones."""
+
+    headers_listener: Optional[Callable[[Mapping[str, str]], None]]
+    usage_listener: Optional[Callable[[Any], None]]
+
+    async def acomplete(
+        self, messages: Messages, use_cache: bool = True,
+        token: Optional[CancellationToken] = None,
+    ) -> str: ...
+
+    def astream(
+        self, messages: Messages, use_cache: bool = True,
+        token: Optional[CancellationToken] = None,
+    ) -> AsyncIterator[str]: ...
+
+    def estimate_tokens(self, messages: Messages) -> int: ...
+
+
+class EndpointLimiter(Protocol):
+    """Límites de uso por servidor que aplica `MultiEndpointBackend` (el planificador)."""
+
+    async def admit(self, client: OpenAIClient, messages: Messages) -> None:
+        """Espera turno en los límites del servidor antes de enviarle una petición."""
+
+    def wait_time(self, client: OpenAIClient) -> float:
+        """Segundos que tendría que esperar ahora una petición al servidor."""
+
+    def penalize(self, client: OpenAIClient, error: OpenAIClientError) -> None:
+        """Registra un error del servidor (p. ej. un 429) en sus límites."""
+
+
+class LatencyTracker:
+    """Ventana deslizante de latencias observadas."""
+
+    def __init__(self, max_samples: int = 100) -> None:
+        """
+        Inicializa la ventana vacía.
+
+        Args:
+            max_samples: Número de muestras recientes que se conservan
+        """
+        self._samples: Deque[float] = deque(maxlen=max_samples)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def record(self, seconds: float) -> None:
+        """Añade una latencia observada."""
+        self._samples.append(seconds)
+
+    def percentile(self, fraction: float) -> float:
+        """Devuelve un percentil de las latencias recientes (0.0 si no hay muestras)."""
+        return percentile(list(self._samples), fraction)
+
+
+class _Endpoint:
+    """Un servidor del backend con su estado de salud y sus latencias."""
+
+    def __init__(self, client: OpenAIClient) -> None:
+        self.client = client
+        self.latency = LatencyTracker()
+        self.failed_until = 0.0
+
+    @property
+    def healthy(self) -> bool:
+        """Indica si el servidor no ha fallado recientemente."""
+        return time.monotonic() >= self.failed_until
+
+    def mark_failed(self) -> None:
+        """Relega el servidor al final de la lista durante un tiempo."""
+        self.failed_until = time.monotonic() + FAILOVER_COOLDOWN
+
+
+class MultiEndpointBackend:
+    """Envía las peticiones a varios servidores con conmutación por error y cobertura."""
+
+    def __init__(
+        self,
+        clients: Sequence[OpenAIClient],
+        hedge: Optional[bool] = None,
+        hedge_delay: Optional[float] = None,
+    ) -> None:
+        """
+        Inicializa el backend. Los parámetros omitidos se toman de la configuración.
+
+        Args:
+            clients: Los clientes de cada servidor, por orden de preferencia
+            hedge: Si se lanzan peticiones de cobertura ante respuestas lentas
+            hedge_delay: Espera antes de la cobertura mientras no haya latencias medidas
+
+        Raises:
+            ValueError: Si no se indica ningún cliente
+        """
+        if not clients:
+            raise ValueError("Se necesita al menos un servidor")
+        self.endpoints = [_Endpoint(client) for client in clients]
+        self.hedge = settings.hedge_requests if hedge is None else hedge
+        self.hedge_delay = settings.hedge_delay if hedge_delay is None else hedge_delay
+        self.failovers = 0
+        self.hedged_requests = 0
+        self._headers_listener: Optional[Callable[[Mapping[str, str]], None]] = None
+        self._usage_listener: Optional[Callable[[Any], None]] = None
+        # Límites de uso de cada servidor (los registra el planificador): se prefieren
+        # los servidores que no tienen que esperar y cada intento pide turno al suyo
+        self.limiter: Optional[EndpointLimiter] = None
+
+    @property
+    def primary(self) -> OpenAIClient:
+        """El cliente del servidor preferido."""
+        return self.endpoints[0].client
+
+    @property
+    def clients(self) -> List[OpenAIClient]:
+        """Los clientes de todos los servidores, por orden de preferencia."""
+        return [endpoint.client for endpoint in self.endpoints]
+
+    @property
+    def headers_listener(self) -> Optional[Callable[[Mapping[str, str]], None]]:
+        """Función que recibe las cabeceras de las respuestas de todos los servidores."""
+        return self._headers_listener
+
+    @headers_listener.setter
+    def headers_listener(self, listener: Optional[Callable[[Mapping[str, str]], None]]) -> None:
+        self._headers_listener = listener
+        for endpoint in self.endpoints:
+            endpoint.client.headers_listener = listener
+
+    @property
+    def usage_listener(self) -> Optional[Callable[[Any], None]]:
+        """Función que recibe el `usage` de las respuestas de todos los servidores."""
+        return self._usage_listener
+
+    @usage_listener.setter
+    def usage_listener(self, listener: Optional[Callable[[Any], None]]) -> None:
+        self._usage_listener = listener
+        for endpoint in self.endpoints:
+            endpoint.client.usage_listener = listener
+
+    def build_messages(self, *args: Any, **kwargs: Any) -> Messages:
+        """Construye los mensajes con el presupuesto de tokens del servidor preferido."""
+        return self.primary.build_messages(*args, **kwargs)
+
+    def estimate_tokens(self, messages: Messages) -> int:
+        """Estima los tokens de una petición según el servidor preferido."""
+        return self.primary.estimate_tokens(messages)
+
+    async def awarm_up(self) -> None:
+        """Abre por adelantado la conexión con cada servidor."""
+        await asyncio.gather(*(e.client.awarm_up() for e in self.endpoints))
+
+    async def acomplete(
+        self,
+        messages: Messages,
+        use_cache: bool = True,
+        token: Optional[CancellationToken] = None,
+    ) -> str:
+        """
+        Versión con varios servidores de `OpenAIClient.acomplete`.
+
+        Args:
+            messages: Los mensajes a enviar
+            use_cache: Si es False, ignora la caché de respuestas en esta petición
+            token: Token de cancelación; cancela también las peticiones de cobertura
+
+        Returns:
+            La respuesta del primer servidor que responda correctamente
+
+        Raises:
+            OpenAIClientError: Si fallan todos los servidores
+            RequestCancelledError: Si la petición se cancela o agota su plazo
+        """
+        cached = self._cached(messages, use_cache)
+        if cached is not None:
+            return cached
+        async with cancel_scope(token):
+            # La caché ya se ha consultado: cada intento va al servidor
+            return await self._race(
+                messages, lambda client: client.acomplete(messages, use_cache=False)
+            )
+
+    async def astream(
+        self,
+        messages: Messages,
+        use_cache: bool = True,
+        token: Optional[CancellationToken] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Versión con varios servidores de `OpenAIClient.astream`.
+
+        Se usa el primer servidor que entregue un fragmento. Una vez empezado el
+        stream no se cambia de servidor, para no entregar texto duplicado.
+
+        Args:
+            messages: Los mensajes a enviar
+            use_cache: Si es False, ignora la caché de respuestas en esta petición
+            token: Token de cancelación; cancela también las peticiones de cobertura
+
+        Yields:
+            Fragmentos de texto de la respuesta
+
+        Raises:
+            OpenAIClientError: Si fallan todos los servidores antes del primer fragmento
+            RequestCancelledError: Si la petición se cancela o agota su plazo
+        """
+        cached = self._cached(messages, use_cache)
+        if cached is not None:
+            yield cached
+            return
+
+        async def start(client: OpenAIClient) -> _StreamStart:
+            # La caché ya se ha consultado: cada intento va al servidor
+            stream = client.astream(messages, use_cache=False)
+            try:
+                return stream, await stream.__anext__()
+            except StopAsyncIteration:
+                return stream, None
+
+        async with cancel_scope(token):
+            stream, first = await self._race(messages, start, discard=_close_stream)
+            try:
+                if first is None:
+                    return
+                yield first
+                async for chunk in stream:
+                    yield chunk
+            finally:
+                await _close_stream((stream, first))
+
+    def _cached(self, messages: Messages, use_cache: bool) -> Optional[str]:
+        """
+        Busca la respuesta en la caché de los servidores, por orden de preferencia.
+
+        Se hace antes de elegir servidor: una respuesta de la caché no pide turno
+        en los límites de uso ni cuenta como latencia del servidor.
+        """
+        if not use_cache:
+            return None
+        for endpoint in self.endpoints:
+            cached = endpoint.client.cached(messages)
+            if cached is not None:
+                return cached
+        return None
+
+    def _candidates(self) -> List[_Endpoint]:
+        """
+        Servidores por orden de preferencia, con los que han fallado al final.
+
+        Entre los sanos, los que tendrían que esperar por sus límites de uso van
+        detrás de los que pueden atender la petición ya.
+        """
+        limiter = self.limiter
+        if limiter is None:
+            return sorted(self.endpoints, key=lambda e: not e.healthy)
+        return sorted(
+            self.endpoints, key=lambda e: (not e.healthy, limiter.wait_time(e.client))
+        )
+
+    def _delay_for(self, endpoint: _Endpoint) -> float:
+        """Espera antes de cubrir una petición: el p95 medido del servidor."""
+        if len(endpoint.latency) < MIN_HEDGE_SAMPLES:
+            return self.hedge_delay
+        return endpoint.latency.percentile(0.95)
+
+    async def _race(
+        self,
+        messages: Messages,
+        start: Callable[[OpenAIClient], Awaitable[T]],
+        discard: Optional[Callable[[T], Awaitable[None]]] = None,
+    ) -> T:
+        """
+        Lanza una operación en los servidores hasta que uno la complete.
+
+        El siguiente servidor se usa si el actual falla o, con cobertura
+        activada, si tarda más que su p95 (una sola vez por petición).
+
+        Args:
+            messages: Los mensajes de la petición (para los límites de uso)
+            start: Función que inicia la operación en un cliente
+            discard: Función que libera el resultado de una operación descartada
+
+        Returns:
+            El resultado de la primera operación que termine correctamente
+        """
+        queue = self._candidates()
+        pending: Dict["asyncio.Task[T]", _Endpoint] = {}
+        last_error: Optional[OpenAIClientError] = None
+        hedged = not self.hedge
+
+        def launch() -> None:
+            endpoint = queue.pop(0)
+            pending[asyncio.ensure_future(self._timed(endpoint, messages, start))] = endpoint
+
+        launch()
+        try:
+            while pending:
+                timeout = None
+                if not hedged and queue:
+                    timeout = self._delay_for(next(iter(pending.values())))
+                done, _ = await asyncio.wait(
+                    pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    # El servidor va lento: cubrir la petición con el siguiente
+                    hedged = True
+                    self.hedged_requests += 1
+                    launch()
+                    continue
+
+                for task in done:
+                    endpoint = pending.pop(task)
+                    error = task.exception()
+                    if error is None:
+                        return task.result()
+                    if isinstance(error, RequestCancelledError) or not isinstance(
+                        error, OpenAIClientError
+                    ):
+                        raise error
+                    endpoint.mark_failed()
+                    if self.limiter is not None:
+                        self.limiter.penalize(endpoint.client, error)
+                    last_error = error
+                if not pending and queue:
+                    self.failovers += 1
+                    launch()
+        finally:
+            await _cancel_all(pending, discard)
+
+        assert last_error is not None
+        raise last_error
+
+    async def _timed(
+        self,
+        endpoint: _Endpoint,
+        messages: Messages,
+        start: Callable[[OpenAIClient], Awaitable[T]],
+    ) -> T:
+        """Ejecuta una operación y registra cuánto ha tardado en el servidor."""
+        if self.limiter is not None:
+            # La espera por límites de uso no cuenta como latencia del servidor
+            await self.limiter.admit(endpoint.client, messages)
+        started = time.perf_counter()
+        result = await start(endpoint.client)
+        endpoint.latency.record(time.perf_counter() - started)
+        return result
+
+
+async def _cancel_all(
+    tasks: Mapping["asyncio.Task[T]", object],
+    discard: Optional[Callable[[T], Awaitable[None]]],
+) -> None:
+    """Cancela las operaciones descartadas y libera las que ya terminaron."""
+    for task in tasks:
+        task.cancel()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    if discard is not None:
+        for result in results:
+            if not isinstance(result, BaseException):
+                await discard(result)
+
+
+async def _close_stream(start: _StreamStart) -> None:
+    """Cierra un stream (y su conexión) que no se va a seguir leyendo."""
+    stream = start[0]
+    aclose = getattr(stream, "aclose", None)
+    if aclose is not None:
+        await aclose()
+
+
+def create_backend() -> Union[OpenAIClient, MultiEndpointBackend]:
+    """
+    Crea el backend según la configuración.
+
+    Returns:
+        Un `OpenAIClient` si no se han configurado varios servidores
+        (OPENAI_ENDPOINTS), o un `MultiEndpointBackend` con uno por servidor
+    """
+    if not settings.endpoints:
+        return OpenAIClient()
+    return MultiEndpointBackend([OpenAIClient(e) for e in settings.endpoints])
@@ -0,0 +1,192 @@
+"""
+Caché persistente de respuestas de la API de OpenAI.
+
+Las respuestas se guardan en una base de datos SQLite local indexada por la
+huella de la petición (modelo, temperatura, max_tokens y mensajes), con
+expulsión por antigüedad y por tamaño en orden LRU.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Mapping, Optional, Sequence
+
+# Segundos mínimos entre dos actualizaciones de la fecha de acceso de una entrada.
+# Evita una escritura en disco por cada acierto a costa de un LRU menos preciso.
+ACCESS_RESOLUTION = 60.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    response TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at);
+"""
+
+
+def request_fingerprint(
+    model: str,
+    temperature: float,
+    max_tokens: Optional[int],
+    messages: Sequence[Mapping[str, Any]],
+) -> str:
+    """
+    Calcula la huella de una petición.
+
+    Args:
+        model: El modelo de la petición
+        temperature: La temperatura de la petición
+        max_tokens: El límite de tokens de la respuesta
+        messages: Los mensajes enviados
+
+    Returns:
+        Un hash SHA-256 en hexadecimal
+    """
+    payload = json.dumps(
+        {
+            "model": model,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "messages": list(messages),
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Caché de respuestas en SQLite con expulsión LRU por tamaño y antigüedad."""
+
+    def __init__(
+        self,
+        path: Path,
+        max_entries: int = 1000,
+        max_bytes: int = 50 * 1024 * 1024,
+        max_age: float = 7 * 24 * 3600,
+    ) -> None:
+        """
+        Inicializa la caché. La base de datos se abre la primera vez que se usa.
+
+        Args:
+            path: Ruta del archivo SQLite
+            max_entries: Número máximo de respuestas guardadas
+            max_bytes: Tamaño máximo total de las respuestas guardadas
+            max_age: Antigüedad máxima de una respuesta, en segundos
+        """
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Contadores de aciertos y fallos de la caché."""
+        return {"hits": self.hits, "misses": self.misses}
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Busca una respuesta en la caché.
+
+        Args:
+            key: La huella de la petición
+
+        Returns:
+            La respuesta guardada o None si no existe o ha caducado
+        """
+        now = time.time()
+        with self._lock:
+            connection = self._connect()
+            row = connection.execute(
+                "SELECT response, created_at, accessed_at FROM responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None or now - row[1] > self.max_age:
+                self.misses += 1
+                return None
+
+            if now - row[2] > ACCESS_RESOLUTION:
+                connection.execute(
+                    "UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key)
+                )
+                connection.commit()
+            self.hits += 1
+            return str(row[0])
+
+    def set(self, key: str, response: str) -> None:
+        """
+        Guarda una respuesta y expulsa las entradas sobrantes.
+
+        Args:
+            key: La huella de la petición
+            response: La respuesta a guardar
+        """
+        now = time.time()
+        size = len(response.encode("utf-8"))
+        with self._lock:
+            connection = self._connect()
+            connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                (key, response, size, now, now),
+            )
+            self._evict(connection, now)
+            connection.commit()
+
+    def clear(self) -> None:
+        """Elimina todas las respuestas guardadas."""
+        with self._lock:
+            connection = self._connect()
+            connection.execute("DELETE FROM responses")
+            connection.commit()
+
+    def close(self) -> None:
+        """Cierra la conexión con la base de datos."""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def _connect(self) -> sqlite3.Connection:
+        """Abre la base de datos si aún no está abierta."""
+        if self._connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(_SCHEMA)
+            self._connection = connection
+        return self._connection
+
+    def _evict(self, connection: sqlite3.Connection, now: float) -> None:
+        """Expulsa las entradas caducadas y, después, las menos usadas."""
+        connection.execute(
+            "DELETE FROM responses WHERE created_at < ?", (now - self.max_age,)
+        )
+        count, total = connection.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+
+        rows = connection.execute(
+            "SELECT key, size FROM responses ORDER BY accessed_at ASC"
+        )
+        expired = []
+        for key, size in rows:
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            expired.append((key,))
+            count -= 1
+            total -= size
+        connection.executemany("DELETE FROM responses WHERE key = ?", expired)
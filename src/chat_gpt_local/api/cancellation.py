@@ -0,0 +1,170 @@
+"""
+Cancelación de peticiones en curso.
+
+Un `CancellationToken` acompaña a una petición desde la interfaz hasta el
+cliente. Cancelarlo (o agotar su plazo) cancela la tarea de asyncio que está
+esperando la respuesta, lo que cierra el stream HTTP y libera la conexión de
+inmediato: el servidor deja de generar tokens y no se facturan.
+"""
+
+import asyncio
+import threading
+import time
+from contextlib import AbstractAsyncContextManager, asynccontextmanager, nullcontext
+from typing import AsyncIterator, Callable, List, Optional
+
+from chat_gpt_local.api.errors import DeadlineExceededError, RequestCancelledError
+
+
+class CancellationToken:
+    """Señal de cancelación de una petición, con un plazo máximo opcional."""
+
+    def __init__(self, timeout: Optional[float] = None) -> None:
+        """
+        Inicializa el token.
+
+        Args:
+            timeout: Segundos máximos que puede durar la petición (None = sin plazo)
+        """
+        self.deadline: Optional[float] = (
+            time.monotonic() + timeout if timeout else None
+        )
+        self.timed_out = False
+        self._cancelled = False
+        self._callbacks: List[Callable[[], None]] = []
+        self._task: Optional["asyncio.Task[object]"] = None
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        """Indica si la petición se ha cancelado o ha agotado su plazo."""
+        if not self._cancelled and self.remaining() == 0:
+            self._expire()
+        return self._cancelled
+
+    def remaining(self) -> Optional[float]:
+        """Segundos que quedan hasta el plazo, o None si no hay plazo."""
+        if self.deadline is None:
+            return None
+        return max(self.deadline - time.monotonic(), 0.0)
+
+    def cancel(self) -> None:
+        """Cancela la petición. Puede llamarse desde cualquier hilo."""
+        with self._lock:
+            if self._cancelled:
+                return
+            self._cancelled = True
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback()
+
+    def add_callback(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """
+        Registra una función que se llama al cancelar (de inmediato si ya se canceló).
+
+        Args:
+            callback: La función a llamar
+
+        Returns:
+            Una función que anula el registro
+        """
+        with self._lock:
+            if not self._cancelled:
+                self._callbacks.append(callback)
+                return lambda: self._remove_callback(callback)
+        callback()
+        return lambda: None
+
+    def error(self) -> RequestCancelledError:
+        """Devuelve el error que corresponde a la cancelación."""
+        if self.timed_out:
+            return DeadlineExceededError("Se agotó el tiempo máximo de la petición")
+        return RequestCancelledError("Petición cancelada")
+
+    def raise_if_cancelled(self) -> None:
+        """
+        Comprueba si la petición debe interrumpirse.
+
+        Raises:
+            RequestCancelledError: Si la petición se ha cancelado o ha agotado su plazo
+        """
+        if self.cancelled:
+            raise self.error()
+
+    @asynccontextmanager
+    async def scope(self) -> AsyncIterator[None]:
+        """
+        Vincula el token a la tarea actual mientras dura el bloque.
+
+        Al cancelar el token o agotar el plazo, la tarea se cancela y el bloque
+        termina con RequestCancelledError (o DeadlineExceededError). Los bloques
+        anidados sobre el mismo token no hacen nada: los gestiona el exterior.
+
+        Raises:
+            RequestCancelledError: Si el token se cancela dentro del bloque
+        """
+        task = asyncio.current_task()
+        if task is None or self._task is not None:
+            yield
+            return
+
+        self.raise_if_cancelled()
+        loop = asyncio.get_running_loop()
+        self._task = task
+
+        def cancel_task() -> None:
+            # `cancel` puede llamarse desde otro hilo: la tarea se cancela en su bucle
+            loop.call_soon_threadsafe(self._cancel_task, task)
+
+        unregister = self.add_callback(cancel_task)
+        timer = None
+        remaining = self.remaining()
+        if remaining is not None:
+            timer = loop.call_later(remaining, self._expire)
+        try:
+            yield
+        except asyncio.CancelledError:
+            if not self._cancelled:
+                raise
+            # La cancelación es nuestra: convertirla en un error normal
+            task.uncancel()
+            raise self.error() from None
+        else:
+            if self._cancelled and task.cancelling():
+                # Alguna biblioteca absorbió la cancelación: informarla igualmente
+                task.uncancel()
+                raise self.error()
+        finally:
+            self._task = None
+            unregister()
+            if timer is not None:
+                timer.cancel()
+
+    def _cancel_task(self, task: "asyncio.Task[object]") -> None:
+        """Cancela la tarea si sigue vinculada al token (se ejecuta en su bucle)."""
+        if self._task is task:
+            task.cancel()
+
+    def _expire(self) -> None:
+        """Marca el plazo como agotado y cancela la petición."""
+        with self._lock:
+            if self._cancelled:
+                return
+            self.timed_out = True
+        self.cancel()
+
+    def _remove_callback(self, callback: Callable[[], None]) -> None:
+        """Anula el registro de una función de cancelación."""
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+
+def cancel_scope(token: Optional[CancellationToken]) -> AbstractAsyncContextManager[None]:
+    """
+    Devuelve `token.scope()`, o un contexto vacío si no hay token.
+
+    Args:
+        token: El token de la petición, si lo hay
+    """
+    return token.scope() if token is not None else nullcontext()
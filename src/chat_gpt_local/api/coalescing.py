@@ -0,0 +1,274 @@
+"""
+Agrupación de peticiones idénticas en curso.
+
+Cuando llega una petición cuya huella coincide con la de otra que aún no ha
+terminado, el nuevo llamante se une a la petición pendiente en lugar de hacer
+otra llamada a la API. Los streams se difunden: quien se une tarde recibe
+primero los fragmentos ya emitidos y después el resto a medida que llegan.
+
+Cada llamante espera con su propio token de cancelación: cancelar o agotar el
+plazo solo interrumpe a quien lo hace, y la petición sigue mientras quede alguien
+esperándola.
+"""
+
+import asyncio
+import concurrent.futures
+import threading
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Generic,
+    List,
+    Optional,
+    TypeVar,
+    cast,
+)
+
+from chat_gpt_local.api.cancellation import CancellationToken
+
+T = TypeVar('T')
+
+# Intervalo (en segundos) con el que un llamante síncrono comprueba su token
+SYNC_POLL_INTERVAL = 0.05
+
+
+class _InFlight(Generic[T]):
+    """Petición en curso y número de llamantes que esperan su resultado."""
+
+    def __init__(self, task: "asyncio.Future[T]") -> None:
+        self.task = task
+        self.waiters = 0
+
+
+class _SyncInFlight(Generic[T]):
+    """Petición síncrona en curso en su propio hilo y número de llamantes que la esperan."""
+
+    def __init__(self) -> None:
+        self.future: "concurrent.futures.Future[T]" = concurrent.futures.Future()
+        self.waiters = 0
+
+
+class _Broadcast:
+    """Stream en curso cuyos fragmentos se reparten entre varios consumidores."""
+
+    def __init__(self) -> None:
+        self.chunks: List[str] = []
+        self.finished = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self.pump: Optional["asyncio.Task[None]"] = None
+        self._condition = asyncio.Condition()
+
+    async def run(self, source: AsyncIterator[str]) -> None:
+        """Consume el stream de origen y publica sus fragmentos."""
+        try:
+            async for chunk in source:
+                async with self._condition:
+                    self.chunks.append(chunk)
+                    self._condition.notify_all()
+        except BaseException as e:
+            self.error = e
+            if not isinstance(e, Exception):
+                raise
+        finally:
+            async with self._condition:
+                self.finished = True
+                self._condition.notify_all()
+
+    async def subscribe(self) -> AsyncIterator[str]:
+        """Entrega todos los fragmentos del stream, desde el primero."""
+        index = 0
+        while True:
+            async with self._condition:
+                await self._condition.wait_for(
+                    lambda: index < len(self.chunks) or self.finished
+                )
+                pending = self.chunks[index:]
+                finished = self.finished
+            index += len(pending)
+            for chunk in pending:
+                yield chunk
+            if finished and index >= len(self.chunks):
+                if self.error is not None:
+                    raise self.error
+                return
+
+
+class RequestCoalescer:
+    """Agrupa las peticiones idénticas que están en curso al mismo tiempo."""
+
+    def __init__(self) -> None:
+        """Inicializa el agrupador sin peticiones en curso."""
+        self.upstream_requests = 0
+        self.coalesced_requests = 0
+        self._calls: Dict[str, _InFlight] = {}
+        self._streams: Dict[str, _Broadcast] = {}
+        self._sync_calls: Dict[str, _SyncInFlight] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Peticiones enviadas a la API y peticiones ahorradas al agruparlas."""
+        return {
+            "upstream": self.upstream_requests,
+            "coalesced": self.coalesced_requests,
+        }
+
+    def call(
+        self,
+        key: str,
+        operation: Callable[[], T],
+        token: Optional[CancellationToken] = None,
+    ) -> T:
+        """
+        Ejecuta una operación síncrona o espera a la idéntica que ya está en curso.
+
+        La operación se ejecuta en un hilo propio para que ningún llamante quede
+        atado a ella: cada uno espera el resultado con su token. Un hilo no se
+        puede interrumpir, así que si la abandonan todos termina en segundo plano,
+        pero las peticiones idénticas posteriores ya no se unen a ella.
+
+        Args:
+            key: La huella de la petición
+            operation: La función que realiza la petición
+            token: Token de cancelación de este llamante
+
+        Returns:
+            El resultado de la operación
+
+        Raises:
+            RequestCancelledError: Si el token de este llamante se cancela o agota
+                su plazo antes de que termine la operación
+        """
+        with self._lock:
+            entry = self._sync_calls.get(key)
+            if entry is None:
+                entry = _SyncInFlight()
+                self._sync_calls[key] = entry
+                self.upstream_requests += 1
+                threading.Thread(
+                    target=self._run_sync,
+                    args=(key, entry, operation),
+                    name="chat-gpt-local-coalesced",
+                    daemon=True,
+                ).start()
+            else:
+                self.coalesced_requests += 1
+            entry.waiters += 1
+
+        try:
+            return cast(T, self._wait(entry.future, token))
+        finally:
+            with self._lock:
+                entry.waiters -= 1
+                if entry.waiters == 0 and not entry.future.done():
+                    # Se olvida ya: una petición idéntica no debe unirse a una abandonada
+                    self._forget(self._sync_calls, key, entry)
+
+    def _run_sync(self, key: str, entry: _SyncInFlight, operation: Callable[[], Any]) -> None:
+        """Ejecuta una operación síncrona y publica su resultado (en su propio hilo)."""
+        try:
+            result = operation()
+        except BaseException as e:
+            entry.future.set_exception(e)
+        else:
+            entry.future.set_result(result)
+        finally:
+            with self._lock:
+                self._forget(self._sync_calls, key, entry)
+
+    @staticmethod
+    def _wait(
+        future: "concurrent.futures.Future[Any]", token: Optional[CancellationToken]
+    ) -> Any:
+        """Espera el resultado de un futuro comprobando periódicamente el token."""
+        if token is None:
+            return future.result()
+        while True:
+            token.raise_if_cancelled()
+            timeout = SYNC_POLL_INTERVAL
+            remaining = token.remaining()
+            if remaining is not None:
+                timeout = min(timeout, remaining)
+            try:
+                return future.result(timeout=timeout)
+            except concurrent.futures.TimeoutError:
+                continue
+
+    async def run(self, key: str, operation: Callable[[], Awaitable[T]]) -> T:
+        """
+        Ejecuta una corrutina o espera a la idéntica que ya está en curso.
+
+        La petición se cancela solo cuando la abandonan todos los llamantes.
+
+        Args:
+            key: La huella de la petición
+            operation: Función que crea la corrutina que realiza la petición
+
+        Returns:
+            El resultado de la corrutina
+        """
+        entry = self._calls.get(key)
+        if entry is None:
+            entry = _InFlight(asyncio.ensure_future(operation()))
+            self._calls[key] = entry
+            entry.task.add_done_callback(lambda _: self._forget(self._calls, key, entry))
+            self.upstream_requests += 1
+        else:
+            self.coalesced_requests += 1
+
+        entry.waiters += 1
+        try:
+            return await asyncio.shield(entry.task)
+        finally:
+            entry.waiters -= 1
+            if entry.waiters == 0 and not entry.task.done():
+                # Se olvida ya: una petición idéntica no debe unirse a una tarea cancelada
+                self._forget(self._calls, key, entry)
+                entry.task.cancel()
+
+    async def stream(
+        self, key: str, operation: Callable[[], AsyncIterator[str]]
+    ) -> AsyncIterator[str]:
+        """
+        Inicia un stream o se une al idéntico que ya está en curso.
+
+        El stream de origen se cancela solo cuando lo abandonan todos los consumidores.
+
+        Args:
+            key: La huella de la petición
+            operation: Función que crea el stream que realiza la petición
+
+        Yields:
+            Todos los fragmentos de la respuesta, desde el primero
+        """
+        broadcast = self._streams.get(key)
+        if broadcast is None:
+            broadcast = _Broadcast()
+            self._streams[key] = broadcast
+            pump = asyncio.ensure_future(broadcast.run(operation()))
+            pump.add_done_callback(lambda _: self._forget(self._streams, key, broadcast))
+            broadcast.pump = pump
+            self.upstream_requests += 1
+        else:
+            self.coalesced_requests += 1
+
+        broadcast.subscribers += 1
+        try:
+            async for chunk in broadcast.subscribe():
+                yield chunk
+        finally:
+            broadcast.subscribers -= 1
+            if broadcast.subscribers == 0 and broadcast.pump is not None:
+                if not broadcast.pump.done():
+                    self._forget(self._streams, key, broadcast)
+                    broadcast.pump.cancel()
+
+    @staticmethod
+    def _forget(registry: Dict[str, Any], key: str, entry: object) -> None:
+        """Elimina una petición terminada del registro si sigue siendo la actual."""
+        if registry.get(key) is entry:
+            del registry[key]
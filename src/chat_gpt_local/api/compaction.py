@@ -0,0 +1,142 @@
+"""
+Compactación del historial mediante un resumen acumulado.
+
+Cuando la parte del historial que se envía como contexto supera un umbral de
+tokens, los turnos más antiguos se resumen (junto con el resumen anterior) en
+un único mensaje. El resumen se guarda aparte del historial original, que no
+se modifica, y sustituye en las peticiones a los mensajes que cubre; así el
+tamaño del prompt se mantiene aproximadamente constante en sesiones largas.
+
+La compactación se ejecuta en segundo plano después de cada respuesta, nunca
+mientras el usuario espera.
+"""
+
+from dataclasses import dataclass
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from chat_gpt_local.api.context import TokenCounter, get_context_window
+from chat_gpt_local.api.openai_client import Messages
+
+# Umbral por defecto (en tokens) a partir del cual se compacta el historial
+DEFAULT_COMPACTION_THRESHOLD = 4000
+
+SUMMARY_INSTRUCTIONS = (
+    "Resume la conversación siguiente para que sirva de contexto en los próximos "
+    "turnos. Conserva los hechos, decisiones, datos, nombres y fragmentos de código "
+    "relevantes, y las preferencias del usuario. Escribe solo el resumen, de forma "
+    "concisa y en el idioma de la conversación."
+)
+SUMMARY_PREFIX = "Resumen de la conversación anterior:\n"
+
+
+@dataclass(frozen=True)
+class HistorySummary:
+    """Resumen acumulado de los primeros mensajes del historial."""
+
+    content: str
+    covers: int  # Número de mensajes del historial que sustituye
+
+    def as_message(self) -> Dict[str, str]:
+        """Devuelve el resumen como mensaje de sistema para el contexto."""
+        return {"role": "system", "content": SUMMARY_PREFIX + self.content}
+
+
+class HistoryCompactor:
+    """Decide cuándo compactar el historial y genera el nuevo resumen."""
+
+    def __init__(
+        self,
+        complete: Callable[[Messages], Awaitable[str]],
+        model: str,
+        threshold: Optional[int] = None,
+        keep_recent: int = 6,
+        counter: Optional[TokenCounter] = None,
+    ) -> None:
+        """
+        Inicializa el compactador.
+
+        Args:
+            complete: Corrutina que envía los mensajes y devuelve la respuesta
+            model: El modelo, para contar tokens y deducir el umbral por defecto
+            threshold: Tokens del historial sin resumir a partir de los que se compacta
+            keep_recent: Mensajes recientes que se envían siempre sin resumir
+            counter: Contador de tokens (por defecto, uno nuevo para el modelo)
+        """
+        self.complete = complete
+        self.threshold = threshold or min(
+            DEFAULT_COMPACTION_THRESHOLD, get_context_window(model) // 2
+        )
+        self.keep_recent = keep_recent
+        self.counter = counter or TokenCounter(model)
+
+    def pending(
+        self, history: Sequence[Mapping[str, Any]], summary: Optional[HistorySummary]
+    ) -> List[Mapping[str, Any]]:
+        """
+        Devuelve los mensajes que se resumirían si se compactara ahora.
+
+        Args:
+            history: El historial completo de la conversación
+            summary: El resumen actual, si lo hay
+
+        Returns:
+            Los mensajes a resumir, o una lista vacía si no hace falta compactar
+        """
+        return self._split(history, summary)[0]
+
+    async def compact(
+        self, history: Sequence[Mapping[str, Any]], summary: Optional[HistorySummary]
+    ) -> Optional[HistorySummary]:
+        """
+        Resume los mensajes antiguos junto con el resumen anterior.
+
+        Args:
+            history: El historial completo (o una copia) de la conversación
+            summary: El resumen actual, si lo hay
+
+        Returns:
+            El nuevo resumen, o None si no hacía falta compactar
+
+        Raises:
+            OpenAIClientError: Si falla la petición del resumen
+        """
+        folded, covers = self._split(history, summary)
+        if not folded:
+            return None
+
+        transcript = "\n\n".join(
+            f"{'Usuario' if m['role'] == 'user' else 'Asistente'}: {m['content']}"
+            for m in folded
+        )
+        if summary is not None:
+            transcript = f"{SUMMARY_PREFIX}{summary.content}\n\n{transcript}"
+        content = await self.complete([
+            {"role": "system", "content": SUMMARY_INSTRUCTIONS},
+            {"role": "user", "content": transcript},
+        ])
+        return HistorySummary(content.strip(), covers)
+
+    def _split(
+        self, history: Sequence[Mapping[str, Any]], summary: Optional[HistorySummary]
+    ) -> Tuple[List[Mapping[str, Any]], int]:
+        """Separa los mensajes a resumir y el número de mensajes que cubrirá el resumen."""
+        start = summary.covers if summary else 0
+        indexed = [
+            (i, m) for i, m in enumerate(history)
+            if i >= start and m.get("in_context", True)
+        ]
+        tokens = sum(self.counter.count(m) for _, m in indexed)
+        if tokens <= self.threshold or len(indexed) <= self.keep_recent:
+            return [], start
+        folded = indexed[:len(indexed) - self.keep_recent]
+        return [m for _, m in folded], folded[-1][0] + 1
@@ -0,0 +1,230 @@
+"""
+Construcción de la ventana de contexto que se envía a la API de OpenAI.
+
+Selecciona qué mensajes del historial caben en el presupuesto de tokens del
+modelo, recorriendo el historial desde el mensaje más reciente hacia atrás y
+deteniéndose al agotar el presupuesto. Así el trabajo por petición depende del
+tamaño de la ventana y no de la longitud total de la conversación.
+
+El inicio de la ventana es estable: mientras el historial quepa, se mantiene el
+mismo primer mensaje, de modo que cada petición empieza con el mismo prefijo que
+la anterior y el proveedor puede servirlo desde su caché de prompts. Cuando deja
+de caber, la ventana avanza de una vez lo suficiente para dejar margen a los
+turnos siguientes, en lugar de desplazarse un mensaje en cada petición.
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+try:
+    import tiktoken
+    HAS_TIKTOKEN = True
+except ImportError:
+    HAS_TIKTOKEN = False
+
+# Tamaño de la ventana de contexto (en tokens) de los modelos conocidos.
+# Las claves se comparan por prefijo, de la más larga a la más corta.
+MODEL_CONTEXT_WINDOWS = {
+    "gpt-3.5-turbo": 16385,
+    "gpt-4": 8192,
+    "gpt-4-32k": 32768,
+    "gpt-4-turbo": 128000,
+    "gpt-4o": 128000,
+    "gpt-4o-mini": 128000,
+    "gpt-4.1": 1047576,
+    "o1": 200000,
+    "o3": 200000,
+    "o4-mini": 200000,
+}
+
+# Ventana de contexto para modelos desconocidos
+DEFAULT_CONTEXT_WINDOW = 4096
+
+# Tokens reservados para la respuesta cuando no se configura max_tokens
+DEFAULT_COMPLETION_RESERVE = 1024
+
+# Tokens extra que la API añade por cada mensaje y para iniciar la respuesta
+MESSAGE_OVERHEAD_TOKENS = 4
+REPLY_PRIMING_TOKENS = 3
+
+# Fracción del presupuesto del historial que se deja libre al recortar la
+# ventana, para que el inicio (y el prefijo en caché) dure varios turnos
+CONTEXT_TRIM_HEADROOM = 0.25
+
+
+def get_context_window(model: str) -> int:
+    """
+    Devuelve el tamaño de la ventana de contexto de un modelo.
+
+    Args:
+        model: El nombre del modelo (admite sufijos de versión, p. ej. "gpt-4o-2024-08-06")
+
+    Returns:
+        El número de tokens que admite el modelo
+    """
+    for prefix in sorted(MODEL_CONTEXT_WINDOWS, key=len, reverse=True):
+        if model.startswith(prefix):
+            return MODEL_CONTEXT_WINDOWS[prefix]
+    return DEFAULT_CONTEXT_WINDOW
+
+
+class TokenCounter:
+    """Cuenta los tokens de cada mensaje guardando el resultado en caché."""
+
+    def __init__(self, model: str, max_entries: int = 4096) -> None:
+        """
+        Inicializa el contador.
+
+        Usa tiktoken si está instalado; si no, estima unos 4 caracteres por token.
+
+        Args:
+            model: El modelo cuya tokenización se quiere reproducir
+            max_entries: Número máximo de mensajes guardados en la caché
+        """
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[Tuple[str, str], int]" = OrderedDict()
+        self._encoding: Any = None
+        if HAS_TIKTOKEN:
+            try:
+                self._encoding = tiktoken.encoding_for_model(model)
+            except KeyError:
+                self._encoding = tiktoken.get_encoding("cl100k_base")
+
+    def count(self, message: Mapping[str, Any]) -> int:
+        """
+        Devuelve los tokens que ocupa un mensaje, incluida la sobrecarga de la API.
+
+        Args:
+            message: Un mensaje con las claves "role" y "content"
+        """
+        key = (message["role"], message["content"])
+        tokens = self._cache.get(key)
+        if tokens is not None:
+            self._cache.move_to_end(key)
+            return tokens
+
+        tokens = MESSAGE_OVERHEAD_TOKENS + self._count_text(key[1])
+        self._cache[key] = tokens
+        if len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+        return tokens
+
+    def _count_text(self, text: str) -> int:
+        """Cuenta los tokens de un texto."""
+        if self._encoding is not None:
+            return len(self._encoding.encode(text))
+        return (len(text) + 3) // 4
+
+
+class ContextBuilder:
+    """Selecciona los mensajes del historial que caben en el presupuesto de tokens."""
+
+    def __init__(
+        self,
+        model: str,
+        max_tokens: Optional[int] = None,
+        context_window: Optional[int] = None,
+        counter: Optional[TokenCounter] = None,
+    ) -> None:
+        """
+        Inicializa el constructor de contexto.
+
+        Args:
+            model: El modelo al que se envían las peticiones
+            max_tokens: Tokens reservados para la respuesta (None usa un valor por defecto)
+            context_window: Ventana de contexto del modelo (None la deduce del nombre)
+            counter: Contador de tokens a reutilizar
+        """
+        self.context_window = context_window or get_context_window(model)
+        self.completion_reserve = max_tokens or DEFAULT_COMPLETION_RESERVE
+        self.counter = counter or TokenCounter(model)
+        # Posición y contenido del primer mensaje del historial en la última ventana
+        self._anchor: Optional[Tuple[int, Tuple[str, str]]] = None
+
+    @property
+    def budget(self) -> int:
+        """Tokens disponibles para los mensajes de la petición."""
+        return max(
+            self.context_window - self.completion_reserve - REPLY_PRIMING_TOKENS, 0
+        )
+
+    def build(
+        self,
+        history: Sequence[Mapping[str, Any]],
+        pinned: Sequence[Mapping[str, Any]] = (),
+        pending: Sequence[Mapping[str, Any]] = (),
+    ) -> List[Dict[str, str]]:
+        """
+        Construye la lista de mensajes a enviar.
+
+        Los mensajes fijados (al principio) y los pendientes (al final) se
+        incluyen siempre. Del historial se toman los mensajes más recientes que
+        quepan en el presupuesto restante, conservando el inicio de la ventana
+        anterior mientras quepa para no alterar el prefijo del prompt. Los
+        mensajes marcados con `"in_context": False` se omiten.
+
+        Args:
+            history: Historial de la conversación, del más antiguo al más reciente
+            pinned: Mensajes que deben enviarse siempre (p. ej. el prompt de sistema)
+            pending: Mensajes nuevos que cierran la petición (p. ej. el del usuario)
+
+        Returns:
+            Los mensajes a enviar, con solo las claves "role" y "content"
+        """
+        remaining = self.budget
+        remaining -= sum(self.counter.count(m) for m in pinned)
+        remaining -= sum(self.counter.count(m) for m in pending)
+
+        start = self._window_start(history, remaining)
+        selected = [m for m in history[start:] if m.get("in_context", True)]
+
+        return [_to_payload(m) for m in (*pinned, *selected, *pending)]
+
+    def _window_start(self, history: Sequence[Mapping[str, Any]], budget: int) -> int:
+        """
+        Calcula el índice del primer mensaje del historial que se envía.
+
+        Args:
+            history: Historial de la conversación
+            budget: Tokens disponibles para el historial
+
+        Returns:
+            El índice de inicio de la ventana
+        """
+        headroom_budget = budget * (1 - CONTEXT_TRIM_HEADROOM)
+        fits_from = trimmed_from = len(history)
+        used = 0
+        for index in range(len(history) - 1, -1, -1):
+            message = history[index]
+            if message.get("in_context", True):
+                used += self.counter.count(message)
+                if used > budget:
+                    break
+            fits_from = index
+            if used <= headroom_budget:
+                trimmed_from = index
+
+        anchor = self._anchor
+        if (
+            anchor is not None
+            and fits_from <= anchor[0] < len(history)
+            and _key(history[anchor[0]]) == anchor[1]
+        ):
+            start = anchor[0]
+        elif fits_from == 0:
+            start = 0
+        else:
+            start = trimmed_from
+
+        self._anchor = (start, _key(history[start])) if start < len(history) else None
+        return start
+
+
+def _to_payload(message: Mapping[str, Any]) -> Dict[str, str]:
+    """Reduce un mensaje del historial a las claves que acepta la API."""
+    return {"role": message["role"], "content": message["content"]}
+
+
+def _key(message: Mapping[str, Any]) -> Tuple[str, str]:
+    """Identifica un mensaje del historial por su rol y su contenido."""
+    return (message["role"], message["content"])
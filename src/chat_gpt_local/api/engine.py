@@ -0,0 +1,133 @@
+"""
+Motor de peticiones asíncronas para la API de OpenAI.
+
+Todas las peticiones se ejecutan como corrutinas sobre un único bucle de eventos
+de asyncio que vive en un hilo dedicado, en lugar de crear un hilo por mensaje.
+"""
+
+import asyncio
+import concurrent.futures
+import threading
+import time
+from typing import Any, Coroutine, Optional, TypeVar
+
+from chat_gpt_local.api.telemetry import queued
+
+T = TypeVar('T')
+
+
+class RequestEngine:
+    """Ejecuta corrutinas en un bucle de eventos dedicado con concurrencia limitada."""
+
+    def __init__(self, max_concurrency: int = 32) -> None:
+        """
+        Inicializa el motor sin arrancar el bucle de eventos.
+
+        Args:
+            max_concurrency: Número máximo de corrutinas ejecutándose a la vez
+        """
+        self.max_concurrency = max_concurrency
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._ready = threading.Event()
+
+    @property
+    def is_running(self) -> bool:
+        """Indica si el bucle de eventos está en ejecución."""
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """
+        Devuelve el bucle de eventos del motor.
+
+        Raises:
+            RuntimeError: Si el motor no está en ejecución
+        """
+        if self._loop is None or not self.is_running:
+            raise RuntimeError("El motor de peticiones no está en ejecución")
+        return self._loop
+
+    def start(self) -> None:
+        """Arranca el hilo del bucle de eventos (no hace nada si ya está en marcha)."""
+        if self.is_running:
+            return
+        self._ready.clear()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._run_loop, name="chat-gpt-local-engine", daemon=True
+        )
+        self._thread.start()
+        self._ready.wait()
+
+    def submit(self, coro: Coroutine[Any, Any, T]) -> "concurrent.futures.Future[T]":
+        """
+        Programa una corrutina en el bucle de eventos del motor.
+
+        Puede llamarse desde cualquier hilo. La corrutina espera turno si ya hay
+        `max_concurrency` peticiones en curso.
+
+        Args:
+            coro: La corrutina a ejecutar
+
+        Returns:
+            Un futuro con el resultado; cancelarlo cancela la corrutina
+
+        Raises:
+            RuntimeError: Si el motor no está en ejecución
+        """
+        try:
+            loop = self.loop
+        except RuntimeError:
+            coro.close()
+            raise
+        return asyncio.run_coroutine_threadsafe(
+            self._run_limited(coro, time.perf_counter()), loop
+        )
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """
+        Detiene el bucle de eventos cancelando las corrutinas pendientes.
+
+        Args:
+            timeout: Segundos máximos de espera para que termine el hilo
+        """
+        if self._loop is None or not self.is_running:
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    async def _run_limited(self, coro: Coroutine[Any, Any, T], submitted: float) -> T:
+        """Ejecuta la corrutina respetando el límite de concurrencia."""
+        assert self._semaphore is not None
+        # La espera en cola de la telemetría empieza al enviar la corrutina al motor
+        with queued(submitted):
+            try:
+                await self._semaphore.acquire()
+            except BaseException:
+                # Cancelada antes de empezar: cerrar la corrutina para no dejarla huérfana
+                coro.close()
+                raise
+            try:
+                return await coro
+            finally:
+                self._semaphore.release()
+
+    def _run_loop(self) -> None:
+        """Cuerpo del hilo del motor."""
+        assert self._loop is not None
+        loop = self._loop
+        asyncio.set_event_loop(loop)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            pending = asyncio.all_tasks(loop)
+            for task in pending:
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.close()
@@ -0,0 +1,73 @@
+"""
+Errores de la comunicación con la API de OpenAI.
+"""
+
+from typing import Mapping, Optional
+
+import openai
+
+
+class OpenAIClientError(Exception):
+    """Error al comunicarse con la API de OpenAI."""
+
+    def __init__(
+        self,
+        message: str,
+        retryable: bool = False,
+        status_code: Optional[int] = None,
+        headers: Optional[Mapping[str, str]] = None,
+    ) -> None:
+        """
+        Inicializa el error.
+
+        Args:
+            message: Descripción del error
+            retryable: Si la petición puede reintentarse (429, 5xx, red)
+            status_code: Código HTTP de la respuesta, si la hubo
+            headers: Cabeceras de la respuesta, si la hubo
+        """
+        super().__init__(message)
+        self.retryable = retryable
+        self.status_code = status_code
+        self.headers: Mapping[str, str] = headers or {}
+
+    @property
+    def is_rate_limit(self) -> bool:
+        """Indica si el servidor rechazó la petición por límite de uso (429)."""
+        return self.status_code == 429
+
+    @classmethod
+    def from_exception(cls, error: Exception) -> "OpenAIClientError":
+        """
+        Convierte una excepción de la librería de OpenAI en un OpenAIClientError.
+
+        Args:
+            error: La excepción original
+
+        Returns:
+            El error equivalente, marcado como reintentable si corresponde
+        """
+        if isinstance(error, OpenAIClientError):
+            return error
+
+        message = f"Error al comunicarse con OpenAI: {str(error)}"
+        if isinstance(error, openai.APIStatusError):
+            status = error.status_code
+            return cls(
+                message,
+                retryable=status in (408, 409, 429) or status >= 500,
+                status_code=status,
+                headers=dict(error.response.headers),
+            )
+        if isinstance(error, openai.APIConnectionError):
+            # Incluye los tiempos de espera agotados (APITimeoutError)
+            return cls(message, retryable=True)
+        return cls(message)
+
+
+class RequestCancelledError(OpenAIClientError):
+    """La petición se canceló antes de terminar."""
+
+
+class DeadlineExceededError(RequestCancelledError):
+    """La petición superó su tiempo máximo y se canceló."""
@@ -0,0 +1,115 @@
+"""
+Pool de conexiones HTTP compartido por todos los clientes de OpenAI.
+
+Todas las conversaciones reutilizan las mismas conexiones keep-alive, de modo
+que solo la primera petición paga la resolución DNS y el establecimiento de
+TCP y TLS. Ese coste puede adelantarse en segundo plano con `awarm_up`.
+"""
+
+import asyncio
+import threading
+import weakref
+from typing import Optional
+
+import httpx
+import openai
+
+from chat_gpt_local.api.telemetry import atrace_http_request, trace_http_request
+from chat_gpt_local.config.settings import settings
+
+try:
+    import h2  # noqa: F401  (necesario para HTTP/2 en httpx)
+    HAS_HTTP2 = True
+except ImportError:
+    HAS_HTTP2 = False
+
+_lock = threading.Lock()
+_client: Optional[httpx.Client] = None
+# Un cliente asíncrono por bucle de eventos: sus conexiones quedan ligadas a él
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_limits() -> httpx.Limits:
+    """Devuelve los límites del pool según la configuración."""
+    return httpx.Limits(
+        max_connections=settings.http_max_connections,
+        max_keepalive_connections=settings.http_max_keepalive_connections,
+        keepalive_expiry=settings.http_keepalive_expiry,
+    )
+
+
+def use_http2() -> bool:
+    """Indica si se debe negociar HTTP/2 (requiere el paquete h2)."""
+    return settings.http2 and HAS_HTTP2
+
+
+def get_http_client() -> httpx.Client:
+    """Devuelve el cliente HTTP síncrono compartido, creándolo si no existe."""
+    global _client
+    with _lock:
+        if _client is None or _client.is_closed:
+            _client = httpx.Client(
+                limits=get_limits(),
+                http2=use_http2(),
+                timeout=openai.DEFAULT_TIMEOUT,
+                follow_redirects=True,
+                event_hooks={"request": [trace_http_request]},
+            )
+        return _client
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """
+    Devuelve el cliente HTTP asíncrono compartido del bucle de eventos actual.
+
+    Raises:
+        RuntimeError: Si se llama fuera de un bucle de eventos en ejecución
+    """
+    loop = asyncio.get_running_loop()
+    with _lock:
+        client = _async_clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                limits=get_limits(),
+                http2=use_http2(),
+                timeout=openai.DEFAULT_TIMEOUT,
+                follow_redirects=True,
+                event_hooks={"request": [atrace_http_request]},
+            )
+            _async_clients[loop] = client
+        return client
+
+
+async def awarm_up(url: str) -> None:
+    """
+    Abre una conexión con el servidor para que la primera petición la reutilice.
+
+    Los errores se ignoran: el calentamiento es solo una optimización.
+
+    Args:
+        url: Una URL del servidor de la API (se usa solo su origen)
+    """
+    try:
+        await get_async_http_client().head(url)
+    except httpx.HTTPError:
+        pass
+
+
+async def aclose_async_http_client() -> None:
+    """Cierra el cliente asíncrono del bucle actual y sus conexiones."""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        client = _async_clients.pop(loop, None)
+    if client is not None:
+        await client.aclose()
+
+
+def close_http_client() -> None:
+    """Cierra el cliente síncrono compartido y sus conexiones."""
+    global _client
+    with _lock:
+        client, _client = _client, None
+    if client is not None:
+        client.close()
@@ -2,45 +2,551 @@
 Módulo para la integración con la API de OpenAI.
 """
 
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    cast,
+)
 
 import openai
-from openai.types.chat import ChatCompletion
+from openai.types.chat import (
+    ChatCompletion,
+    ChatCompletionMessageParam,
+    ChatCompletionStreamOptionsParam,
+)
 
-from chat_gpt_local.config.settings import settings
+from chat_gpt_local.api.cache import ResponseCache, request_fingerprint
+from chat_gpt_local.api.cancellation import CancellationToken, cancel_scope
+from chat_gpt_local.api.coalescing import RequestCoalescer
+from chat_gpt_local.api.context import ContextBuilder
+from chat_gpt_local.api.errors import OpenAIClientError
+from chat_gpt_local.api.http_pool import (
+    awarm_up,
+    get_async_http_client,
+    get_http_client,
+)
+from chat_gpt_local.api.telemetry import RequestTrace, telemetry
+from chat_gpt_local.config.settings import EndpointConfig, settings
+
+# Mensajes tal y como se envían a la API
+Messages = List[Dict[str, str]]
+
+# Pide al servidor el `usage` de las respuestas en streaming (en el último fragmento)
+STREAM_OPTIONS: ChatCompletionStreamOptionsParam = {"include_usage": True}
+
+
+def _api_messages(messages: Messages) -> List[ChatCompletionMessageParam]:
+    """
+    Da a los mensajes el tipo que espera el SDK de OpenAI.
+
+    Los mensajes ya tienen la forma de la API (`role` y `content`); solo cambia
+    el tipo estático, sin copiarlos.
+
+    Args:
+        messages: Los mensajes de la conversación
+
+    Returns:
+        Los mismos mensajes
+    """
+    return cast(List[ChatCompletionMessageParam], messages)
 
 
 class OpenAIClient:
     """Cliente para la API de OpenAI."""
 
-    def __init__(self) -> None:
-        """Inicializa el cliente con la clave API de la configuración."""
-        self.client = openai.OpenAI(api_key=settings.openai_api_key)
-        self.model = settings.model
+    def __init__(self, endpoint: Optional[EndpointConfig] = None) -> None:
+        """
+        Inicializa el cliente con la clave API de la configuración.
+
+        Args:
+            endpoint: Servidor al que conectarse (por defecto, el de la configuración)
+        """
+        endpoint = endpoint or EndpointConfig()
+        self.name = endpoint.name or endpoint.base_url or "openai"
+        self.api_key = endpoint.api_key or settings.openai_api_key
+        self.base_url = endpoint.base_url or settings.base_url
+        self.client = openai.OpenAI(
+            api_key=self.api_key,
+            base_url=self.base_url,
+            http_client=get_http_client(),
+        )
+        self._async_client: Optional[openai.AsyncOpenAI] = None
+        self.model = endpoint.model or settings.model
         self.temperature = settings.temperature
         self.max_tokens = settings.max_tokens
+        self.system_prompt = settings.system_prompt
+        self.context_builder = ContextBuilder(
+            self.model, self.max_tokens, settings.context_window
+        )
+        self.cache: Optional[ResponseCache] = None
+        if settings.cache_enabled:
+            self.cache = ResponseCache(
+                settings.cache_path,
+                max_entries=settings.cache_max_entries,
+                max_bytes=settings.cache_max_mb * 1024 * 1024,
+                max_age=settings.cache_max_age_hours * 3600,
+            )
+        # Agrupa las peticiones idénticas que coinciden en el tiempo
+        self.coalescer: Optional[RequestCoalescer] = (
+            RequestCoalescer() if settings.coalesce_requests else None
+        )
+        # Función que recibe las cabeceras de cada respuesta asíncrona
+        # (la usa el planificador para seguir los límites de uso del servidor)
+        self.headers_listener: Optional[Callable[[Mapping[str, str]], None]] = None
+        # Función que recibe el `usage` de cada respuesta de la API (tokens de
+        # prompt, de respuesta y servidos desde la caché de prompts del proveedor)
+        self.usage_listener: Optional[Callable[[Any], None]] = None
+        # Mediciones de latencia y tokens de cada petición
+        self.telemetry = telemetry
+
+    @property
+    def async_client(self) -> openai.AsyncOpenAI:
+        """
+        Cliente asíncrono de OpenAI, creado la primera vez que se usa.
 
-    def send_message(self, message: str) -> str:
+        Debe usarse siempre desde el mismo bucle de eventos (el del motor de
+        peticiones), ya que usa el pool de conexiones compartido de ese bucle.
+        """
+        if self._async_client is None:
+            # Los reintentos asíncronos los gestiona el planificador de peticiones
+            self._async_client = openai.AsyncOpenAI(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                http_client=get_async_http_client(),
+                max_retries=0,
+            )
+        return self._async_client
+
+    def build_messages(
+        self,
+        message: str,
+        history: Optional[Sequence[Mapping[str, Any]]] = None,
+        pinned: Sequence[Mapping[str, Any]] = (),
+    ) -> Messages:
+        """
+        Construye los mensajes de una petición ajustados al presupuesto de tokens.
+
+        Args:
+            message: El nuevo mensaje del usuario
+            history: Los mensajes anteriores de la conversación
+            pinned: Mensajes que deben enviarse siempre, tras el prompt de sistema
+
+        Returns:
+            La lista de mensajes a enviar a la API
+        """
+        pinned_messages: List[Mapping[str, Any]] = []
+        if self.system_prompt:
+            pinned_messages.append({"role": "system", "content": self.system_prompt})
+        pinned_messages.extend(pinned)
+
+        return self.context_builder.build(
+            history or (), pinned_messages, [{"role": "user", "content": message}]
+        )
+
+    def fingerprint(self, messages: Messages) -> str:
+        """
+        Calcula la huella de una petición con la configuración actual del cliente.
+
+        Args:
+            messages: Los mensajes a enviar
+
+        Returns:
+            La clave con la que se guarda la respuesta en la caché
+        """
+        return request_fingerprint(
+            self.model, self.temperature, self.max_tokens, messages
+        )
+
+    def send_message(
+        self, message: str, history: Optional[Sequence[Mapping[str, Any]]] = None
+    ) -> str:
         """
         Envía un mensaje a la API de OpenAI y devuelve la respuesta.
-        
+
+        Args:
+            message: El mensaje del usuario
+            history: Los mensajes anteriores de la conversación
+
+        Returns:
+            La respuesta del modelo de OpenAI
+
+        Raises:
+            OpenAIClientError: Si hay un error en la comunicación con la API
+        """
+        return self.complete(self.build_messages(message, history))
+
+    def stream_message(
+        self, message: str, history: Optional[Sequence[Mapping[str, Any]]] = None
+    ) -> Iterator[str]:
+        """
+        Envía un mensaje a la API de OpenAI y devuelve la respuesta por fragmentos.
+
+        Args:
+            message: El mensaje del usuario
+            history: Los mensajes anteriores de la conversación
+
+        Yields:
+            Fragmentos de texto de la respuesta del modelo
+
+        Raises:
+            OpenAIClientError: Si hay un error en la comunicación con la API
+        """
+        return self.stream(self.build_messages(message, history))
+
+    async def asend_message(
+        self, message: str, history: Optional[Sequence[Mapping[str, Any]]] = None
+    ) -> str:
+        """
+        Versión asíncrona de `send_message`.
+
         Args:
             message: El mensaje del usuario
-            
+            history: Los mensajes anteriores de la conversación
+
+        Returns:
+            La respuesta del modelo de OpenAI
+
+        Raises:
+            OpenAIClientError: Si hay un error en la comunicación con la API
+        """
+        return await self.acomplete(self.build_messages(message, history))
+
+    def astream_message(
+        self, message: str, history: Optional[Sequence[Mapping[str, Any]]] = None
+    ) -> AsyncIterator[str]:
+        """
+        Versión asíncrona de `stream_message`.
+
+        Args:
+            message: El mensaje del usuario
+            history: Los mensajes anteriores de la conversación
+
+        Yields:
+            Fragmentos de texto de la respuesta del modelo
+
+        Raises:
+            OpenAIClientError: Si hay un error en la comunicación con la API
+        """
+        return self.astream(self.build_messages(message, history))
+
+    def complete(
+        self,
+        messages: Messages,
+        use_cache: bool = True,
+        token: Optional[CancellationToken] = None,
+    ) -> str:
+        """
+        Envía una lista de mensajes ya construida y devuelve la respuesta.
+
+        Args:
+            messages: Los mensajes a enviar
+            use_cache: Si es False, ignora la caché de respuestas en esta petición
+            token: Token de cancelación; su plazo se aplica como tiempo máximo
+
         Returns:
             La respuesta del modelo de OpenAI
-            
+
+        Raises:
+            OpenAIClientError: Si hay un error en la comunicación con la API
+            RequestCancelledError: Si la petición se cancela o agota su plazo
+        """
+        key = self.fingerprint(messages)
+        cached = self._cached_response(key, use_cache)
+        if cached is not None:
+            return cached
+
+        if token is not None:
+            token.raise_if_cancelled()
+        if self.coalescer is None:
+            return self._complete_upstream(messages, key, token)
+        # La petición se comparte con otros llamantes: no lleva el plazo de ninguno,
+        # y cada uno espera con su propio token
+        return self.coalescer.call(
+            key, lambda: self._complete_upstream(messages, key), token
+        )
+
+    def stream(
+        self,
+        messages: Messages,
+        use_cache: bool = True,
+        token: Optional[CancellationToken] = None,
+    ) -> Iterator[str]:
+        """
+        Envía una lista de mensajes ya construida y devuelve la respuesta por fragmentos.
+
+        Los fragmentos se entregan a medida que el modelo los genera, de modo que
+        la interfaz puede mostrar la respuesta sin esperar a que termine. Si la
+        respuesta está en la caché, se entrega en un único fragmento.
+
+        Args:
+            messages: Los mensajes a enviar
+            use_cache: Si es False, ignora la caché de respuestas en esta petición
+            token: Token de cancelación, que se comprueba entre fragmentos
+
+        Yields:
+            Fragmentos de texto de la respuesta del modelo
+
         Raises:
-            Exception: Si hay un error en la comunicación con la API
+            OpenAIClientError: Si hay un error en la comunicación con la API
+            RequestCancelledError: Si la petición se cancela o agota su plazo
         """
+        key = self.fingerprint(messages)
+        cached = self._cached_response(key, use_cache)
+        if cached is not None:
+            yield cached
+            return
+
+        chunks: List[str] = []
         try:
-            response: ChatCompletion = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "user", "content": message}
-                ],
-                temperature=self.temperature,
-                max_tokens=self.max_tokens,
+            with self.telemetry.measure(self.name, self.model, streamed=True) as trace:
+                with trace.sending():
+                    stream = self.client.chat.completions.create(
+                        model=self.model,
+                        messages=_api_messages(messages),
+                        temperature=self.temperature,
+                        max_tokens=self.max_tokens,
+                        stream=True,
+                        stream_options=STREAM_OPTIONS,
+                        **self._request_options(token),
+                    )
+                try:
+                    for chunk in stream:
+                        if token is not None:
+                            # Al salir del bucle se cierra el stream y su conexión
+                            token.raise_if_cancelled()
+                        self._report_usage(chunk.usage, trace)
+                        if not chunk.choices:
+                            continue
+                        delta = chunk.choices[0].delta.content
+                        if delta:
+                            trace.token()
+                            chunks.append(delta)
+                            yield delta
+                finally:
+                    stream.close()
+        except Exception as e:
+            raise self._client_error(e, token) from e
+
+        self._store(key, "".join(chunks))
+
+    async def acomplete(
+        self,
+        messages: Messages,
+        use_cache: bool = True,
+        token: Optional[CancellationToken] = None,
+    ) -> str:
+        """
+        Versión asíncrona de `complete`.
+
+        Args:
+            messages: Los mensajes a enviar
+            use_cache: Si es False, ignora la caché de respuestas en esta petición
+            token: Token de cancelación; cancelarlo aborta la petición HTTP
+
+        Returns:
+            La respuesta del modelo de OpenAI
+
+        Raises:
+            OpenAIClientError: Si hay un error en la comunicación con la API
+            RequestCancelledError: Si la petición se cancela o agota su plazo
+        """
+        key = self.fingerprint(messages)
+        cached = self._cached_response(key, use_cache)
+        if cached is not None:
+            return cached
+
+        async with cancel_scope(token):
+            if self.coalescer is None:
+                return await self._acomplete_upstream(messages, key)
+            return await self.coalescer.run(
+                key, lambda: self._acomplete_upstream(messages, key)
+            )
+
+    async def astream(
+        self,
+        messages: Messages,
+        use_cache: bool = True,
+        token: Optional[CancellationToken] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Versión asíncrona de `stream`.
+
+        Args:
+            messages: Los mensajes a enviar
+            use_cache: Si es False, ignora la caché de respuestas en esta petición
+            token: Token de cancelación; cancelarlo cierra el stream HTTP
+
+        Yields:
+            Fragmentos de texto de la respuesta del modelo
+
+        Raises:
+            OpenAIClientError: Si hay un error en la comunicación con la API
+            RequestCancelledError: Si la petición se cancela o agota su plazo
+        """
+        key = self.fingerprint(messages)
+        cached = self._cached_response(key, use_cache)
+        if cached is not None:
+            yield cached
+            return
+
+        if self.coalescer is None:
+            stream = self._astream_upstream(messages, key)
+        else:
+            stream = self.coalescer.stream(
+                key, lambda: self._astream_upstream(messages, key)
             )
-            return response.choices[0].message.content or ""
+        async with cancel_scope(token):
+            async for chunk in stream:
+                yield chunk
+
+    def cached(self, messages: Messages) -> Optional[str]:
+        """
+        Devuelve la respuesta guardada de una petición, si está en la caché.
+
+        Args:
+            messages: Los mensajes de la petición
+
+        Returns:
+            La respuesta guardada, o None si no hay caché o no está guardada
+        """
+        return self._cached_response(self.fingerprint(messages), True)
+
+    async def awarm_up(self) -> None:
+        """Abre por adelantado la conexión con la API en el pool compartido."""
+        await awarm_up(str(self.async_client.base_url))
+
+    def estimate_tokens(self, messages: Messages) -> int:
+        """
+        Estima los tokens que consumirá una petición (prompt y respuesta máxima).
+
+        Args:
+            messages: Los mensajes a enviar
+
+        Returns:
+            Los tokens estimados, para los límites de tokens por minuto
+        """
+        counter = self.context_builder.counter
+        prompt_tokens = sum(counter.count(m) for m in messages)
+        return prompt_tokens + self.context_builder.completion_reserve
+
+    def _report_headers(self, headers: Mapping[str, str]) -> None:
+        """Entrega las cabeceras de una respuesta al oyente registrado."""
+        if self.headers_listener is not None:
+            self.headers_listener(headers)
+
+    def _report_usage(self, usage: Any, trace: RequestTrace) -> None:
+        """Anota el `usage` de una respuesta y lo entrega al oyente registrado."""
+        if usage is None:
+            return
+        trace.usage = usage
+        if self.usage_listener is not None:
+            self.usage_listener(usage)
+
+    def _cached_response(self, key: str, use_cache: bool) -> Optional[str]:
+        """Busca la respuesta de una petición en la caché, si se usa."""
+        if self.cache is None or not use_cache:
+            return None
+        return self.cache.get(key)
+
+    @staticmethod
+    def _request_options(token: Optional[CancellationToken]) -> Dict[str, Any]:
+        """Opciones de una petición síncrona: el plazo del token como tiempo máximo."""
+        remaining = token.remaining() if token is not None else None
+        return {"timeout": remaining} if remaining is not None else {}
+
+    @staticmethod
+    def _client_error(
+        error: Exception, token: Optional[CancellationToken]
+    ) -> OpenAIClientError:
+        """Convierte un error síncrono, atribuyéndolo al token si ya se agotó su plazo."""
+        if token is not None and token.cancelled:
+            return token.error()
+        return OpenAIClientError.from_exception(error)
+
+    def _store(self, key: str, content: str) -> None:
+        """Guarda una respuesta completa en la caché si está activada."""
+        if content and self.cache is not None:
+            self.cache.set(key, content)
+
+    def _complete_upstream(
+        self, messages: Messages, key: str, token: Optional[CancellationToken] = None
+    ) -> str:
+        """Realiza una petición síncrona a la API y guarda la respuesta."""
+        try:
+            with self.telemetry.measure(self.name, self.model, streamed=False) as trace:
+                with trace.sending():
+                    response: ChatCompletion = self.client.chat.completions.create(
+                        model=self.model,
+                        messages=_api_messages(messages),
+                        temperature=self.temperature,
+                        max_tokens=self.max_tokens,
+                        **self._request_options(token),
+                    )
+                self._report_usage(response.usage, trace)
+            content = response.choices[0].message.content or ""
         except Exception as e:
-            raise Exception(f"Error al comunicarse con OpenAI: {str(e)}") from e
\ No newline at end of file
+            raise self._client_error(e, token) from e
+
+        self._store(key, content)
+        return content
+
+    async def _acomplete_upstream(self, messages: Messages, key: str) -> str:
+        """Realiza una petición asíncrona a la API y guarda la respuesta."""
+        try:
+            with self.telemetry.measure(self.name, self.model, streamed=False) as trace:
+                with trace.sending():
+                    raw = await self.async_client.chat.completions.with_raw_response.create(
+                        model=self.model,
+                        messages=_api_messages(messages),
+                        temperature=self.temperature,
+                        max_tokens=self.max_tokens,
+                    )
+                self._report_headers(raw.headers)
+                response: ChatCompletion = raw.parse()
+                self._report_usage(response.usage, trace)
+            content = response.choices[0].message.content or ""
+        except Exception as e:
+            raise OpenAIClientError.from_exception(e) from e
+
+        self._store(key, content)
+        return content
+
+    async def _astream_upstream(self, messages: Messages, key: str) -> AsyncIterator[str]:
+        """Realiza una petición asíncrona en streaming y guarda la respuesta completa."""
+        chunks: List[str] = []
+        try:
+            with self.telemetry.measure(self.name, self.model, streamed=True) as trace:
+                with trace.sending():
+                    raw = await self.async_client.chat.completions.with_raw_response.create(
+                        model=self.model,
+                        messages=_api_messages(messages),
+                        temperature=self.temperature,
+                        max_tokens=self.max_tokens,
+                        stream=True,
+                        stream_options=STREAM_OPTIONS,
+                    )
+                self._report_headers(raw.headers)
+                stream = raw.parse()
+                try:
+                    async for chunk in stream:
+                        self._report_usage(chunk.usage, trace)
+                        if not chunk.choices:
+                            continue
+                        delta = chunk.choices[0].delta.content
+                        if delta:
+                            trace.token()
+                            chunks.append(delta)
+                            yield delta
+                finally:
+                    await stream.close()
+        except Exception as e:
+            raise OpenAIClientError.from_exception(e) from e
+
+        self._store(key, "".join(chunks))
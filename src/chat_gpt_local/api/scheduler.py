@@ -0,0 +1,460 @@
+"""
+Planificador de peticiones con control de límites de uso.
+
+Se sitúa entre la interfaz y `OpenAIClient`: reparte las peticiones según los
+presupuestos de peticiones y tokens por minuto (cubetas de tokens), ajusta esos
+presupuestos con las cabeceras `x-ratelimit-*` que devuelve el servidor y
+reintenta los errores transitorios (429, 5xx, red) con espera exponencial.
+"""
+
+import asyncio
+import random
+import re
+import time
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Mapping,
+    Optional,
+    TypeVar,
+)
+
+from chat_gpt_local.api.backends import ChatBackend, MultiEndpointBackend
+from chat_gpt_local.api.cancellation import CancellationToken, cancel_scope
+from chat_gpt_local.api.errors import OpenAIClientError
+from chat_gpt_local.api.openai_client import Messages, OpenAIClient
+from chat_gpt_local.api.telemetry import queued
+from chat_gpt_local.config.settings import settings
+
+T = TypeVar('T')
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """
+    Convierte una duración de las cabeceras de OpenAI ("20ms", "6m0s") a segundos.
+
+    Args:
+        value: El valor de la cabecera
+
+    Returns:
+        Los segundos o None si el valor no es válido
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def _parse_int(value: Optional[str]) -> Optional[int]:
+    """Convierte el valor de una cabecera a entero, o None si no es válido."""
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class TokenBucket:
+    """Cubeta de tokens que se rellena a un ritmo constante por minuto."""
+
+    def __init__(self, per_minute: float = 0) -> None:
+        """
+        Inicializa la cubeta llena.
+
+        Args:
+            per_minute: Capacidad y ritmo de recarga por minuto (0 = sin límite)
+        """
+        self.capacity = float(per_minute)
+        self.tokens = float(per_minute)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    @property
+    def unlimited(self) -> bool:
+        """Indica si la cubeta no impone ningún límite."""
+        return self.capacity <= 0
+
+    async def acquire(self, amount: float = 1) -> float:
+        """
+        Espera hasta que haya tokens suficientes y los consume.
+
+        Las peticiones mayores que la capacidad esperan a tener la cubeta llena
+        y la dejan en negativo, de modo que nunca se bloquean para siempre.
+
+        Args:
+            amount: Tokens a consumir
+
+        Returns:
+            Los segundos que se ha esperado
+        """
+        waited = 0.0
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                delay = self._blocked_until - now
+                if delay <= 0:
+                    if self.unlimited:
+                        return waited
+                    needed = min(amount, self.capacity)
+                    if self.tokens >= needed:
+                        self.tokens -= amount
+                        return waited
+                    delay = (needed - self.tokens) * 60.0 / self.capacity
+                await asyncio.sleep(delay)
+                waited += delay
+
+    def update(
+        self, limit: Optional[int], remaining: Optional[int], reset: Optional[float]
+    ) -> None:
+        """
+        Sincroniza la cubeta con los límites informados por el servidor.
+
+        Args:
+            limit: Límite por minuto del servidor
+            remaining: Unidades restantes en la ventana actual
+            reset: Segundos hasta que el servidor recupere el límite completo
+        """
+        now = time.monotonic()
+        self._refill(now)
+        if limit and self.unlimited:
+            # Aprender el límite real del servidor si no se configuró ninguno
+            self.capacity = float(limit)
+            self.tokens = self.capacity
+        elif limit and limit < self.capacity:
+            self.capacity = float(limit)
+            self.tokens = min(self.tokens, self.capacity)
+        if remaining is not None and not self.unlimited:
+            self.tokens = min(self.tokens, float(remaining))
+        if remaining == 0 and reset:
+            self.block_for(reset)
+
+    def wait_time(self, amount: float = 1) -> float:
+        """
+        Calcula cuánto habría que esperar ahora para consumir tokens (sin consumirlos).
+
+        Args:
+            amount: Tokens a consumir
+
+        Returns:
+            Los segundos de espera (0 si hay tokens suficientes)
+        """
+        now = time.monotonic()
+        self._refill(now)
+        blocked = max(0.0, self._blocked_until - now)
+        if self.unlimited:
+            return blocked
+        deficit = min(amount, self.capacity) - self.tokens
+        return max(blocked, deficit * 60.0 / self.capacity if deficit > 0 else 0.0)
+
+    def block_for(self, seconds: float) -> None:
+        """Impide consumir tokens durante los segundos indicados."""
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    def _refill(self, now: float) -> None:
+        """Recarga los tokens según el tiempo transcurrido."""
+        if not self.unlimited:
+            elapsed = now - self._updated
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.capacity / 60.0)
+        self._updated = now
+
+
+class EndpointLimits:
+    """Presupuestos de peticiones y tokens por minuto de un servidor."""
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int) -> None:
+        """
+        Inicializa los presupuestos llenos.
+
+        Args:
+            requests_per_minute: Peticiones por minuto (0 = aprenderlo del servidor)
+            tokens_per_minute: Tokens por minuto (0 = aprenderlo del servidor)
+        """
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+
+    def observe_headers(self, headers: Mapping[str, str]) -> None:
+        """
+        Ajusta los presupuestos con las cabeceras de límite de uso de una respuesta.
+
+        Args:
+            headers: Las cabeceras HTTP de la respuesta
+        """
+        self.requests.update(
+            _parse_int(headers.get("x-ratelimit-limit-requests")),
+            _parse_int(headers.get("x-ratelimit-remaining-requests")),
+            parse_duration(headers.get("x-ratelimit-reset-requests")),
+        )
+        self.tokens.update(
+            _parse_int(headers.get("x-ratelimit-limit-tokens")),
+            _parse_int(headers.get("x-ratelimit-remaining-tokens")),
+            parse_duration(headers.get("x-ratelimit-reset-tokens")),
+        )
+
+    def wait_time(self) -> float:
+        """Segundos que tendría que esperar ahora una petición."""
+        return max(self.requests.wait_time(1), self.tokens.wait_time(0))
+
+    async def acquire(self, estimate_tokens: Callable[[], int]) -> None:
+        """
+        Espera turno en los presupuestos de peticiones y tokens.
+
+        Args:
+            estimate_tokens: Calcula los tokens de la petición (solo si hay límite)
+        """
+        await self.requests.acquire(1)
+        if not self.tokens.unlimited:
+            await self.tokens.acquire(estimate_tokens())
+
+
+def _retry_after(error: OpenAIClientError) -> Optional[float]:
+    """Segundos de espera indicados por el servidor (Retry-After), si los hay."""
+    retry_after = parse_duration(error.headers.get("retry-after-ms"))
+    if retry_after is not None:
+        return retry_after / 1000.0
+    return parse_duration(error.headers.get("retry-after"))
+
+
+class RateLimitScheduler:
+    """Ejecuta peticiones respetando los límites de uso y reintentando errores transitorios."""
+
+    def __init__(
+        self,
+        client: ChatBackend,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        base_delay: Optional[float] = None,
+        max_delay: Optional[float] = None,
+    ) -> None:
+        """
+        Inicializa el planificador. Los parámetros omitidos se toman de la configuración.
+
+        Cada servidor tiene sus propios presupuestos: con un `MultiEndpointBackend`,
+        el backend pide turno al servidor que elige y un 429 o una cuota agotada
+        en uno no frena a los demás.
+
+        Args:
+            client: El cliente (o backend con varios servidores) que realiza las peticiones
+            requests_per_minute: Presupuesto de peticiones por minuto (0 = aprenderlo del servidor)
+            tokens_per_minute: Presupuesto de tokens por minuto (0 = aprenderlo del servidor)
+            max_retries: Reintentos máximos de una petición; con un `MultiEndpointBackend`,
+                cada servidor que prueba el backend cuenta como un intento
+            base_delay: Espera base del primer reintento, en segundos
+            max_delay: Espera máxima entre reintentos, en segundos
+        """
+        self.client = client
+        self._requests_per_minute = (
+            settings.rate_limit_rpm if requests_per_minute is None else requests_per_minute
+        )
+        self._tokens_per_minute = (
+            settings.rate_limit_tpm if tokens_per_minute is None else tokens_per_minute
+        )
+        self.limits: Dict[str, EndpointLimits] = {}
+        self.max_retries = settings.max_retries if max_retries is None else max_retries
+        self.base_delay = settings.retry_base_delay if base_delay is None else base_delay
+        self.max_delay = settings.retry_max_delay if max_delay is None else max_delay
+        self.retries = 0
+        if isinstance(client, MultiEndpointBackend):
+            for endpoint_client in client.clients:
+                endpoint_client.headers_listener = (
+                    self.limits_for(endpoint_client.name).observe_headers
+                )
+            client.limiter = self
+            self._primary = self.limits_for(client.primary.name)
+        else:
+            self._primary = self.limits_for(getattr(client, "name", "openai"))
+            client.headers_listener = self._primary.observe_headers
+
+    @property
+    def requests(self) -> TokenBucket:
+        """Presupuesto de peticiones del servidor preferido."""
+        return self._primary.requests
+
+    @property
+    def tokens(self) -> TokenBucket:
+        """Presupuesto de tokens del servidor preferido."""
+        return self._primary.tokens
+
+    def limits_for(self, endpoint: str) -> EndpointLimits:
+        """
+        Devuelve los presupuestos de un servidor, creándolos la primera vez.
+
+        Args:
+            endpoint: El nombre del servidor
+        """
+        limits = self.limits.get(endpoint)
+        if limits is None:
+            limits = EndpointLimits(self._requests_per_minute, self._tokens_per_minute)
+            self.limits[endpoint] = limits
+        return limits
+
+    async def complete(
+        self,
+        messages: Messages,
+        token: Optional[CancellationToken] = None,
+        **kwargs: Any,
+    ) -> str:
+        """
+        Versión planificada de `acomplete` del cliente.
+
+        Args:
+            messages: Los mensajes a enviar
+            token: Token de cancelación; su plazo incluye las esperas y reintentos
+            **kwargs: Opciones adicionales para el cliente (p. ej. use_cache)
+
+        Returns:
+            La respuesta del modelo
+
+        Raises:
+            OpenAIClientError: Si la petición falla y no quedan reintentos
+            RequestCancelledError: Si la petición se cancela o agota su plazo
+        """
+        if token is not None:
+            kwargs["token"] = token
+        with queued():
+            async with cancel_scope(token):
+                return await self._run(
+                    messages, lambda: self.client.acomplete(messages, **kwargs)
+                )
+
+    async def stream(
+        self,
+        messages: Messages,
+        token: Optional[CancellationToken] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[str]:
+        """
+        Versión planificada de `astream` del cliente.
+
+        Solo se reintenta si el error ocurre antes del primer fragmento, para no
+        entregar texto duplicado.
+
+        Args:
+            messages: Los mensajes a enviar
+            token: Token de cancelación; su plazo incluye las esperas y reintentos
+            **kwargs: Opciones adicionales para el cliente (p. ej. use_cache)
+
+        Yields:
+            Fragmentos de texto de la respuesta
+
+        Raises:
+            OpenAIClientError: Si la petición falla y no quedan reintentos
+            RequestCancelledError: Si la petición se cancela o agota su plazo
+        """
+        if token is not None:
+            kwargs["token"] = token
+        with queued():
+            async with cancel_scope(token):
+                attempt = 0
+                while True:
+                    await self._acquire(messages)
+                    started = False
+                    try:
+                        async for chunk in self.client.astream(messages, **kwargs):
+                            started = True
+                            yield chunk
+                        return
+                    except OpenAIClientError as e:
+                        if started or not self._should_retry(e, attempt):
+                            raise
+                        await self._backoff(e, attempt)
+                        attempt += 1
+
+    async def _run(
+        self, messages: Messages, operation: Callable[[], Awaitable[T]]
+    ) -> T:
+        """Ejecuta una operación con control de límites y reintentos."""
+        attempt = 0
+        while True:
+            await self._acquire(messages)
+            try:
+                return await operation()
+            except OpenAIClientError as e:
+                if not self._should_retry(e, attempt):
+                    raise
+                await self._backoff(e, attempt)
+                attempt += 1
+
+    async def _acquire(self, messages: Messages) -> None:
+        """Espera turno en los presupuestos (con varios servidores lo pide el backend)."""
+        if not isinstance(self.client, MultiEndpointBackend):
+            await self._primary.acquire(lambda: self.client.estimate_tokens(messages))
+
+    async def admit(self, client: OpenAIClient, messages: Messages) -> None:
+        """
+        Espera turno en los presupuestos del servidor que ha elegido el backend.
+
+        Args:
+            client: El cliente del servidor
+            messages: Los mensajes de la petición
+        """
+        await self.limits_for(client.name).acquire(lambda: client.estimate_tokens(messages))
+
+    def wait_time(self, client: OpenAIClient) -> float:
+        """
+        Calcula cuánto tendría que esperar ahora una petición a un servidor.
+
+        Args:
+            client: El cliente del servidor
+        """
+        return self.limits_for(client.name).wait_time()
+
+    def penalize(self, client: OpenAIClient, error: OpenAIClientError) -> None:
+        """
+        Frena solo al servidor que ha rechazado una petición por límite de uso.
+
+        Args:
+            client: El cliente del servidor
+            error: El error de la petición
+        """
+        limits = self.limits_for(client.name)
+        if error.headers:
+            limits.observe_headers(error.headers)
+        if error.is_rate_limit:
+            delay = _retry_after(error) or self.base_delay
+            limits.requests.block_for(min(delay, self.max_delay))
+
+    def _should_retry(self, error: OpenAIClientError, attempt: int) -> bool:
+        """
+        Indica si un error debe reintentarse.
+
+        Los intentos en servidores, incluida la conmutación por error del backend,
+        no pasan de `max_retries + 1` en total.
+        """
+        per_attempt = (
+            len(self.client.endpoints) if isinstance(self.client, MultiEndpointBackend) else 1
+        )
+        return error.retryable and (attempt + 2) * per_attempt <= self.max_retries + 1
+
+    async def _backoff(self, error: OpenAIClientError, attempt: int) -> None:
+        """Espera antes de reintentar, respetando Retry-After si el servidor lo indica."""
+        self.retries += 1
+        # Con varios servidores, el backend ya ha frenado al que rechazó la petición
+        per_endpoint = isinstance(self.client, MultiEndpointBackend)
+        if error.headers and not per_endpoint:
+            self._primary.observe_headers(error.headers)
+
+        retry_after = _retry_after(error)
+
+        # Espera exponencial con jitter completo
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_delay))
+        if error.is_rate_limit and not per_endpoint:
+            # Un 429 afecta a todas las peticiones al servidor, no solo a esta
+            self._primary.requests.block_for(delay)
+        await asyncio.sleep(delay)
@@ -0,0 +1,492 @@
+"""
+Telemetría de latencia y tokens de cada petición.
+
+Para cada petición a la API se mide:
+
+- Espera en cola: desde que la petición entra en el motor (o en el planificador)
+  hasta que se envía, incluidas las esperas por límites de uso y reintentos.
+- Conexión: tiempo de apertura de TCP y TLS (0 si se reutiliza una conexión).
+- Primer token (TTFT): desde el envío hasta el primer fragmento de texto.
+- Latencia total, tokens de prompt y de respuesta, y tokens por segundo.
+
+Las mediciones se acumulan en histogramas en memoria y pueden exportarse a un
+archivo JSONL (una línea por petición) o como texto en formato Prometheus. Las
+líneas del JSONL las escribe un hilo aparte para no bloquear el bucle de eventos.
+"""
+
+import asyncio
+import json
+import queue
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import httpx
+
+from chat_gpt_local.api.errors import RequestCancelledError
+from chat_gpt_local.api.usage import usage_counts
+from chat_gpt_local.config.settings import settings
+from chat_gpt_local.utils.helpers import percentile
+
+# Límites de los cubos de los histogramas
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+TOKEN_BUCKETS = (16, 64, 256, 1024, 4096, 16384, 65536)
+RATE_BUCKETS = (1, 5, 10, 20, 50, 100, 200, 500)
+
+# Métricas de cada petición: (nombre, descripción, cubos)
+METRICS: Sequence[Tuple[str, str, Sequence[float]]] = (
+    ("queue_wait_seconds", "Espera en cola antes de enviar la petición", LATENCY_BUCKETS),
+    ("connect_seconds", "Apertura de la conexión TCP y TLS", LATENCY_BUCKETS),
+    ("ttft_seconds", "Tiempo hasta el primer token", LATENCY_BUCKETS),
+    ("total_seconds", "Latencia total de la petición", LATENCY_BUCKETS),
+    ("prompt_tokens", "Tokens de prompt por petición", TOKEN_BUCKETS),
+    ("completion_tokens", "Tokens de respuesta por petición", TOKEN_BUCKETS),
+    ("tokens_per_second", "Tokens de respuesta generados por segundo", RATE_BUCKETS),
+)
+
+PROMETHEUS_PREFIX = "chat_gpt_local_request_"
+
+# Momento (time.perf_counter) en que la petición actual entró en cola
+_enqueued_at: ContextVar[Optional[float]] = ContextVar("enqueued_at", default=None)
+# Medición de la petición HTTP que se está enviando desde la tarea actual
+_active_trace: ContextVar[Optional["RequestTrace"]] = ContextVar("active_trace", default=None)
+
+
+@contextmanager
+def queued(at: Optional[float] = None) -> Iterator[None]:
+    """
+    Marca el momento en que la petición de la tarea actual entra en cola.
+
+    La espera en cola de las peticiones enviadas dentro del bloque se mide desde
+    ese momento. Los bloques anidados no hacen nada: cuenta el más externo (p. ej.
+    el motor de peticiones frente al planificador).
+
+    Args:
+        at: El momento según time.perf_counter (por defecto, ahora)
+    """
+    if _enqueued_at.get() is not None:
+        yield
+        return
+    reset = _enqueued_at.set(time.perf_counter() if at is None else at)
+    try:
+        yield
+    finally:
+        try:
+            _enqueued_at.reset(reset)
+        except ValueError:
+            pass  # Generador cerrado desde otro contexto: el valor muere con él
+
+
+@dataclass
+class RequestMetrics:
+    """Mediciones de una petición a la API."""
+
+    endpoint: str
+    model: str
+    streamed: bool
+    outcome: str  # "ok", "error" o "cancelled"
+    queue_wait: float
+    connect: float
+    ttft: Optional[float]
+    total: float
+    prompt_tokens: int
+    completion_tokens: int
+    cached_tokens: int
+    timestamp: float
+
+    @property
+    def tokens_per_second(self) -> float:
+        """Tokens de respuesta por segundo desde el primer token (o desde el envío)."""
+        generation = self.total - (self.ttft or 0.0) if self.streamed else self.total
+        if generation <= 0:
+            return 0.0
+        return self.completion_tokens / generation
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Devuelve las mediciones como diccionario serializable en JSON."""
+        data = asdict(self)
+        data["tokens_per_second"] = round(self.tokens_per_second, 3)
+        return data
+
+
+class RequestTrace:
+    """Mide una petición en curso; `finish` devuelve sus `RequestMetrics`."""
+
+    def __init__(self, endpoint: str, model: str, streamed: bool) -> None:
+        """
+        Empieza a medir la petición.
+
+        Args:
+            endpoint: El nombre del servidor
+            model: El modelo de la petición
+            streamed: Si la respuesta se recibe por streaming
+        """
+        self.endpoint = endpoint
+        self.model = model
+        self.streamed = streamed
+        self.started = time.perf_counter()
+        enqueued_at = _enqueued_at.get()
+        self.queue_wait = (
+            max(self.started - enqueued_at, 0.0) if enqueued_at is not None else 0.0
+        )
+        self.connect = 0.0
+        self.first_token_at: Optional[float] = None
+        self.chunks = 0
+        self.usage: Any = None
+        self._connect_started: Optional[float] = None
+
+    @contextmanager
+    def sending(self) -> Iterator[None]:
+        """Asocia la medición a las peticiones HTTP enviadas dentro del bloque."""
+        reset = _active_trace.set(self)
+        try:
+            yield
+        finally:
+            _active_trace.reset(reset)
+
+    def token(self) -> None:
+        """Registra la llegada de un fragmento de texto."""
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+        self.chunks += 1
+
+    def finish(self, error: Optional[BaseException] = None) -> RequestMetrics:
+        """
+        Termina la medición.
+
+        Args:
+            error: La excepción con la que terminó la petición, si la hubo
+
+        Returns:
+            Las mediciones de la petición
+        """
+        now = time.perf_counter()
+        if error is None:
+            outcome = "ok"
+        elif isinstance(
+            error, (RequestCancelledError, asyncio.CancelledError, GeneratorExit)
+        ):
+            outcome = "cancelled"
+        else:
+            outcome = "error"
+        if self.first_token_at is None and not self.streamed and error is None:
+            self.first_token_at = now
+        prompt_tokens, completion_tokens, cached_tokens = usage_counts(self.usage)
+        return RequestMetrics(
+            endpoint=self.endpoint,
+            model=self.model,
+            streamed=self.streamed,
+            outcome=outcome,
+            queue_wait=self.queue_wait,
+            connect=self.connect,
+            ttft=(
+                self.first_token_at - self.started
+                if self.first_token_at is not None else None
+            ),
+            total=now - self.started,
+            prompt_tokens=prompt_tokens,
+            # Si el servidor no informa del `usage`, cada fragmento cuenta como un token
+            completion_tokens=completion_tokens or self.chunks,
+            cached_tokens=cached_tokens,
+            timestamp=time.time(),
+        )
+
+    def on_http_event(self, name: str, info: Dict[str, Any]) -> None:
+        """Recibe los eventos de conexión de httpcore (extensión "trace")."""
+        if name == "connection.connect_tcp.started":
+            self._connect_started = time.perf_counter()
+        elif name in ("connection.connect_tcp.complete", "connection.start_tls.complete"):
+            if self._connect_started is not None:
+                self.connect = time.perf_counter() - self._connect_started
+
+    async def aon_http_event(self, name: str, info: Dict[str, Any]) -> None:
+        """Versión asíncrona de `on_http_event` (httpcore exige una corrutina)."""
+        self.on_http_event(name, info)
+
+
+class Histogram:
+    """
+    Histograma con cubos acumulados y una ventana de muestras recientes.
+
+    Los cubos, la suma y el recuento crecen siempre (semántica de Prometheus);
+    los percentiles se calculan sobre las últimas muestras.
+    """
+
+    def __init__(self, buckets: Sequence[float], window: int = 1000) -> None:
+        """
+        Inicializa el histograma vacío.
+
+        Args:
+            buckets: Límites superiores de los cubos, en orden creciente
+            window: Número de muestras recientes que se conservan
+        """
+        self.buckets = tuple(buckets)
+        self.bucket_counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.recent: Deque[float] = deque(maxlen=window)
+
+    def observe(self, value: float) -> None:
+        """Añade una muestra."""
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.bucket_counts[i] += 1
+        self.count += 1
+        self.sum += value
+        self.recent.append(value)
+
+    def percentile(self, fraction: float) -> float:
+        """Devuelve un percentil de las muestras recientes (0.0 si no hay muestras)."""
+        return percentile(list(self.recent), fraction)
+
+
+class JsonlWriter:
+    """Añade líneas a un archivo JSONL desde un hilo propio, que arranca con la primera."""
+
+    def __init__(self, path: Path) -> None:
+        """
+        Inicializa el escritor sin abrir el archivo.
+
+        Args:
+            path: El archivo al que se añaden las líneas
+        """
+        self.path = path
+        self._queue: "queue.Queue[str]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def write(self, line: str) -> None:
+        """
+        Encola una línea (sin salto de línea final) y vuelve sin esperar al disco.
+
+        Args:
+            line: La línea a añadir
+        """
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="chat-gpt-local-telemetry", daemon=True
+                )
+                self._thread.start()
+        self._queue.put(line)
+
+    def flush(self) -> None:
+        """Espera a que se hayan escrito todas las líneas encoladas."""
+        self._queue.join()
+
+    def _run(self) -> None:
+        """Escribe las líneas en el hilo del escritor, agrupando las que llegan juntas."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            while True:
+                lines = [self._queue.get()]
+                while True:
+                    try:
+                        lines.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                try:
+                    f.write("".join(line + "\n" for line in lines))
+                    f.flush()
+                finally:
+                    for _ in lines:
+                        self._queue.task_done()
+
+
+class Telemetry:
+    """Acumula las mediciones de las peticiones y las exporta."""
+
+    def __init__(self, jsonl_path: Optional[Path] = None, window: int = 1000) -> None:
+        """
+        Inicializa la telemetría vacía.
+
+        Args:
+            jsonl_path: Archivo al que se añade una línea JSON por petición (None = ninguno)
+            window: Muestras recientes que conserva cada histograma
+        """
+        self.jsonl_path = jsonl_path
+        self._writer = JsonlWriter(jsonl_path) if jsonl_path is not None else None
+        self.window = window
+        self.histograms: Dict[Tuple[str, str], Histogram] = {}
+        self.requests: Dict[Tuple[str, str], int] = {}
+        self.cached_tokens: Dict[str, int] = {}
+        self.recent: Deque[RequestMetrics] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def start(self, endpoint: str, model: str, streamed: bool) -> RequestTrace:
+        """Empieza a medir una petición."""
+        return RequestTrace(endpoint, model, streamed)
+
+    @contextmanager
+    def measure(self, endpoint: str, model: str, streamed: bool) -> Iterator[RequestTrace]:
+        """
+        Mide la petición que se realiza dentro del bloque y la registra al salir.
+
+        Args:
+            endpoint: El nombre del servidor
+            model: El modelo de la petición
+            streamed: Si la respuesta se recibe por streaming
+
+        Yields:
+            La medición en curso, para anotar los fragmentos y el `usage`
+        """
+        trace = self.start(endpoint, model, streamed)
+        try:
+            yield trace
+        except BaseException as e:
+            self.record(trace.finish(e))
+            raise
+        self.record(trace.finish())
+
+    def record(self, metrics: RequestMetrics) -> None:
+        """
+        Registra las mediciones de una petición terminada.
+
+        Los histogramas solo incluyen las peticiones correctas; los errores y
+        cancelaciones se cuentan aparte. La línea del JSONL se escribe en segundo
+        plano (véase `flush`).
+
+        Args:
+            metrics: Las mediciones de la petición
+        """
+        with self._lock:
+            key = (metrics.endpoint, metrics.outcome)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.recent.append(metrics)
+            if metrics.outcome == "ok":
+                self.cached_tokens[metrics.endpoint] = (
+                    self.cached_tokens.get(metrics.endpoint, 0) + metrics.cached_tokens
+                )
+                for name, value in _values(metrics).items():
+                    if value is not None:
+                        self._histogram(name, metrics.endpoint).observe(value)
+        if self._writer is not None:
+            self._writer.write(json.dumps(metrics.as_dict(), ensure_ascii=False))
+
+    def flush(self) -> None:
+        """Espera a que se escriban en el JSONL todas las peticiones registradas."""
+        if self._writer is not None:
+            self._writer.flush()
+
+    def percentile(self, name: str, fraction: float, endpoint: Optional[str] = None) -> float:
+        """
+        Devuelve un percentil reciente de una métrica.
+
+        Args:
+            name: El nombre de la métrica (p. ej. "ttft_seconds")
+            fraction: El percentil entre 0 y 1
+            endpoint: El servidor (None = todos)
+        """
+        with self._lock:
+            samples: List[float] = []
+            for (metric, histogram_endpoint), histogram in self.histograms.items():
+                if metric == name and endpoint in (None, histogram_endpoint):
+                    samples.extend(histogram.recent)
+        return percentile(samples, fraction)
+
+    def prometheus(self) -> str:
+        """Devuelve las métricas acumuladas en el formato de texto de Prometheus."""
+        lines: List[str] = []
+        with self._lock:
+            name = f"{PROMETHEUS_PREFIX}total"
+            lines.append(f"# HELP {name} Peticiones terminadas por servidor y resultado")
+            lines.append(f"# TYPE {name} counter")
+            for (endpoint, outcome), count in sorted(self.requests.items()):
+                lines.append(
+                    f'{name}{{endpoint="{_escape(endpoint)}",outcome="{outcome}"}} {count}'
+                )
+            name = f"{PROMETHEUS_PREFIX}cached_tokens_total"
+            lines.append(f"# HELP {name} Tokens de prompt servidos desde la caché del proveedor")
+            lines.append(f"# TYPE {name} counter")
+            for endpoint, count in sorted(self.cached_tokens.items()):
+                lines.append(f'{name}{{endpoint="{_escape(endpoint)}"}} {count}')
+
+            for metric, description, _ in METRICS:
+                name = PROMETHEUS_PREFIX + metric
+                lines.append(f"# HELP {name} {description}")
+                lines.append(f"# TYPE {name} histogram")
+                for (histogram_metric, endpoint), histogram in sorted(self.histograms.items()):
+                    if histogram_metric != metric:
+                        continue
+                    label = f'endpoint="{_escape(endpoint)}"'
+                    for bound, count in zip(histogram.buckets, histogram.bucket_counts):
+                        lines.append(f'{name}_bucket{{{label},le="{bound:g}"}} {count}')
+                    lines.append(f'{name}_bucket{{{label},le="+Inf"}} {histogram.count}')
+                    lines.append(f"{name}_sum{{{label}}} {histogram.sum:.6f}")
+                    lines.append(f"{name}_count{{{label}}} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: Path) -> None:
+        """
+        Escribe las métricas en formato Prometheus (p. ej. para el textfile collector).
+
+        El archivo se reemplaza de forma atómica para no exponer escrituras a medias.
+
+        Args:
+            path: El archivo de destino
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_name(path.name + ".tmp")
+        temporary.write_text(self.prometheus(), encoding="utf-8")
+        temporary.replace(path)
+
+    def _histogram(self, name: str, endpoint: str) -> Histogram:
+        """Devuelve el histograma de una métrica y un servidor, creándolo si no existe."""
+        histogram = self.histograms.get((name, endpoint))
+        if histogram is None:
+            buckets = next(b for metric, _, b in METRICS if metric == name)
+            histogram = Histogram(buckets, self.window)
+            self.histograms[(name, endpoint)] = histogram
+        return histogram
+
+
+def trace_http_request(request: httpx.Request) -> None:
+    """Gancho de httpx que mide la conexión de la petición en curso."""
+    trace = _active_trace.get()
+    if trace is not None:
+        request.extensions["trace"] = trace.on_http_event
+
+
+async def atrace_http_request(request: httpx.Request) -> None:
+    """Versión asíncrona de `trace_http_request`."""
+    trace = _active_trace.get()
+    if trace is not None:
+        request.extensions["trace"] = trace.aon_http_event
+
+
+def export_prometheus() -> None:
+    """
+    Vacía el JSONL de `telemetry` y escribe sus métricas en el archivo configurado, si lo hay.
+
+    Se llama al terminar la aplicación o el lote.
+    """
+    telemetry.flush()
+    if settings.telemetry_prometheus_path is not None:
+        telemetry.write_prometheus(settings.telemetry_prometheus_path)
+
+
+def _values(metrics: RequestMetrics) -> Dict[str, Optional[float]]:
+    """Valores de cada histograma para una petición."""
+    return {
+        "queue_wait_seconds": metrics.queue_wait,
+        "connect_seconds": metrics.connect,
+        "ttft_seconds": metrics.ttft,
+        "total_seconds": metrics.total,
+        "prompt_tokens": metrics.prompt_tokens,
+        "completion_tokens": metrics.completion_tokens,
+        "tokens_per_second": metrics.tokens_per_second,
+    }
+
+
+def _escape(value: str) -> str:
+    """Escapa el valor de una etiqueta de Prometheus."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# Instancia global de la telemetría
+telemetry = Telemetry(settings.telemetry_path)
@@ -0,0 +1,74 @@
+"""
+Contabilidad de tokens y de la caché de prompts del proveedor.
+
+Los proveedores compatibles con OpenAI reutilizan el cálculo de los prefijos de
+prompt que ya han visto y lo indican en `usage.prompt_tokens_details.cached_tokens`.
+`PromptCacheStats` acumula esos valores para ver qué fracción del prompt de una
+conversación se sirve desde la caché.
+"""
+
+import threading
+from typing import Any, Tuple
+
+
+class PromptCacheStats:
+    """Tokens de prompt enviados y servidos desde la caché del proveedor."""
+
+    def __init__(self) -> None:
+        """Inicializa los contadores a cero."""
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self.completion_tokens = 0
+        self._lock = threading.Lock()
+
+    @property
+    def hit_ratio(self) -> float:
+        """Fracción de los tokens de prompt que se sirvieron desde la caché."""
+        if not self.prompt_tokens:
+            return 0.0
+        return self.cached_tokens / self.prompt_tokens
+
+    def record(self, usage: Any) -> None:
+        """
+        Suma el uso de una respuesta de la API.
+
+        Args:
+            usage: El objeto `usage` de la respuesta (o del último fragmento del stream)
+        """
+        prompt_tokens, completion_tokens, cached_tokens = usage_counts(usage)
+        with self._lock:
+            self.requests += 1
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+            self.cached_tokens += cached_tokens
+
+    def format(self) -> str:
+        """Devuelve un resumen legible de la caché de prompts."""
+        return (
+            f"Caché de prompts: {self.cached_tokens} de {self.prompt_tokens} tokens "
+            f"({self.hit_ratio:.0%}) en {self.requests} peticiones"
+        )
+
+
+def usage_counts(usage: Any) -> Tuple[int, int, int]:
+    """
+    Extrae los recuentos de tokens del `usage` de una respuesta.
+
+    Args:
+        usage: El objeto `usage` de la API (o None)
+
+    Returns:
+        Los tokens de prompt, de respuesta y de prompt servidos desde la caché
+    """
+    details = getattr(usage, "prompt_tokens_details", None)
+    return (
+        _as_int(getattr(usage, "prompt_tokens", None)),
+        _as_int(getattr(usage, "completion_tokens", None)),
+        _as_int(getattr(details, "cached_tokens", None)),
+    )
+
+
+def _as_int(value: Any) -> int:
+    """Convierte un recuento opcional de la API en un entero."""
+    return value if isinstance(value, int) else 0
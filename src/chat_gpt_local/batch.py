@@ -0,0 +1,341 @@
+"""
+Punto de entrada sin interfaz gráfica para ejecutar lotes de prompts.
+
+Lee peticiones en formato JSONL (de un archivo o de la entrada estándar), las
+envía a OpenAI con un límite de concurrencia y escribe los resultados también
+en JSONL. No importa PyQt6, de modo que puede ejecutarse en servidores.
+
+Cada línea de entrada es un objeto JSON con un "prompt" (texto) o una lista de
+"messages", y opcionalmente un "id". Cada línea de salida contiene el "id", la
+"response" o el "error", y la latencia en segundos.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    TextIO,
+)
+
+from chat_gpt_local.api.backends import create_backend
+from chat_gpt_local.api.http_pool import aclose_async_http_client
+from chat_gpt_local.api.openai_client import Messages
+from chat_gpt_local.api.scheduler import RateLimitScheduler
+from chat_gpt_local.api.telemetry import export_prometheus
+from chat_gpt_local.api.usage import PromptCacheStats
+from chat_gpt_local.config.settings import settings
+from chat_gpt_local.utils.helpers import handle_errors, percentile
+
+
+@dataclass
+class BatchRequest:
+    """Una petición del lote."""
+
+    id: str
+    messages: Messages
+
+
+@dataclass
+class BatchSummary:
+    """Resumen de rendimiento de un lote."""
+
+    succeeded: int = 0
+    failed: int = 0
+    skipped: int = 0
+    elapsed: float = 0.0
+    latencies: List[float] = field(default_factory=list)
+
+    @property
+    def total(self) -> int:
+        """Peticiones procesadas en esta ejecución."""
+        return self.succeeded + self.failed
+
+    @property
+    def throughput(self) -> float:
+        """Peticiones por segundo."""
+        return self.total / self.elapsed if self.elapsed > 0 else 0.0
+
+    def format(self) -> str:
+        """Devuelve el resumen como texto legible."""
+        return (
+            f"Peticiones: {self.total} ({self.succeeded} correctas, {self.failed} con error, "
+            f"{self.skipped} ya completadas)\n"
+            f"Tiempo total: {self.elapsed:.2f} s - {self.throughput:.2f} peticiones/s\n"
+            f"Latencia p50: {percentile(self.latencies, 0.50):.3f} s - "
+            f"p95: {percentile(self.latencies, 0.95):.3f} s"
+        )
+
+
+def parse_requests(
+    lines: Iterable[str], build_messages: Callable[[str], Messages]
+) -> Iterator[BatchRequest]:
+    """
+    Convierte las líneas JSONL de entrada en peticiones.
+
+    Args:
+        lines: Las líneas de entrada (las vacías se ignoran)
+        build_messages: Función que construye los mensajes a partir de un prompt
+
+    Yields:
+        Las peticiones del lote
+
+    Raises:
+        ValueError: Si una línea no es válida
+    """
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Línea {number}: JSON no válido ({e})") from e
+
+        if not isinstance(data, dict):
+            raise ValueError(f"Línea {number}: se esperaba un objeto JSON")
+        if isinstance(data.get("messages"), list):
+            messages = data["messages"]
+        elif isinstance(data.get("prompt"), str):
+            messages = build_messages(data["prompt"])
+        else:
+            raise ValueError(f"Línea {number}: falta 'prompt' o 'messages'")
+        yield BatchRequest(id=str(data.get("id", number)), messages=messages)
+
+
+def load_completed_ids(path: str) -> Set[str]:
+    """
+    Lee los identificadores ya completados de un archivo de resultados previo.
+
+    Args:
+        path: Ruta del archivo de resultados
+
+    Returns:
+        Los identificadores con respuesta correcta
+    """
+    completed: Set[str] = set()
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    result = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Línea truncada por una ejecución interrumpida
+                if isinstance(result, dict) and "response" in result:
+                    completed.add(str(result.get("id")))
+    except FileNotFoundError:
+        pass
+    return completed
+
+
+def open_for_resume(path: str) -> TextIO:
+    """
+    Abre un archivo de resultados previo para añadir líneas al final.
+
+    Si la ejecución anterior se interrumpió a mitad de una línea, el fragmento se
+    elimina: de lo contrario el primer resultado nuevo se pegaría a él y quedaría
+    corrupto. Esa petición no cuenta como completada y se repite.
+
+    Args:
+        path: Ruta del archivo de resultados (se crea si no existe)
+
+    Returns:
+        El archivo abierto en modo de añadir
+    """
+    try:
+        with open(path, "rb+") as f:
+            content = f.read()
+            if content and not content.endswith(b"\n"):
+                f.truncate(content.rfind(b"\n") + 1)
+    except FileNotFoundError:
+        pass
+    return open(path, "a", encoding="utf-8")
+
+
+async def run_batch(
+    requests: Iterable[BatchRequest],
+    complete: Callable[[Messages], Awaitable[str]],
+    write: Callable[[Dict[str, Any]], None],
+    concurrency: int,
+    ordered: bool = False,
+) -> BatchSummary:
+    """
+    Ejecuta un lote de peticiones con concurrencia limitada.
+
+    Las peticiones se leen de forma perezosa: nunca hay más de `concurrency`
+    en curso ni se carga la entrada completa en memoria.
+
+    Args:
+        requests: Las peticiones a ejecutar
+        complete: Corrutina que envía los mensajes y devuelve la respuesta
+        write: Función que escribe cada resultado
+        concurrency: Número máximo de peticiones simultáneas
+        ordered: Si es True, los resultados se escriben en el orden de entrada
+
+    Returns:
+        El resumen de la ejecución
+    """
+    summary = BatchSummary()
+    semaphore = asyncio.Semaphore(max(concurrency, 1))
+    buffered: Dict[int, Dict[str, Any]] = {}
+    next_index = 0
+    tasks: Set["asyncio.Task[None]"] = set()
+
+    def emit(index: int, result: Dict[str, Any]) -> None:
+        nonlocal next_index
+        if not ordered:
+            write(result)
+            return
+        buffered[index] = result
+        while next_index in buffered:
+            write(buffered.pop(next_index))
+            next_index += 1
+
+    async def process(index: int, request: BatchRequest) -> None:
+        started = time.perf_counter()
+        try:
+            response = await complete(request.messages)
+            result: Dict[str, Any] = {"id": request.id, "response": response}
+            summary.succeeded += 1
+        except Exception as e:
+            result = {"id": request.id, "error": str(e)}
+            summary.failed += 1
+        finally:
+            semaphore.release()
+        latency = time.perf_counter() - started
+        summary.latencies.append(latency)
+        result["latency"] = round(latency, 4)
+        emit(index, result)
+
+    started = time.perf_counter()
+    for index, request in enumerate(requests):
+        await semaphore.acquire()
+        task = asyncio.create_task(process(index, request))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    if tasks:
+        await asyncio.gather(*tasks)
+    summary.elapsed = time.perf_counter() - started
+    return summary
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Construye el analizador de argumentos de la línea de comandos."""
+    parser = argparse.ArgumentParser(
+        prog="chat-gpt-local-batch",
+        description="Envía un lote de prompts JSONL a OpenAI sin interfaz gráfica.",
+    )
+    parser.add_argument(
+        "input", nargs="?", default="-",
+        help="Archivo JSONL de entrada ('-' o nada para la entrada estándar)",
+    )
+    parser.add_argument(
+        "-o", "--output",
+        help="Archivo JSONL de salida (por defecto, la salida estándar)",
+    )
+    parser.add_argument(
+        "-c", "--concurrency", type=int, default=settings.max_concurrent_requests,
+        help="Número máximo de peticiones simultáneas",
+    )
+    parser.add_argument(
+        "--ordered", action="store_true",
+        help="Escribir los resultados en el orden de entrada y no al completarse",
+    )
+    parser.add_argument(
+        "--resume", action="store_true",
+        help="Omitir las peticiones que ya tienen respuesta en el archivo de salida",
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true",
+        help="No usar la caché de respuestas",
+    )
+    return parser
+
+
+@handle_errors
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Función principal del comando de lotes.
+
+    Args:
+        argv: Los argumentos de la línea de comandos (por defecto, sys.argv)
+
+    Returns:
+        Código de salida: 0 si todas las peticiones terminaron bien, 1 si no
+    """
+    args = build_parser().parse_args(argv)
+    if args.resume and not args.output:
+        print("Error: --resume requiere --output.", file=sys.stderr)
+        return 2
+    if not settings.openai_api_key:
+        print("Error: No se ha configurado la clave API de OpenAI.", file=sys.stderr)
+        print("Configura la variable de entorno OPENAI_API_KEY o crea un archivo .env", file=sys.stderr)
+        return 1
+
+    client = create_backend()
+    prompt_cache = PromptCacheStats()
+    client.usage_listener = prompt_cache.record
+    scheduler = RateLimitScheduler(client)
+    completed = load_completed_ids(args.output) if args.resume else set()
+
+    source: TextIO = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    output: TextIO = sys.stdout
+    if args.output:
+        output = (
+            open_for_resume(args.output) if args.resume
+            else open(args.output, "w", encoding="utf-8")
+        )
+    skipped = 0
+
+    def pending_requests() -> Iterator[BatchRequest]:
+        nonlocal skipped
+        for request in parse_requests(source, client.build_messages):
+            if request.id in completed:
+                skipped += 1
+                continue
+            yield request
+
+    def write(result: Dict[str, Any]) -> None:
+        output.write(json.dumps(result, ensure_ascii=False) + "\n")
+        output.flush()
+
+    async def run() -> BatchSummary:
+        try:
+            return await run_batch(
+                pending_requests(),
+                lambda messages: scheduler.complete(messages, use_cache=not args.no_cache),
+                write,
+                args.concurrency,
+                ordered=args.ordered,
+            )
+        finally:
+            await aclose_async_http_client()
+
+    try:
+        summary = asyncio.run(run())
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+
+    summary.skipped = skipped
+    print(summary.format(), file=sys.stderr)
+    if prompt_cache.requests:
+        print(prompt_cache.format(), file=sys.stderr)
+    export_prometheus()
+    return 1 if summary.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,25 +2,117 @@
 Módulo de configuración para gestionar las variables de entorno y configuración de la aplicación.
 """
 
+import json
 import os
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 
 import pydantic
 from dotenv import load_dotenv
 
+# Ruta por defecto de la caché de respuestas
+DEFAULT_CACHE_PATH = Path.home() / ".cache" / "chat-gpt-local" / "responses.sqlite3"
+
+
+class ConfigurationError(ValueError):
+    """Una variable de entorno tiene un valor que no se puede interpretar."""
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    """Lee una variable de entorno booleana ("1", "true", "yes", "on")."""
+    value = os.environ.get(name)
+    if value is None or not value.strip():
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _env_path(name: str) -> Optional[Path]:
+    """Lee una ruta opcional de una variable de entorno (admite "~")."""
+    value = os.environ.get(name)
+    if value is None or not value.strip():
+        return None
+    return Path(value.strip()).expanduser()
+
+
+class EndpointConfig(pydantic.BaseModel):
+    """Un servidor compatible con la API de OpenAI (los campos vacíos usan la configuración general)."""
+    
+    name: Optional[str] = None
+    base_url: Optional[str] = None
+    api_key: Optional[str] = None
+    model: Optional[str] = None
+
+
+def _env_endpoints(name: str) -> List[EndpointConfig]:
+    """
+    Lee una lista JSON de servidores de una variable de entorno (vacía si no está definida).
+
+    Raises:
+        ConfigurationError: Si el valor no es JSON válido o no describe una lista de servidores
+    """
+    value = os.environ.get(name)
+    if value is None or not value.strip():
+        return []
+    try:
+        parsed = json.loads(value)
+    except json.JSONDecodeError as e:
+        raise ConfigurationError(f"{name} no es JSON válido: {e}") from e
+    if not isinstance(parsed, list):
+        raise ConfigurationError(f"{name} debe ser una lista JSON de servidores")
+    try:
+        return [EndpointConfig.model_validate(endpoint) for endpoint in parsed]
+    except pydantic.ValidationError as e:
+        raise ConfigurationError(f"{name} contiene un servidor no válido: {e}") from e
+
 
 class Settings(pydantic.BaseModel):
     """Configuración de la aplicación."""
     
     openai_api_key: str
+    base_url: Optional[str] = None
     model: str = "gpt-3.5-turbo"
     temperature: float = 0.7
     max_tokens: Optional[int] = None
+    max_concurrent_requests: int = 32
+    request_timeout: Optional[float] = None
+    system_prompt: Optional[str] = None
+    context_window: Optional[int] = None
+    history_compaction: bool = True
+    compaction_threshold: Optional[int] = None
+    compaction_keep_recent: int = 6
+    cache_enabled: bool = False
+    cache_path: Path = DEFAULT_CACHE_PATH
+    cache_max_entries: int = 1000
+    cache_max_mb: int = 50
+    cache_max_age_hours: float = 168.0
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_keepalive_expiry: float = 30.0
+    http2: bool = False
+    http_warm_up: bool = True
+    coalesce_requests: bool = True
+    rate_limit_rpm: int = 0
+    rate_limit_tpm: int = 0
+    max_retries: int = 5
+    retry_base_delay: float = 1.0
+    retry_max_delay: float = 60.0
+    endpoints: List[EndpointConfig] = []
+    hedge_requests: bool = False
+    hedge_delay: float = 2.0
+    telemetry_path: Optional[Path] = None
+    telemetry_prometheus_path: Optional[Path] = None
+    render_backend: str = "thread"
+    render_workers: Optional[int] = None
     
     @classmethod
     def from_env(cls) -> "Settings":
-        """Carga la configuración desde las variables de entorno."""
+        """
+        Carga la configuración desde las variables de entorno.
+        
+        Raises:
+            ConfigurationError: Si la lista de servidores no es válida
+        """
         # Intenta cargar desde .env si existe
         env_file = Path(".env")
         if env_file.exists():
@@ -28,10 +120,66 @@ class Settings(pydantic.BaseModel):
         
         return cls(
             openai_api_key=os.environ.get("OPENAI_API_KEY", ""),
+            base_url=os.environ.get("OPENAI_BASE_URL") or None,
             model=os.environ.get("OPENAI_MODEL", "gpt-3.5-turbo"),
             temperature=float(os.environ.get("OPENAI_TEMPERATURE", "0.7")),
             max_tokens=int(os.environ.get("OPENAI_MAX_TOKENS", "0")) or None,
+            max_concurrent_requests=int(os.environ.get("OPENAI_MAX_CONCURRENT_REQUESTS", "32")),
+            request_timeout=float(os.environ.get("OPENAI_REQUEST_TIMEOUT", "0")) or None,
+            system_prompt=os.environ.get("OPENAI_SYSTEM_PROMPT") or None,
+            context_window=int(os.environ.get("OPENAI_CONTEXT_WINDOW", "0")) or None,
+            history_compaction=_env_bool("OPENAI_HISTORY_COMPACTION", True),
+            compaction_threshold=int(os.environ.get("OPENAI_COMPACTION_THRESHOLD", "0")) or None,
+            compaction_keep_recent=int(os.environ.get("OPENAI_COMPACTION_KEEP_RECENT", "6")),
+            cache_enabled=_env_bool("OPENAI_CACHE_ENABLED", False),
+            cache_path=Path(
+                os.environ.get("OPENAI_CACHE_PATH", str(DEFAULT_CACHE_PATH))
+            ).expanduser(),
+            cache_max_entries=int(os.environ.get("OPENAI_CACHE_MAX_ENTRIES", "1000")),
+            cache_max_mb=int(os.environ.get("OPENAI_CACHE_MAX_MB", "50")),
+            cache_max_age_hours=float(os.environ.get("OPENAI_CACHE_MAX_AGE_HOURS", "168")),
+            http_max_connections=int(os.environ.get("OPENAI_HTTP_MAX_CONNECTIONS", "100")),
+            http_max_keepalive_connections=int(
+                os.environ.get("OPENAI_HTTP_MAX_KEEPALIVE_CONNECTIONS", "20")
+            ),
+            http_keepalive_expiry=float(os.environ.get("OPENAI_HTTP_KEEPALIVE_EXPIRY", "30")),
+            http2=_env_bool("OPENAI_HTTP2", False),
+            http_warm_up=_env_bool("OPENAI_HTTP_WARM_UP", True),
+            coalesce_requests=_env_bool("OPENAI_COALESCE_REQUESTS", True),
+            rate_limit_rpm=int(os.environ.get("OPENAI_RATE_LIMIT_RPM", "0")),
+            rate_limit_tpm=int(os.environ.get("OPENAI_RATE_LIMIT_TPM", "0")),
+            max_retries=int(os.environ.get("OPENAI_MAX_RETRIES", "5")),
+            retry_base_delay=float(os.environ.get("OPENAI_RETRY_BASE_DELAY", "1")),
+            retry_max_delay=float(os.environ.get("OPENAI_RETRY_MAX_DELAY", "60")),
+            endpoints=_env_endpoints("OPENAI_ENDPOINTS"),
+            hedge_requests=_env_bool("OPENAI_HEDGE_REQUESTS", False),
+            hedge_delay=float(os.environ.get("OPENAI_HEDGE_DELAY", "2")),
+            telemetry_path=_env_path("OPENAI_TELEMETRY_PATH"),
+            telemetry_prometheus_path=_env_path("OPENAI_TELEMETRY_PROMETHEUS_PATH"),
+            render_backend=os.environ.get("OPENAI_RENDER_BACKEND", "thread").strip().lower(),
+            render_workers=int(os.environ.get("OPENAI_RENDER_WORKERS", "0")) or None,
         )
 
-# Instancia global de la configuración
-settings = Settings.from_env()
\ No newline at end of file
+
+@lru_cache(maxsize=None)
+def get_settings() -> Settings:
+    """
+    Devuelve la configuración global, leyéndola del entorno la primera vez.
+    
+    Returns:
+        La configuración de la aplicación
+    """
+    return Settings.from_env()
+
+
+def __getattr__(name: str) -> Settings:
+    """
+    Crea `settings` al usarla por primera vez y no al importar el módulo.
+    
+    Así la ventana puede arrancar antes de leer el archivo .env; quienes hacen
+    `from chat_gpt_local.config.settings import settings` reciben la misma
+    instancia que `get_settings()`.
+    """
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
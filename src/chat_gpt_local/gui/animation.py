@@ -0,0 +1,126 @@
+"""
+Reloj de animación compartido por los efectos visuales de la ventana.
+
+En lugar de que cada efecto tenga su propio `QTimer`, todos se suscriben a un
+único `AnimationClock`. El reloj solo avanza mientras haya suscriptores y la
+ventana que vigila esté visible y activa: minimizada, oculta o en segundo plano,
+la interfaz no consume CPU en animaciones.
+"""
+
+from typing import TYPE_CHECKING, Callable, List, Optional, cast
+
+from PyQt6.QtCore import QEvent, QObject, QTimer, pyqtSignal
+
+# El reloj solo necesita QtCore; la ventana se anota sin importar QtWidgets
+if TYPE_CHECKING:
+    from PyQt6.QtWidgets import QWidget
+
+# Eventos de la ventana que pueden cambiar si las animaciones deben avanzar
+WINDOW_STATE_EVENTS = (
+    QEvent.Type.Show,
+    QEvent.Type.Hide,
+    QEvent.Type.WindowStateChange,
+    QEvent.Type.ActivationChange,
+)
+
+
+class AnimationClock(QObject):
+    """Temporizador único que impulsa todas las animaciones."""
+
+    # Se emite al pausar (True) o reanudar (False) las animaciones
+    paused_changed = pyqtSignal(bool)
+
+    def __init__(self, interval_ms: int = 30, parent: Optional[QObject] = None) -> None:
+        """
+        Inicializa el reloj detenido.
+
+        Args:
+            interval_ms: Milisegundos entre fotogramas
+            parent: Objeto padre
+        """
+        super().__init__(parent)
+        self._subscribers: List[Callable[[], None]] = []
+        self._paused = False
+        self._timer = QTimer(self)
+        self._timer.setInterval(interval_ms)
+        self._timer.timeout.connect(self._tick)
+
+    @property
+    def is_running(self) -> bool:
+        """Indica si el reloj está emitiendo fotogramas."""
+        return self._timer.isActive()
+
+    @property
+    def paused(self) -> bool:
+        """Indica si las animaciones están en pausa."""
+        return self._paused
+
+    def subscribe(self, callback: Callable[[], None]) -> None:
+        """
+        Llama a `callback` en cada fotograma.
+
+        Args:
+            callback: Función sin argumentos que avanza una animación
+        """
+        self._subscribers.append(callback)
+        self._update_timer()
+
+    def unsubscribe(self, callback: Callable[[], None]) -> None:
+        """
+        Deja de llamar a `callback` (no hace nada si no estaba suscrita).
+
+        Args:
+            callback: La función suscrita con `subscribe`
+        """
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+        self._update_timer()
+
+    def set_paused(self, paused: bool) -> None:
+        """
+        Pausa o reanuda todas las animaciones.
+
+        Args:
+            paused: Si las animaciones deben detenerse
+        """
+        if paused == self._paused:
+            return
+        self._paused = paused
+        self._update_timer()
+        self.paused_changed.emit(paused)
+
+    def watch(self, window: "QWidget") -> None:
+        """
+        Pausa las animaciones mientras la ventana esté oculta, minimizada o inactiva.
+
+        Args:
+            window: La ventana principal
+        """
+        window.installEventFilter(self)
+        self._update_for(window)
+
+    def eventFilter(self, watched: Optional[QObject], event: Optional[QEvent]) -> bool:
+        """Actualiza la pausa cuando cambia la visibilidad o la activación de la ventana."""
+        if event is not None and event.type() in WINDOW_STATE_EVENTS:
+            # El filtro solo se instala en la ventana de `watch`
+            self._update_for(cast("QWidget", watched))
+        return False
+
+    def _update_for(self, window: "QWidget") -> None:
+        """Calcula si la ventana permite animar."""
+        self.set_paused(
+            not window.isVisible() or window.isMinimized() or not window.isActiveWindow()
+        )
+
+    def _update_timer(self) -> None:
+        """Arranca o detiene el temporizador según los suscriptores y la pausa."""
+        if self._subscribers and not self._paused:
+            if not self._timer.isActive():
+                self._timer.start()
+        else:
+            self._timer.stop()
+
+    def _tick(self) -> None:
+        """Avanza un fotograma de todas las animaciones."""
+        for callback in list(self._subscribers):
+            callback()
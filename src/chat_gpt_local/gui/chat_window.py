@@ -2,246 +2,230 @@
 Módulo para la interfaz gráfica de usuario estilo ChatGPT con tema Cyberpunk.
 """
 
-import random
+import logging
+import time
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import TYPE_CHECKING, Any, Dict, List, Mapping, Optional, Sequence
 
-import markdown
-from PyQt6.QtCore import QObject, Qt, QTimer, pyqtSignal, pyqtSlot
-from PyQt6.QtGui import QBrush, QColor, QFontDatabase, QLinearGradient, QPainter, QPen
-from PyQt6.QtWebEngineWidgets import QWebEngineView
+from PyQt6.QtCore import QObject, QRect, Qt, pyqtSignal, pyqtSlot
+from PyQt6.QtGui import QBrush, QCloseEvent, QColor, QLinearGradient, QPainter, QPen
 from PyQt6.QtWidgets import (
     QApplication,
     QFrame,
-    QGraphicsDropShadowEffect,
     QHBoxLayout,
     QLabel,
     QMainWindow,
     QMessageBox,
     QPushButton,
-    QScrollArea,
-    QSizePolicy,
     QTextEdit,
     QVBoxLayout,
     QWidget,
 )
 
-from chat_gpt_local.api.openai_client import OpenAIClient
-from chat_gpt_local.gui.styles.base import COLORS, FONT_FILES
-from chat_gpt_local.gui.styles.effects import (
-    get_glitch_effect_colors,
-    get_scan_effect_config,
-)
-from chat_gpt_local.gui.styles.main_window import (
-    get_header_styles,
-    get_input_area_styles,
-    get_main_window_style,
-    get_scroll_area_styles,
-)
-from chat_gpt_local.gui.styles.message import (
-    get_avatar_style,
-    get_html_template,
-    get_markdown_css_template,
-    get_message_frame_style,
-    get_role_label_style,
-    get_time_label_style,
-    get_webview_style,
-)
-from chat_gpt_local.utils.helpers import run_in_thread
+from chat_gpt_local.config.settings import settings
+from chat_gpt_local.gui.animation import AnimationClock
+from chat_gpt_local.gui.fonts import register_fonts
+from chat_gpt_local.gui.glow import Glow
+from chat_gpt_local.gui.styles.base import BORDER_RADIUS, COLORS, px
+from chat_gpt_local.gui.styles.effects import get_scan_effect_config
+from chat_gpt_local.gui.styles.theme import get_app_stylesheet
+from chat_gpt_local.utils.startup import startup_profiler
 
+# El cliente de la API (openai, httpx) y la vista de la conversación (QtWebEngine,
+# markdown) se importan en `finish_startup`, después de mostrar la ventana
+if TYPE_CHECKING:
+    from chat_gpt_local.api.cancellation import CancellationToken
+    from chat_gpt_local.api.compaction import HistoryCompactor, HistorySummary
+    from chat_gpt_local.api.engine import RequestEngine
+    from chat_gpt_local.gui.rendering import RenderPool
+    from chat_gpt_local.gui.transcript import TranscriptMessage, TranscriptView
 
-class SignalBus(QObject):
-    """Clase para manejar señales entre hilos."""
-    response_received = pyqtSignal(str)
-    error_occurred = pyqtSignal(str)
+logger = logging.getLogger(__name__)
 
+# Espera (en segundos) antes de reintentar una compactación fallida; se duplica con
+# cada fallo seguido hasta el máximo
+COMPACTION_RETRY_DELAY = 30.0
+COMPACTION_RETRY_MAX_DELAY = 600.0
 
-class CyberpunkGlitchEffect(QWidget):
-    """Clase para crear un efecto de 'glitch' estilo cyberpunk como fondo decorativo."""
-    
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
-        self.setAttribute(Qt.WidgetAttribute.WA_NoSystemBackground)
-        self.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground)
-        
-        # Configuración de líneas glitch
-        self.glitch_lines = []
-        self.regen_timer = QTimer(self)
-        self.regen_timer.timeout.connect(self.regenerate_glitch)
-        self.regen_timer.start(2000)  # Regenerar cada 2 segundos
-        self.regenerate_glitch()
-    
-    def regenerate_glitch(self):
-        """Regenera las líneas de 'glitch' para crear animación."""
-        self.glitch_lines = []
-        glitch_colors = get_glitch_effect_colors()
-        
-        for _ in range(random.randint(3, 8)):
-            pos_y = random.randint(0, self.height())
-            length = random.randint(20, 100)
-            opacity = random.uniform(0.1, 0.3)
-            color_choice = random.choice(glitch_colors)
-            self.glitch_lines.append((pos_y, length, opacity, color_choice))
-        self.update()
-    
-    def paintEvent(self, event):
-        """Dibuja el efecto de glitch en el widget."""
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-        
-        for pos_y, length, opacity, color in self.glitch_lines:
-            pen = QPen(QColor(color))
-            pen.setWidth(1)
-            painter.setOpacity(opacity)
-            painter.setPen(pen)
-            painter.drawLine(0, pos_y, length, pos_y)
+# Media altura (en píxeles) de la franja que ocupa la línea de escaneo con su degradado
+SCAN_LINE_HALF_HEIGHT = 6
 
+# Mensaje de bienvenida con contenido cyberpunk mejorado
+WELCOME_MESSAGE = """
+# Bienvenido al Sistema Cyber-GPT v2.0
 
-class MessageWidget(QFrame):
-    """Widget para mostrar un mensaje en el chat con soporte para Markdown."""
-    
-    def __init__(
-        self, 
-        content: str, 
-        is_user: bool = False, 
-        parent: Optional[QWidget] = None
-    ) -> None:
-        """
-        Inicializa el widget de mensaje.
-        
-        Args:
-            content: El contenido del mensaje
-            is_user: Si el mensaje es del usuario o del asistente
-            parent: Widget padre
-        """
-        super().__init__(parent)
-        self.setFrameShape(QFrame.Shape.StyledPanel)
-        self.setLineWidth(1)
-        
-        # Aplicar estilo según si es usuario o asistente
-        self.setStyleSheet(get_message_frame_style(is_user))
-        
-        # Efecto de sombra para un aspecto más cyberpunk
-        glow_color = COLORS["accent_cyan"] if is_user else COLORS["accent_magenta"]
-        glow = QGraphicsDropShadowEffect(self)
-        glow.setColor(QColor(glow_color))
-        glow.setOffset(0, 0)
-        glow.setBlurRadius(15)
-        self.setGraphicsEffect(glow)
-        
-        layout = QVBoxLayout(self)
-        layout.setSpacing(8)
-        
-        # Cabecera con avatar y rol
-        header_layout = QHBoxLayout()
-        
-        # Determinar texto para avatar y rol
-        role_text = "Usuario" if is_user else "Asistente"
-        
-        # Avatar (círculo con iniciales)
-        avatar_widget = QWidget()
-        avatar_widget.setFixedSize(30, 30)
-        avatar_widget.setStyleSheet(get_avatar_style(is_user))
-        
-        # Efecto de sombra para el avatar
-        avatar_glow = QGraphicsDropShadowEffect(avatar_widget)
-        avatar_glow.setColor(QColor(glow_color))
-        avatar_glow.setOffset(0, 0)
-        avatar_glow.setBlurRadius(10)
-        avatar_widget.setGraphicsEffect(avatar_glow)
-        
-        avatar_layout = QHBoxLayout(avatar_widget)
-        avatar_layout.setContentsMargins(0, 0, 0, 0)
-        avatar_label = QLabel(role_text[0].upper())
-        avatar_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        avatar_layout.addWidget(avatar_label)
-        header_layout.addWidget(avatar_widget)
-        
-        # Etiqueta con el rol
-        role_label = QLabel(role_text.upper())
-        role_label.setStyleSheet(get_role_label_style(is_user))
-        header_layout.addWidget(role_label)
-        header_layout.addStretch()
-        
-        # Información de la hora con estilo cyberpunk
-        time_label = QLabel(datetime.now().strftime("%H:%M"))
-        time_label.setStyleSheet(get_time_label_style(is_user))
-        header_layout.addWidget(time_label)
-        
-        layout.addLayout(header_layout)
-        
-        # Contenido del mensaje con soporte para Markdown
-        # Convertir Markdown a HTML
-        html_content = markdown.markdown(content, extensions=['fenced_code', 'tables', 'nl2br'])
-        
-        # Obtener la plantilla CSS y formatearla con el color correspondiente
-        avatar_color = COLORS["accent_cyan"] if is_user else COLORS["accent_magenta"]
-        css_styles = get_markdown_css_template().format(avatar_color=avatar_color)
-        
-        # Aplicar la plantilla HTML completa
-        styled_html = get_html_template().format(
-            css_styles=css_styles,
-            html_content=html_content
-        )
-        
-        # Usar QWebEngineView para renderizar HTML
-        web_view = QWebEngineView()
-        web_view.setHtml(styled_html)
-        web_view.setMinimumHeight(100)
-        web_view.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
-        web_view.setStyleSheet(get_webview_style())
-        
-        layout.addWidget(web_view)
-        
-        # Agregar efecto de glitch en el fondo (sutil, solo decorativo)
-        if not is_user:  # Solo para mensajes del asistente
-            glitch_effect = CyberpunkGlitchEffect(self)
-            glitch_effect.setGeometry(self.rect())
-            glitch_effect.lower()  # Enviar al fondo
+Has establecido conexión con la **interfaz neural** del asistente Cyber-GPT. Este sistema utiliza tecnología de _procesamiento de lenguaje avanzado_ para interactuar con humanos.
+
+**Protocolos de interacción:**
+* Comunicación en lenguaje natural con formato Markdown
+* Optimización de visualización para código y datos
+* Adaptación dinámica de respuestas según contexto
+
+```python
+# Sistema inicializado correctamente
+def night_city_protocol():
+    connect_neural_interface()
+    print("Conexión neural establecida. Bienvenido a Night City.")
+    return STATUS_ONLINE
+```
+
+> Los sistemas están operativos y listos. ¿En qué puedo asistirte hoy?
+"""
+
+
+class SignalBus(QObject):
+    """Clase para manejar señales entre hilos (con el identificador de la petición)."""
+    response_received = pyqtSignal(int, str)
+    token_received = pyqtSignal(int, str)
+    error_occurred = pyqtSignal(int, str)
+    summary_ready = pyqtSignal(object)
+    compaction_failed = pyqtSignal()
 
 
 class ChatWindow(QMainWindow):
     """Ventana principal de la aplicación de chat con tema Cyberpunk."""
     
-    def __init__(self) -> None:
-        """Inicializa la ventana principal de la aplicación."""
+    def __init__(self, defer_startup: bool = False) -> None:
+        """
+        Inicializa la ventana principal de la aplicación.
+        
+        Args:
+            defer_startup: Si es True, solo se construye el armazón de la ventana
+                (cabecera, campo de entrada y efectos) y el cliente de la API y la
+                vista de la conversación se crean al llamar a `finish_startup`,
+                normalmente justo después de mostrar la ventana
+        """
         super().__init__()
         
         self.setWindowTitle("Cyber-GPT")
         self.setGeometry(100, 100, 900, 700)
         self.setMinimumSize(700, 500)
         
-        # Cargar y establecer fuentes personalizadas
-        self._load_fonts()
+        # Fuentes personalizadas (no hace nada si main() ya las registró)
+        with startup_profiler.phase("fuentes"):
+            register_fonts()
         
-        # Configurar estilo cyberpunk centralizado
-        self.setStyleSheet(get_main_window_style())
+        # Estilo cyberpunk centralizado: una sola hoja para toda la aplicación
+        # (main() ya la aplica; así la ventana también funciona creada por separado)
+        app = QApplication.instance()
+        if isinstance(app, QApplication) and not app.styleSheet():
+            app.setStyleSheet(get_app_stylesheet())
         
-        # Inicializar cliente OpenAI
-        self.openai_client = OpenAIClient()
+        # Cliente OpenAI, motor de peticiones y vista de la conversación (finish_startup)
+        self.engine: Optional[RequestEngine] = None
+        self.render_pool: Optional[RenderPool] = None
+        self.transcript: Optional[TranscriptView] = None
+        # Mensajes añadidos antes de crear la vista, que se muestran al crearla
+        self._pending_messages: List[Dict[str, Any]] = []
+        self._started = False
         
         # Inicializar bus de señales
         self.signal_bus = SignalBus()
         self.signal_bus.response_received.connect(self._handle_response)
+        self.signal_bus.token_received.connect(self._handle_token)
         self.signal_bus.error_occurred.connect(self._handle_error)
+        self.signal_bus.summary_ready.connect(self._handle_summary)
+        self.signal_bus.compaction_failed.connect(self._handle_compaction_failed)
         
         # Historial de mensajes
         self.messages: List[Dict[str, Any]] = []
         
+        # Resumen de los mensajes antiguos, que los sustituye en el contexto
+        self.summary: Optional[HistorySummary] = None
+        self.compactor: Optional[HistoryCompactor] = None
+        self._compacting = False
+        self._compaction_failures = 0
+        self._compaction_retry_at = 0.0
+        
+        # Mensaje del asistente que se está recibiendo por streaming
+        self._streaming_widget: Optional[TranscriptMessage] = None
+        
+        # Petición en curso: las señales de peticiones anteriores se ignoran
+        self._request_id = 0
+        self._active_token: Optional[CancellationToken] = None
+        
+        # Reloj único de las animaciones (se detiene con la ventana oculta o inactiva)
+        self.animation_clock = AnimationClock(get_scan_effect_config()["update_interval"], self)
+        
         # Construir la interfaz
-        self._setup_ui()
+        with startup_profiler.phase("interfaz"):
+            self._setup_ui()
+            
+            # Iniciar efecto de escaneo
+            self._setup_scan_effect()
+            self.animation_clock.watch(self)
+        
+        if not defer_startup:
+            self.finish_startup()
+    
+    def finish_startup(self) -> None:
+        """
+        Completa el arranque: crea el cliente de la API y la vista de la conversación.
         
-        # Iniciar efecto de escaneo
-        self._setup_scan_effect()
+        Carga los módulos pesados (openai, httpx, QtWebEngine y markdown); el campo
+        de entrada no permite enviar mensajes hasta que termina. Las llamadas
+        posteriores a la primera no hacen nada.
+        """
+        if self._started:
+            return
+        with startup_profiler.phase("cliente de la API"):
+            self._setup_client()
+        with startup_profiler.phase("vista de la conversación"):
+            self._setup_transcript()
+        self._started = True
+        self._on_input_changed()
     
-    def _load_fonts(self) -> None:
-        """Cargar fuentes personalizadas."""
-        # Configuración para cargar fuentes (en aplicaciones reales, se cargarían desde archivos)
-        # En este ejemplo simulamos que ya están instaladas en el sistema
-        # Para una aplicación completa, debería incluir las fuentes como recursos
-        for font_path in FONT_FILES.values():
-            QFontDatabase.addApplicationFont(font_path)
+    def _setup_client(self) -> None:
+        """Crea el cliente de OpenAI, el motor que ejecuta sus peticiones y el compactador."""
+        from chat_gpt_local.api.backends import create_backend
+        from chat_gpt_local.api.compaction import HistoryCompactor
+        from chat_gpt_local.api.engine import RequestEngine
+        from chat_gpt_local.api.scheduler import RateLimitScheduler
+        from chat_gpt_local.api.usage import PromptCacheStats
+        
+        self.openai_client = create_backend()
+        # Tokens de prompt de esta conversación servidos desde la caché del proveedor
+        self.prompt_cache = PromptCacheStats()
+        self.openai_client.usage_listener = self.prompt_cache.record
+        self.scheduler = RateLimitScheduler(self.openai_client)
+        self.engine = RequestEngine(settings.max_concurrent_requests)
+        self.engine.start()
+        if settings.http_warm_up:
+            # Abrir la conexión con la API mientras se construye la conversación
+            self.engine.submit(self.openai_client.awarm_up())
+        
+        if settings.history_compaction:
+            self.compactor = HistoryCompactor(
+                lambda messages: self.scheduler.complete(messages, use_cache=False),
+                settings.model,
+                threshold=settings.compaction_threshold,
+                keep_recent=settings.compaction_keep_recent,
+            )
+    
+    def _setup_transcript(self) -> None:
+        """Sustituye el indicador de carga por la vista web de la conversación."""
+        from chat_gpt_local.gui.rendering import RenderPool
+        from chat_gpt_local.gui.transcript import TranscriptView
+
+        # Vista web única con todos los mensajes de la conversación
+        self.render_pool = RenderPool(
+            settings.render_backend, settings.render_workers, parent=self
+        )
+        self.transcript = TranscriptView(self.render_pool)
+        self.animation_clock.paused_changed.connect(self.transcript.set_animations_paused)
+        self.transcript.set_animations_paused(self.animation_clock.paused)
+        self._scroll_layout.replaceWidget(self._transcript_placeholder, self.transcript)
+        self._transcript_placeholder.deleteLater()
+        
+        # El mensaje de bienvenida es solo decorativo: no se envía como contexto.
+        # Va delante de los mensajes añadidos antes de crear la vista
+        pending, self._pending_messages = self._pending_messages, []
+        self._add_message(WELCOME_MESSAGE, is_user=False, in_context=False)
+        if pending:
+            welcome = self.messages.pop()
+            self.messages.insert(len(self.messages) - len(pending), welcome)
+            self.transcript.add_messages(pending)
+            self._scroll_to_bottom()
     
     def _setup_scan_effect(self) -> None:
         """Configura el efecto de escaneo horizontal (línea que sube y baja)."""
@@ -258,15 +242,13 @@ class ChatWindow(QMainWindow):
         self.scan_line_pos = 0
         self.scan_direction = 1  # 1 = hacia abajo, -1 = hacia arriba
         
-        self.scan_timer = QTimer(self)
-        self.scan_timer.timeout.connect(self._update_scan_line)
-        self.scan_timer.start(self.scan_config["update_interval"])
-        
         self.scan_effect.paintEvent = self._paint_scan_effect
         self.scan_effect.show()
+        self.animation_clock.subscribe(self._update_scan_line)
     
     def _update_scan_line(self) -> None:
         """Actualiza la posición de la línea de escaneo."""
+        previous_pos = self.scan_line_pos
         self.scan_line_pos += self.scan_direction * self.scan_config["speed"]
         
         if self.scan_line_pos >= self.height():
@@ -275,8 +257,11 @@ class ChatWindow(QMainWindow):
         elif self.scan_line_pos <= 0:
             self.scan_line_pos = 0
             self.scan_direction = 1
-            
-        self.scan_effect.update()
+        
+        # Repintar solo la franja que cubre la posición anterior y la nueva
+        top = min(previous_pos, self.scan_line_pos) - SCAN_LINE_HALF_HEIGHT
+        height = abs(self.scan_line_pos - previous_pos) + 2 * SCAN_LINE_HALF_HEIGHT
+        self.scan_effect.update(QRect(0, top, self.width(), height))
     
     def _paint_scan_effect(self, event) -> None:
         """Dibuja el efecto de escaneo."""
@@ -299,6 +284,29 @@ class ChatWindow(QMainWindow):
         painter.setPen(pen)
         painter.drawLine(0, self.scan_line_pos, self.width(), self.scan_line_pos)
     
+    def closeEvent(self, event: Optional[QCloseEvent]) -> None:
+        """Libera las conexiones y detiene el motor de peticiones al cerrar."""
+        if self._active_token is not None:
+            self._active_token.cancel()
+        # Si se cierra antes de terminar el arranque, parte de esto no existe
+        if self.engine is not None:
+            from chat_gpt_local.api.http_pool import aclose_async_http_client
+            from chat_gpt_local.api.telemetry import export_prometheus
+            
+            if self.engine.is_running:
+                try:
+                    self.engine.submit(aclose_async_http_client()).result(timeout=2)
+                except Exception:
+                    pass
+                self.engine.stop()
+            try:
+                export_prometheus()
+            except OSError:
+                pass  # La exportación de métricas no debe impedir cerrar la ventana
+        if self.render_pool is not None:
+            self.render_pool.shutdown()
+        super().closeEvent(event)
+    
     def resizeEvent(self, event) -> None:
         """Maneja el evento de redimensionamiento de la ventana."""
         super().resizeEvent(event)
@@ -319,103 +327,68 @@ class ChatWindow(QMainWindow):
         header_layout = QHBoxLayout(header_widget)
         header_layout.setContentsMargins(0, 0, 0, 10)
         
-        # Obtener estilos de encabezado centralizado
-        header_styles = get_header_styles()
-        
         # Título con efecto de resplandor
         title_label = QLabel("CYBER-GPT")
-        title_label.setStyleSheet(header_styles["title"])
+        title_label.setObjectName("title")
         
-        title_glow = QGraphicsDropShadowEffect(title_label)
-        title_glow.setColor(QColor(COLORS["accent_cyan"]))
-        title_glow.setOffset(0, 0)
-        title_glow.setBlurRadius(20)
-        title_label.setGraphicsEffect(title_glow)
+        Glow(title_label, COLORS["accent_cyan"], 20)
         
         header_layout.addWidget(title_label)
         header_layout.addStretch()
         
         # Etiqueta decorativa "NEURAL LINK ACTIVE"
         status_label = QLabel("NEURAL LINK ACTIVE")
-        status_label.setStyleSheet(header_styles["status"])
+        status_label.setProperty("badge", True)
+        status_label.setProperty("accent", "green")
+        self.status_label = status_label
         
-        status_glow = QGraphicsDropShadowEffect(status_label)
-        status_glow.setColor(QColor(COLORS["accent_green"]))
-        status_glow.setOffset(0, 0)
-        status_glow.setBlurRadius(10)
-        status_label.setGraphicsEffect(status_glow)
+        Glow(status_label, COLORS["accent_green"], 10)
         
         header_layout.addWidget(status_label)
         
         # Etiqueta tipo "modo cyberpunk"
         mode_label = QLabel("MODO CYBERPUNK")
-        mode_label.setStyleSheet(header_styles["mode"])
+        mode_label.setProperty("badge", True)
+        mode_label.setProperty("accent", "magenta")
         
-        mode_glow = QGraphicsDropShadowEffect(mode_label)
-        mode_glow.setColor(QColor(COLORS["accent_magenta"]))
-        mode_glow.setOffset(0, 0)
-        mode_glow.setBlurRadius(10)
-        mode_label.setGraphicsEffect(mode_glow)
+        Glow(mode_label, COLORS["accent_magenta"], 10)
         
         header_layout.addWidget(mode_label)
         
         main_layout.addWidget(header_widget)
         
-        # Área de mensajes con fondo estilo cyberpunk
-        self.messages_area = QWidget()
-        self.messages_layout = QVBoxLayout(self.messages_area)
-        self.messages_layout.setAlignment(Qt.AlignmentFlag.AlignTop)
-        self.messages_layout.setSpacing(20)
-        self.messages_layout.setContentsMargins(5, 5, 5, 5)
-        
-        # Obtener estilos de área de desplazamiento
-        scroll_styles = get_scroll_area_styles()
-        
         # Área de desplazamiento con efecto de borde brillante
         scroll_container = QFrame()
         scroll_container.setFrameShape(QFrame.Shape.StyledPanel)
-        scroll_container.setStyleSheet(scroll_styles["container"])
+        scroll_container.setObjectName("scrollContainer")
         
-        scroll_glow = QGraphicsDropShadowEffect(scroll_container)
-        scroll_glow.setColor(QColor(COLORS["accent_cyan"]))
-        scroll_glow.setOffset(0, 0)
-        scroll_glow.setBlurRadius(15)
-        scroll_container.setGraphicsEffect(scroll_glow)
+        Glow(scroll_container, COLORS["accent_cyan"], 15, px(BORDER_RADIUS["extra_large"]))
         
         scroll_layout = QVBoxLayout(scroll_container)
         scroll_layout.setContentsMargins(1, 1, 1, 1)
         scroll_layout.setSpacing(0)
         
-        scroll_area = QScrollArea()
-        scroll_area.setWidgetResizable(True)
-        scroll_area.setWidget(self.messages_area)
-        scroll_area.setStyleSheet(scroll_styles["scrollarea"])
-        
-        # Mejorar adaptabilidad vertical
-        scroll_area.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
-        scroll_layout.addWidget(scroll_area)
+        # Indicador ligero en lugar de la vista web hasta que termine el arranque
+        self._transcript_placeholder = QLabel("ESTABLECIENDO ENLACE NEURAL...")
+        self._transcript_placeholder.setObjectName("transcriptPlaceholder")
+        self._transcript_placeholder.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        scroll_layout.addWidget(self._transcript_placeholder)
+        self._scroll_layout = scroll_layout
         
         main_layout.addWidget(scroll_container, 1)
         
-        # Obtener estilos del área de entrada
-        input_styles = get_input_area_styles()
-        
         # Área de entrada con diseño cyberpunk mejorado
         input_container = QFrame()
-        input_container.setStyleSheet(input_styles["container"])
+        input_container.setObjectName("inputContainer")
         
-        input_glow = QGraphicsDropShadowEffect(input_container)
-        input_glow.setColor(QColor(COLORS["accent_cyan"]))
-        input_glow.setOffset(0, 0)
-        input_glow.setBlurRadius(15)
-        input_container.setGraphicsEffect(input_glow)
+        Glow(input_container, COLORS["accent_cyan"], 15, px(BORDER_RADIUS["extra_large"]))
         
         input_container_layout = QVBoxLayout(input_container)
         input_container_layout.setContentsMargins(1, 1, 1, 1)
         input_container_layout.setSpacing(0)
         
         input_frame = QFrame()
-        input_frame.setStyleSheet(input_styles["frame"])
+        input_frame.setObjectName("inputFrame")
         
         input_layout = QHBoxLayout(input_frame)
         input_layout.setContentsMargins(15, 15, 15, 15)
@@ -423,7 +396,7 @@ class ChatWindow(QMainWindow):
         
         # Etiqueta de entrada al estilo terminal
         input_prefix = QLabel("[ MENSAJE ]")
-        input_prefix.setStyleSheet(input_styles["prefix"])
+        input_prefix.setObjectName("inputPrefix")
         input_prefix.setFixedWidth(100)
         input_prefix.setAlignment(Qt.AlignmentFlag.AlignCenter)
         input_layout.addWidget(input_prefix)
@@ -431,7 +404,7 @@ class ChatWindow(QMainWindow):
         # Campo de texto mejorado
         self.message_input = QTextEdit()
         self.message_input.setPlaceholderText("Escribe un mensaje...")
-        self.message_input.setStyleSheet(input_styles["input"])
+        self.message_input.setObjectName("messageInput")
         self.message_input.setMinimumHeight(50)
         self.message_input.setMaximumHeight(100)
         self.message_input.textChanged.connect(self._on_input_changed)
@@ -439,126 +412,338 @@ class ChatWindow(QMainWindow):
         
         # Botón de envío mejorado
         self.send_button = QPushButton("ENVIAR")
-        self.send_button.setStyleSheet(input_styles["send_button"])
+        self.send_button.setObjectName("sendButton")
         
         # Efecto de resplandor para el botón
-        send_glow = QGraphicsDropShadowEffect(self.send_button)
-        send_glow.setColor(QColor(COLORS["accent_magenta"]))
-        send_glow.setOffset(0, 0)
-        send_glow.setBlurRadius(15)
-        self.send_button.setGraphicsEffect(send_glow)
+        Glow(self.send_button, COLORS["accent_magenta"], 15, px(BORDER_RADIUS["medium"]))
         
         self.send_button.clicked.connect(self._send_message)
         self.send_button.setDisabled(True)
         self.send_button.setFixedWidth(140)
         input_layout.addWidget(self.send_button)
         
+        # Botón para detener la respuesta en curso (ocupa el lugar del de envío)
+        self.stop_button = QPushButton("DETENER")
+        self.stop_button.setObjectName("stopButton")
+        self.stop_button.clicked.connect(self._stop_response)
+        self.stop_button.setFixedWidth(140)
+        self.stop_button.hide()
+        input_layout.addWidget(self.stop_button)
+        
         input_container_layout.addWidget(input_frame)
         main_layout.addWidget(input_container)
         
         # Asignar el widget principal a la ventana
         self.setCentralWidget(main_widget)
-        
-        # Mensaje de bienvenida con contenido cyberpunk mejorado
-        welcome_message = """
-# Bienvenido al Sistema Cyber-GPT v2.0
-
-Has establecido conexión con la **interfaz neural** del asistente Cyber-GPT. Este sistema utiliza tecnología de _procesamiento de lenguaje avanzado_ para interactuar con humanos.
-
-**Protocolos de interacción:**
-* Comunicación en lenguaje natural con formato Markdown
-* Optimización de visualización para código y datos
-* Adaptación dinámica de respuestas según contexto
-
-```python
-# Sistema inicializado correctamente
-def night_city_protocol():
-    connect_neural_interface()
-    print("Conexión neural establecida. Bienvenido a Night City.")
-    return STATUS_ONLINE
-```
-
-> Los sistemas están operativos y listos. ¿En qué puedo asistirte hoy?
-"""
-        self._add_message(welcome_message, is_user=False)
     
     def _on_input_changed(self) -> None:
         """Maneja cambios en el campo de texto."""
         has_text = bool(self.message_input.toPlainText().strip())
-        self.send_button.setEnabled(has_text)
+        self.send_button.setEnabled(has_text and self._started)
+    
+    def _set_busy(self, busy: bool) -> None:
+        """
+        Alterna entre los botones de envío y de detención.
+        
+        Args:
+            busy: Si hay una respuesta en curso
+        """
+        self.send_button.setVisible(not busy)
+        self.stop_button.setVisible(busy)
+        if not busy:
+            self._active_token = None
+            self._on_input_changed()
     
     def _send_message(self) -> None:
         """Envía el mensaje del usuario al chatbot."""
         message = self.message_input.toPlainText().strip()
-        if not message:
+        if not message or not self._started or self._active_token is not None:
             return
         
         # Limpiar el campo de entrada
         self.message_input.clear()
         self.send_button.setDisabled(True)
         
+        # Construir el contexto con el historial previo antes de añadir el mensaje
+        # (el resumen, si lo hay, sustituye a los mensajes que cubre)
+        if self.summary is None:
+            payload = self.openai_client.build_messages(message, self.messages)
+        else:
+            payload = self.openai_client.build_messages(
+                message,
+                self.messages[self.summary.covers:],
+                pinned=[self.summary.as_message()],
+            )
+        
         # Agregar mensaje del usuario a la interfaz
         self._add_message(message, is_user=True)
         
-        # Enviar mensaje a OpenAI en un hilo separado
-        self._send_to_openai(message)
+        # Enviar mensaje a OpenAI a través del motor de peticiones
+        self._send_to_openai(payload)
     
-    @run_in_thread
-    def _send_to_openai(self, message: str) -> None:
+    def _send_to_openai(self, payload: List[Dict[str, str]]) -> None:
         """
-        Envía el mensaje a OpenAI en un hilo separado.
+        Programa el envío de la petición a OpenAI en el motor de peticiones.
         
         Args:
-            message: El mensaje del usuario
+            payload: Los mensajes a enviar, incluido el último del usuario
         """
+        from chat_gpt_local.api.cancellation import CancellationToken
+        
+        self._request_id += 1
+        self._active_token = CancellationToken(settings.request_timeout)
+        self._set_busy(True)
+        # Solo se puede enviar con el arranque terminado
+        assert self.engine is not None
+        self.engine.submit(
+            self._stream_response(payload, self._request_id, self._active_token)
+        )
+    
+    async def _stream_response(
+        self, payload: List[Dict[str, str]], request_id: int, token: "CancellationToken"
+    ) -> None:
+        """
+        Recibe la respuesta de OpenAI en el bucle del motor de peticiones.
+        
+        Los fragmentos de la respuesta se emiten a medida que llegan y, al
+        terminar, se emite la respuesta completa. Las señales se entregan en
+        el hilo de la interfaz.
+        
+        Args:
+            payload: Los mensajes a enviar, incluido el último del usuario
+            request_id: El identificador de la petición
+            token: El token con el que se cancela la petición
+        """
+        from chat_gpt_local.api.errors import RequestCancelledError
+        
         try:
-            response = self.openai_client.send_message(message)
-            self.signal_bus.response_received.emit(response)
+            chunks = []
+            async for chunk in self.scheduler.stream(payload, token=token):
+                chunks.append(chunk)
+                self.signal_bus.token_received.emit(request_id, chunk)
+            self.signal_bus.response_received.emit(request_id, "".join(chunks))
+        except RequestCancelledError as e:
+            # Si la detuvo el usuario, la interfaz ya cerró el mensaje
+            if token.timed_out:
+                self.signal_bus.error_occurred.emit(request_id, str(e))
         except Exception as e:
-            self.signal_bus.error_occurred.emit(str(e))
+            self.signal_bus.error_occurred.emit(request_id, str(e))
+    
+    def _stop_response(self) -> None:
+        """Detiene la respuesta en curso y conserva el texto recibido hasta ahora."""
+        if self._active_token is None:
+            return
+        # Cierra el stream HTTP: el servidor deja de generar (y de facturar) tokens
+        self._active_token.cancel()
+        self._finish_streaming()
+        self._set_busy(False)
     
-    @pyqtSlot(str)
-    def _handle_response(self, response: str) -> None:
+    def _is_current(self, request_id: int) -> bool:
+        """Indica si una señal pertenece a la petición en curso."""
+        return self._active_token is not None and request_id == self._request_id
+    
+    def _finish_streaming(self) -> None:
+        """Cierra el mensaje en streaming y guarda en el historial lo recibido."""
+        if self._streaming_widget is None:
+            return
+        self._streaming_widget.flush()
+        if self._streaming_widget.content:
+            self._append_to_history(self._streaming_widget.content, is_user=False)
+        self._streaming_widget = None
+    
+    @pyqtSlot(int, str)
+    def _handle_token(self, request_id: int, token: str) -> None:
         """
-        Maneja la respuesta recibida de OpenAI.
+        Maneja un fragmento de la respuesta recibido durante el streaming.
+        
+        El widget del mensaje se crea al llegar el primer fragmento.
         
         Args:
+            request_id: El identificador de la petición
+            token: El fragmento de texto recibido
+        """
+        if not self._is_current(request_id):
+            return
+        if self._streaming_widget is None:
+            self._streaming_widget = self._add_message_widget("", is_user=False)
+        self._streaming_widget.append_content(token)
+    
+    @pyqtSlot(int, str)
+    def _handle_response(self, request_id: int, response: str) -> None:
+        """
+        Maneja la respuesta completa recibida de OpenAI.
+        
+        Args:
+            request_id: El identificador de la petición
             response: La respuesta del asistente
         """
-        self._add_message(response, is_user=False)
+        if not self._is_current(request_id):
+            return
+        self._set_busy(False)
+        if self._streaming_widget is None:
+            self._add_message(response, is_user=False)
+        else:
+            self._streaming_widget.flush()
+            self._streaming_widget = None
+            self._append_to_history(response, is_user=False)
+        self.status_label.setToolTip(self.prompt_cache.format())
+        self._schedule_compaction()
+    
+    def _schedule_compaction(self) -> None:
+        """Compacta el historial en segundo plano si ha superado el umbral."""
+        if self.compactor is None or self._compacting:
+            return
+        if time.monotonic() < self._compaction_retry_at:
+            return
+        if not self.compactor.pending(self.messages, self.summary):
+            return
+        self._compacting = True
+        # El compactador se crea junto con el motor
+        assert self.engine is not None
+        # Copia del historial: la interfaz puede seguir añadiendo mensajes
+        self.engine.submit(self._compact_history(list(self.messages), self.summary))
     
-    @pyqtSlot(str)
-    def _handle_error(self, error_message: str) -> None:
+    async def _compact_history(
+        self, history: List[Dict[str, Any]], summary: Optional["HistorySummary"]
+    ) -> None:
+        """
+        Genera el nuevo resumen en el bucle del motor de peticiones.
+        
+        Args:
+            history: Copia del historial
+            summary: El resumen actual, si lo hay
+        """
+        assert self.compactor is not None
+        try:
+            summary = await self.compactor.compact(history, summary)
+        except Exception:
+            # Sin resumen nuevo se sigue enviando el historial: no es un error visible
+            logger.exception("No se pudo compactar el historial")
+            self.signal_bus.compaction_failed.emit()
+            return
+        self.signal_bus.summary_ready.emit(summary)
+    
+    @pyqtSlot(object)
+    def _handle_summary(self, summary: Optional["HistorySummary"]) -> None:
+        """
+        Guarda el resumen generado en segundo plano.
+        
+        Args:
+            summary: El nuevo resumen, o None si no se generó
+        """
+        self._compacting = False
+        self._compaction_failures = 0
+        if summary is not None:
+            self.summary = summary
+    
+    @pyqtSlot()
+    def _handle_compaction_failed(self) -> None:
+        """Espera cada vez más antes de volver a intentar una compactación fallida."""
+        self._compacting = False
+        self._compaction_failures += 1
+        delay = min(
+            COMPACTION_RETRY_DELAY * 2 ** (self._compaction_failures - 1),
+            COMPACTION_RETRY_MAX_DELAY,
+        )
+        self._compaction_retry_at = time.monotonic() + delay
+    
+    @pyqtSlot(int, str)
+    def _handle_error(self, request_id: int, error_message: str) -> None:
         """
         Maneja errores en la comunicación con OpenAI.
         
         Args:
+            request_id: El identificador de la petición
             error_message: El mensaje de error
         """
+        if not self._is_current(request_id):
+            return
+        self._set_busy(False)
+        # Conservar en el historial lo que se alcanzó a recibir
+        self._finish_streaming()
         QMessageBox.critical(self, "Error", f"Error: {error_message}")
     
-    def _add_message(self, content: str, is_user: bool = False) -> None:
+    def _add_message(
+        self, content: str, is_user: bool = False, in_context: bool = True
+    ) -> None:
         """
         Añade un mensaje al chat.
         
         Args:
             content: El contenido del mensaje
             is_user: Si el mensaje es del usuario o del asistente
+            in_context: Si el mensaje debe enviarse como contexto en las peticiones
+        """
+        self._append_to_history(content, is_user, in_context)
+        self._add_message_widget(content, is_user)
+    
+    def add_messages(self, messages: Sequence[Mapping[str, Any]]) -> None:
+        """
+        Añade varios mensajes al historial y a la conversación de una vez.
+        
+        Todos los mensajes se insertan en la vista con una sola llamada y un solo
+        desplazamiento, por lo que cargar un historial largo no cuesta un paso de
+        maquetación por mensaje. Si la vista aún no existe (antes de
+        `finish_startup`), se muestran al crearla.
+        
+        Args:
+            messages: Mensajes con las claves "role" y "content" y, opcionalmente,
+                "timestamp" e "in_context"
+        """
+        if not messages:
+            return
+        added = [
+            {
+                "role": message["role"],
+                "content": message["content"],
+                "timestamp": message.get("timestamp") or datetime.now(),
+                "in_context": message.get("in_context", True),
+            }
+            for message in messages
+        ]
+        self.messages.extend(added)
+        if self.transcript is None:
+            self._pending_messages.extend(added)
+            return
+        self.transcript.add_messages(added)
+        self._scroll_to_bottom()
+    
+    def _append_to_history(
+        self, content: str, is_user: bool = False, in_context: bool = True
+    ) -> None:
+        """
+        Guarda un mensaje en el historial.
+        
+        Args:
+            content: El contenido del mensaje
+            is_user: Si el mensaje es del usuario o del asistente
+            in_context: Si el mensaje debe enviarse como contexto en las peticiones
         """
-        # Guardar mensaje en el historial
         self.messages.append({
             "role": "user" if is_user else "assistant",
             "content": content,
-            "timestamp": datetime.now()
+            "timestamp": datetime.now(),
+            "in_context": in_context,
         })
+    
+    def _add_message_widget(self, content: str, is_user: bool = False) -> "TranscriptMessage":
+        """
+        Añade un mensaje a la vista de la conversación.
         
-        # Crear widget de mensaje
-        message_widget = MessageWidget(content, is_user, self)
-        self.messages_layout.addWidget(message_widget)
-        
-        # Desplazarse hacia abajo para mostrar el mensaje más reciente
-        QApplication.processEvents()
-        scroll_area = self.messages_area.parent()
-        if isinstance(scroll_area, QScrollArea):
-            scrollbar = scroll_area.verticalScrollBar()
-            scrollbar.setValue(scrollbar.maximum())
\ No newline at end of file
+        Args:
+            content: El contenido del mensaje
+            is_user: Si el mensaje es del usuario o del asistente
+            
+        Returns:
+            El mensaje añadido
+        """
+        # Solo se llama con el arranque terminado (la bienvenida, al crear la vista)
+        assert self.transcript is not None
+        message = self.transcript.add_message(content, is_user)
+        self._scroll_to_bottom()
+        return message
+    
+    def _scroll_to_bottom(self) -> None:
+        """Desplaza la conversación para mostrar el mensaje más reciente."""
+        if self.transcript is not None:
+            self.transcript.scroll_to_bottom()
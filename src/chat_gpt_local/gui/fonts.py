@@ -0,0 +1,35 @@
+"""
+Registro único de las fuentes de la aplicación.
+"""
+
+from typing import Dict
+
+from PyQt6.QtGui import QFontDatabase
+
+from chat_gpt_local.gui.resources import load_resources
+from chat_gpt_local.gui.styles.base import FONT_FILES
+
+# Identificador de cada fuente ya registrada en Qt (-1 si falló), por ruta
+_font_ids: Dict[str, int] = {}
+
+
+def register_fonts() -> Dict[str, int]:
+    """
+    Registra las fuentes de `FONT_FILES` en la base de datos de fuentes de Qt.
+    
+    Cada fuente se registra una sola vez por proceso aunque la función se llame
+    varias veces. Qt lee cada fuente del paquete de recursos mapeado en memoria y
+    guarda una copia al registrarla, así que esa copia se hace una sola vez.
+    
+    Returns:
+        El identificador de cada fuente por ruta (-1 si no se pudo cargar)
+    """
+    load_resources()
+    for font_path in FONT_FILES.values():
+        if font_path in _font_ids:
+            continue
+        font_id = QFontDatabase.addApplicationFont(font_path)
+        if font_id == -1:
+            print(f"Error: No se pudo cargar la fuente {font_path}")
+        _font_ids[font_path] = font_id
+    return dict(_font_ids)
@@ -0,0 +1,289 @@
+"""
+Resplandores neón precalculados para los widgets de la interfaz.
+
+`QGraphicsDropShadowEffect` obliga a pintar el widget (y todos sus hijos) en una
+imagen intermedia y a difuminarla cada vez que se repinta. Aquí el difuminado se
+hace una sola vez por color y radio: para los marcos se genera una imagen de
+nueve partes (esquinas fijas y bordes que se estiran) y para las etiquetas una
+imagen del texto difuminado. Ambas se guardan en caché y se pintan detrás del
+widget desde un widget hermano, sin tocar el pintado del propio widget.
+"""
+
+from functools import lru_cache
+from typing import Optional
+
+from PyQt6.QtCore import QEvent, QObject, QRect, QRectF, Qt
+from PyQt6.QtGui import (
+    QColor,
+    QFont,
+    QFontMetrics,
+    QImage,
+    QPainter,
+    QPaintEvent,
+    QPixmap,
+)
+from PyQt6.QtWidgets import QLabel, QWidget
+
+# Eventos del widget que obligan a recolocar su resplandor
+GEOMETRY_EVENTS = (
+    QEvent.Type.Move,
+    QEvent.Type.Resize,
+    QEvent.Type.Show,
+    QEvent.Type.Hide,
+)
+
+
+def _blur(image: QImage, radius: int) -> QImage:
+    """
+    Difumina una imagen reduciéndola y volviéndola a ampliar con filtrado suave.
+
+    Args:
+        image: La imagen a difuminar
+        radius: El alcance aproximado del difuminado en píxeles
+    """
+    if radius < 2:
+        return image
+    factor = radius / 2
+    small = image.scaled(
+        max(1, round(image.width() / factor)),
+        max(1, round(image.height() / factor)),
+        Qt.AspectRatioMode.IgnoreAspectRatio,
+        Qt.TransformationMode.SmoothTransformation,
+    )
+    return small.scaled(
+        image.size(),
+        Qt.AspectRatioMode.IgnoreAspectRatio,
+        Qt.TransformationMode.SmoothTransformation,
+    )
+
+
+def _transparent_image(width: int, height: int) -> QImage:
+    """Crea una imagen transparente con canal alfa premultiplicado."""
+    image = QImage(width, height, QImage.Format.Format_ARGB32_Premultiplied)
+    image.fill(Qt.GlobalColor.transparent)
+    return image
+
+
+@lru_cache(maxsize=None)
+def glow_frame(color: str, radius: int, corner_radius: int) -> QPixmap:
+    """
+    Genera la imagen de nueve partes del resplandor de un marco.
+
+    La forma ocupa la imagen menos un margen de `radius` por cada lado, y sus
+    bordes miden `2 * radius + corner_radius`: lo bastante para contener la
+    esquina redondeada y todo el difuminado, de modo que el centro es uniforme y
+    se puede estirar.
+
+    Args:
+        color: Color del resplandor (hexadecimal)
+        radius: Alcance del resplandor fuera del marco
+        corner_radius: Radio de las esquinas del marco
+
+    Returns:
+        La imagen, cuyo borde de nueve partes mide `glow_border(radius, corner_radius)`
+    """
+    border = glow_border(radius, corner_radius)
+    side = 2 * border + 1
+    image = _transparent_image(side, side)
+    painter = QPainter(image)
+    painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+    painter.setPen(Qt.PenStyle.NoPen)
+    painter.setBrush(QColor(color))
+    painter.drawRoundedRect(
+        QRectF(radius, radius, side - 2 * radius, side - 2 * radius),
+        corner_radius,
+        corner_radius,
+    )
+    painter.end()
+    return QPixmap.fromImage(_blur(image, radius))
+
+
+def glow_border(radius: int, corner_radius: int) -> int:
+    """Devuelve el tamaño del borde de la imagen de nueve partes de `glow_frame`."""
+    return 2 * radius + corner_radius
+
+
+@lru_cache(maxsize=64)
+def glow_text(text: str, font_key: str, color: str, radius: int) -> QPixmap:
+    """
+    Genera la imagen del resplandor de un texto.
+
+    Args:
+        text: El texto
+        font_key: La fuente, como la devuelve `QFont.toString()`
+        color: Color del resplandor (hexadecimal)
+        radius: Alcance del resplandor
+
+    Returns:
+        La imagen de la línea del texto con un margen de `radius` por cada lado
+    """
+    font = QFont()
+    font.fromString(font_key)
+    metrics = QFontMetrics(font)
+    image = _transparent_image(
+        metrics.horizontalAdvance(text) + 2 * radius, metrics.height() + 2 * radius
+    )
+    painter = QPainter(image)
+    painter.setRenderHint(QPainter.RenderHint.TextAntialiasing)
+    painter.setFont(font)
+    painter.setPen(QColor(color))
+    painter.drawText(radius, radius + metrics.ascent(), text)
+    painter.end()
+    return QPixmap.fromImage(_blur(image, radius))
+
+
+def draw_nine_patch(painter: QPainter, target: QRect, pixmap: QPixmap, border: int) -> None:
+    """
+    Pinta una imagen de nueve partes ocupando un rectángulo.
+
+    Args:
+        painter: El pintor
+        target: El rectángulo de destino
+        pixmap: La imagen (cuadrada, con un píxel central que se estira)
+        border: Tamaño de las esquinas en la imagen
+    """
+    # Si el destino es más pequeño que las esquinas, se reducen por igual
+    edge = min(border, target.width() // 2, target.height() // 2)
+    side = pixmap.width()
+    source_cuts = (0, border, side - border, side)
+    target_xs = (target.left(), target.left() + edge, target.right() + 1 - edge, target.right() + 1)
+    target_ys = (target.top(), target.top() + edge, target.bottom() + 1 - edge, target.bottom() + 1)
+    for row in range(3):
+        for column in range(3):
+            destination = QRect(
+                target_xs[column],
+                target_ys[row],
+                target_xs[column + 1] - target_xs[column],
+                target_ys[row + 1] - target_ys[row],
+            )
+            if destination.isEmpty():
+                continue
+            source = QRect(
+                source_cuts[column],
+                source_cuts[row],
+                source_cuts[column + 1] - source_cuts[column],
+                source_cuts[row + 1] - source_cuts[row],
+            )
+            painter.drawPixmap(destination, pixmap, source)
+
+
+class Glow(QObject):
+    """
+    Resplandor pintado detrás de un widget a partir de una imagen precalculada.
+
+    Las etiquetas (`QLabel`) reciben el resplandor de su texto; el resto de widgets,
+    el de su marco con las esquinas redondeadas.
+    """
+
+    def __init__(
+        self, target: QWidget, color: str, radius: int, corner_radius: int = 0
+    ) -> None:
+        """
+        Añade el resplandor a un widget.
+
+        Puede llamarse antes de añadir el widget a un layout: el resplandor se
+        coloca cuando el widget tiene padre.
+
+        Args:
+            target: El widget
+            color: Color del resplandor (hexadecimal)
+            radius: Alcance del resplandor fuera del widget
+            corner_radius: Radio de las esquinas del widget
+        """
+        super().__init__(target)
+        self.target = target
+        self.color = color
+        self.radius = radius
+        self.corner_radius = corner_radius
+        self._overlay: Optional[_GlowOverlay] = None
+        self._text: Optional[str] = None
+        target.installEventFilter(self)
+        self._attach()
+
+    def eventFilter(self, watched: Optional[QObject], event: Optional[QEvent]) -> bool:
+        """Sigue los cambios de padre, posición, tamaño y texto del widget."""
+        if event is None:
+            return False
+        kind = event.type()
+        if kind == QEvent.Type.ParentChange:
+            self._attach()
+        elif kind in GEOMETRY_EVENTS:
+            self._sync()
+        elif kind == QEvent.Type.Paint and self._overlay is not None:
+            # El texto de una etiqueta ha cambiado desde el último resplandor
+            if isinstance(self.target, QLabel) and self.target.text() != self._text:
+                self._overlay.update()
+        return False
+
+    def paint(self, painter: QPainter, rect: QRect) -> None:
+        """
+        Pinta el resplandor.
+
+        Args:
+            painter: El pintor del widget que hay detrás
+            rect: El rectángulo del widget que hay detrás (el del objetivo más el alcance)
+        """
+        if isinstance(self.target, QLabel):
+            self._text = self.target.text()
+            if not self._text:
+                return
+            font = self.target.font()
+            text_rect = QFontMetrics(font).boundingRect(
+                self.target.contentsRect(), int(self.target.alignment().value), self._text
+            )
+            pixmap = glow_text(self._text, font.toString(), self.color, self.radius)
+            # El widget de detrás empieza `radius` píxeles antes que el objetivo y la
+            # imagen tiene ese mismo margen, así que ambos desplazamientos se compensan
+            painter.drawPixmap(text_rect.topLeft(), pixmap)
+        else:
+            draw_nine_patch(
+                painter,
+                rect,
+                glow_frame(self.color, self.radius, self.corner_radius),
+                glow_border(self.radius, self.corner_radius),
+            )
+
+    def _attach(self) -> None:
+        """Crea el widget del resplandor junto al objetivo, en su mismo padre."""
+        parent = self.target.parentWidget()
+        if parent is None:
+            return
+        if self._overlay is None:
+            self._overlay = _GlowOverlay(self, parent)
+        elif self._overlay.parentWidget() is not parent:
+            self._overlay.setParent(parent)
+        self._sync()
+
+    def _sync(self) -> None:
+        """Coloca el resplandor alrededor del objetivo y justo debajo de él."""
+        if self._overlay is None:
+            return
+        self._overlay.setVisible(self.target.isVisible())
+        self._overlay.setGeometry(
+            self.target.geometry().adjusted(-self.radius, -self.radius, self.radius, self.radius)
+        )
+        self._overlay.stackUnder(self.target)
+
+
+class _GlowOverlay(QWidget):
+    """Widget transparente que pinta un resplandor detrás de su hermano."""
+
+    def __init__(self, glow: Glow, parent: QWidget) -> None:
+        """
+        Inicializa el widget.
+
+        Args:
+            glow: El resplandor a pintar
+            parent: El padre del widget con resplandor
+        """
+        super().__init__(parent)
+        self.glow = glow
+        self.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+        self.setAttribute(Qt.WidgetAttribute.WA_NoSystemBackground)
+        self.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground)
+
+    def paintEvent(self, event: Optional[QPaintEvent]) -> None:
+        """Pinta el resplandor."""
+        painter = QPainter(self)
+        self.glow.paint(painter, self.rect())
+        painter.end()
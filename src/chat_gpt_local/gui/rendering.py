@@ -0,0 +1,475 @@
+"""
+Conversión de los mensajes de Markdown a HTML.
+
+Crear una instancia de `markdown.Markdown` carga todas sus extensiones, así que
+`convert_markdown` reutiliza una por hilo (reiniciándola entre conversiones), y
+`RenderCache` guarda el HTML de los contenidos ya convertidos en una caché LRU
+indexada por el hash del contenido. Volver a mostrar un historial ya visto no
+vuelve a convertir nada.
+
+`RenderPool` hace las conversiones que no están en caché en un grupo de hilos o
+de procesos y entrega el resultado con una señal, para que un mensaje grande no
+bloquee el hilo de la interfaz mientras se convierte.
+
+Mientras un mensaje crece (streaming), `IncrementalRenderer` lo divide en bloques
+de primer nivel y solo se vuelven a convertir los que han cambiado, normalmente
+el último; el coste de cada actualización no depende de la longitud del mensaje.
+"""
+
+import concurrent.futures
+import hashlib
+import multiprocessing
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Set, Tuple, cast
+
+import markdown
+from PyQt6.QtCore import QObject, Qt, pyqtSignal, pyqtSlot
+
+MARKDOWN_EXTENSIONS = ('fenced_code', 'tables', 'nl2br')
+
+# Implementaciones disponibles para el grupo de conversión
+RENDER_BACKENDS = ("thread", "process")
+
+# Inicio de un bloque de código delimitado (``` o ~~~)
+FENCE_RE = re.compile(r"^ {0,3}(`{3,}|~{3,})")
+# Inicio de un elemento de lista
+LIST_ITEM_RE = re.compile(r"^ {0,3}([*+-]|\d+[.)])\s")
+
+# Conversores de los hilos del grupo (cada hilo o proceso usa el suyo)
+_local = threading.local()
+
+
+def convert_markdown(content: str) -> str:
+    """
+    Convierte Markdown a HTML con el conversor del hilo actual, sin caché.
+
+    Es la tarea que ejecutan los trabajadores de `RenderPool`; está definida a
+    nivel de módulo para poder enviarla a otros procesos.
+
+    Args:
+        content: El texto en Markdown
+
+    Returns:
+        El fragmento HTML equivalente
+    """
+    converter = getattr(_local, "converter", None)
+    if converter is None:
+        converter = _local.converter = markdown.Markdown(extensions=list(MARKDOWN_EXTENSIONS))
+    return cast(str, converter.reset().convert(content))
+
+
+def convert_blocks(blocks: Sequence[str]) -> List[str]:
+    """
+    Convierte por separado cada bloque de un mensaje que aún está creciendo.
+
+    Un bloque de código cuyo cierre no ha llegado todavía se cierra
+    provisionalmente para mostrarlo ya como código.
+
+    Args:
+        blocks: Los bloques de primer nivel, tal como los devuelve `split_blocks`
+
+    Returns:
+        El HTML de cada bloque
+    """
+    rendered = []
+    for block in blocks:
+        fence = None
+        for line in block.splitlines():
+            fence = _next_fence(fence, line)
+        if fence is not None:
+            block = block + ("" if block.endswith("\n") else "\n") + fence
+        rendered.append(convert_markdown(block))
+    return rendered
+
+
+def split_blocks(content: str) -> List[str]:
+    """
+    Divide un texto en Markdown en sus bloques de primer nivel.
+
+    Un bloque termina en una línea en blanco seguida de una línea sin sangría,
+    salvo dentro de un bloque de código delimitado o entre elementos de una misma
+    lista. Las tablas no contienen líneas en blanco, así que nunca se dividen.
+    Concatenar los bloques devuelve el texto original.
+
+    Args:
+        content: El texto en Markdown
+
+    Returns:
+        Los bloques, en orden
+    """
+    blocks: List[str] = []
+    current: List[str] = []
+    fence: Optional[str] = None
+    after_blank = False
+    for line in content.splitlines(keepends=True):
+        starts_block = (
+            fence is None
+            and after_blank
+            and line.strip()
+            and not line[0].isspace()
+            and not (LIST_ITEM_RE.match(line) and LIST_ITEM_RE.match(current[0]))
+        )
+        if starts_block:
+            blocks.append("".join(current))
+            current = []
+        current.append(line)
+        in_fence = fence is not None
+        fence = _next_fence(fence, line)
+        after_blank = not in_fence and not line.strip()
+    if current:
+        blocks.append("".join(current))
+    return blocks
+
+
+def _next_fence(fence: Optional[str], line: str) -> Optional[str]:
+    """
+    Devuelve el delimitador del bloque de código abierto tras una línea.
+
+    Args:
+        fence: El delimitador abierto antes de la línea (None si no hay ninguno)
+        line: La línea
+    """
+    match = FENCE_RE.match(line)
+    if fence is None:
+        return match.group(1) if match else None
+    closes = (
+        match is not None
+        and match.group(1)[0] == fence[0]
+        and len(match.group(1)) >= len(fence)
+        and not line[match.end():].strip()
+    )
+    return None if closes else fence
+
+
+class IncrementalRenderer:
+    """Decide qué bloques de un mensaje que crece hay que volver a convertir."""
+
+    def __init__(self) -> None:
+        """Inicializa el estado sin ningún bloque mostrado."""
+        # Texto de los bloques cuyo HTML ya se ha mostrado
+        self.blocks: List[str] = []
+        # Posición en el mensaje del final de cada bloque mostrado
+        self._ends: List[int] = []
+
+    def pending(self, content: str) -> Tuple[int, List[str]]:
+        """
+        Compara el contenido con los bloques ya mostrados.
+
+        Si el contenido solo ha crecido, únicamente se vuelve a dividir el último
+        bloque mostrado y lo que le sigue. Para saberlo se comprueba solo el
+        penúltimo bloque, así que el coste no depende de la longitud del mensaje;
+        un cambio en un bloque anterior requiere enviar el mensaje completo.
+
+        Args:
+            content: El contenido actual del mensaje
+
+        Returns:
+            El índice del primer bloque que cambia y el texto de los bloques
+            desde ese índice hasta el final
+        """
+        keep = max(len(self.blocks) - 1, 0)
+        offset = self._ends[keep - 1] if keep else 0
+        last = self.blocks[keep - 1] if keep else ""
+        if content.startswith(last, offset - len(last)):
+            start, blocks = keep, split_blocks(content[offset:])
+        else:
+            start, blocks = 0, split_blocks(content)
+
+        same = 0
+        while (
+            same < min(len(blocks), len(self.blocks) - start)
+            and blocks[same] == self.blocks[start + same]
+        ):
+            same += 1
+        return start + same, blocks[same:]
+
+    def rendered(self, start: int, blocks: Sequence[str]) -> None:
+        """
+        Registra que se han mostrado los bloques desde `start` hasta el final.
+
+        Args:
+            start: El índice del primer bloque mostrado
+            blocks: El texto de los bloques mostrados
+        """
+        self.blocks[start:] = blocks
+        del self._ends[start:]
+        end = self._ends[-1] if self._ends else 0
+        for block in blocks:
+            end += len(block)
+            self._ends.append(end)
+
+
+class RenderCache:
+    """Caché LRU del HTML de los contenidos en Markdown ya convertidos."""
+
+    def __init__(self, max_entries: int = 2048) -> None:
+        """
+        Inicializa la caché vacía.
+
+        Args:
+            max_entries: Número máximo de contenidos guardados
+        """
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def cached(self, content: str) -> Optional[str]:
+        """
+        Devuelve el HTML guardado de un contenido, si está en la caché.
+
+        Args:
+            content: El texto en Markdown
+
+        Returns:
+            El HTML guardado, o None si hay que convertirlo
+        """
+        key = self._key(content)
+        with self._lock:
+            html = self._cache.get(key)
+            if html is None:
+                self.misses += 1
+                return None
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return html
+
+    def store(self, content: str, html: str) -> None:
+        """
+        Guarda en la caché el HTML de un contenido ya convertido.
+
+        Args:
+            content: El texto en Markdown
+            html: El HTML equivalente
+        """
+        key = self._key(content)
+        with self._lock:
+            self._cache[key] = html
+            self._cache.move_to_end(key)
+            if len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    def clear(self) -> None:
+        """Vacía la caché."""
+        with self._lock:
+            self._cache.clear()
+
+    @staticmethod
+    def _key(content: str) -> str:
+        """Calcula la clave de caché de un contenido."""
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+# Caché compartida por toda la interfaz
+render_cache = RenderCache()
+
+
+class RenderPool(QObject):
+    """Convierte Markdown a HTML fuera del hilo de la interfaz."""
+
+    # Identificador del mensaje y HTML resultante
+    rendered = pyqtSignal(int, str)
+    # Identificador del mensaje, índice del primer bloque y HTML de los bloques
+    # desde ese índice (sustituyen a los que había a partir de él)
+    tail_rendered = pyqtSignal(int, int, list)
+    # Resultado de un trabajador (identificador, contenido, HTML, usar caché, secuencia);
+    # se reemite para que la caché se actualice en el hilo del grupo
+    _finished = pyqtSignal(int, str, str, bool, int)
+    # Resultado de una conversión por bloques (identificador, índice, textos, HTML, secuencia)
+    _tail_finished = pyqtSignal(int, int, list, list, int)
+
+    def __init__(
+        self,
+        backend: str = "thread",
+        workers: Optional[int] = None,
+        cache: Optional[RenderCache] = None,
+        parent: Optional[QObject] = None,
+    ) -> None:
+        """
+        Inicializa el grupo de conversión.
+
+        Args:
+            backend: "thread" para un grupo de hilos o "process" para un grupo de
+                procesos (aprovecha todos los núcleos al restaurar historiales largos)
+            workers: Número de trabajadores (None usa el número de núcleos)
+            cache: Caché que se consulta y se completa (None usa la compartida)
+            parent: Objeto padre
+
+        Raises:
+            ValueError: Si la implementación no es una de RENDER_BACKENDS
+        """
+        super().__init__(parent)
+        workers = workers or os.cpu_count() or 1
+        if backend == "thread":
+            self._executor: concurrent.futures.Executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="chat-gpt-local-render"
+            )
+        elif backend == "process":
+            # "spawn" evita duplicar el estado de Qt del proceso principal
+            self._executor = concurrent.futures.ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        else:
+            raise ValueError(
+                f"Implementación de conversión desconocida: {backend!r} "
+                f"(admitidas: {', '.join(RENDER_BACKENDS)})"
+            )
+        self.backend = backend
+        self.cache = cache or render_cache
+        # Última petición de cada mensaje: los resultados anteriores se descartan
+        self._latest: Dict[int, int] = {}
+        # Bloques mostrados de los mensajes que se están recibiendo por streaming
+        self._incremental: Dict[int, IncrementalRenderer] = {}
+        # Mensajes con una conversión por bloques en curso, y el último contenido
+        # que llegó mientras tanto (se convierte al terminar la que está en curso)
+        self._partial_in_flight: Set[int] = set()
+        self._queued_partial: Dict[int, str] = {}
+        self._sequence = 0
+        self._closed = False
+        # Siempre en cola: el resultado nunca se entrega dentro de `submit`
+        # (los stubs de PyQt6 no declaran el tipo de conexión de `connect`)
+        queued = Qt.ConnectionType.QueuedConnection
+        self._finished.connect(self._on_finished, queued)  # type: ignore[call-arg]
+        self._tail_finished.connect(self._on_tail_finished, queued)  # type: ignore[call-arg]
+
+    def cached(self, content: str) -> Optional[str]:
+        """
+        Devuelve el HTML de un contenido si ya está en la caché.
+
+        Args:
+            content: El texto en Markdown
+        """
+        return self.cache.cached(content)
+
+    def submit(self, message_id: int, content: str, use_cache: bool = True) -> None:
+        """
+        Encarga la conversión de un mensaje; el resultado llega con `rendered`.
+
+        No consulta la caché (para eso está `cached`). Si el mensaje se vuelve a
+        enviar antes de que termine la conversión anterior (p. ej. durante un
+        streaming), solo se entrega el resultado más reciente.
+
+        Args:
+            message_id: El identificador del mensaje
+            content: El texto en Markdown
+            use_cache: Si se guarda el resultado en la caché
+        """
+        self._incremental.pop(message_id, None)
+        self._queued_partial.pop(message_id, None)
+        sequence = self._next_sequence(message_id)
+        future = self._executor.submit(convert_markdown, content)
+        future.add_done_callback(
+            lambda done: self._deliver(message_id, content, use_cache, sequence, done)
+        )
+
+    def submit_partial(self, message_id: int, content: str) -> None:
+        """
+        Encarga la conversión de los bloques que han cambiado en un mensaje que crece.
+
+        El resultado llega con `tail_rendered`. Si ya hay una conversión del
+        mensaje en curso, solo se guarda el contenido y se convierte el último
+        recibido cuando esa termine, así cada resultado se llega a mostrar aunque
+        los fragmentos lleguen más deprisa de lo que se convierten. Al terminar el
+        mensaje hay que enviarlo completo con `submit`, que sustituye a todos los
+        bloques.
+
+        Args:
+            message_id: El identificador del mensaje
+            content: El contenido actual en Markdown
+        """
+        if message_id in self._partial_in_flight:
+            self._queued_partial[message_id] = content
+            return
+        incremental = self._incremental.setdefault(message_id, IncrementalRenderer())
+        start, blocks = incremental.pending(content)
+        if start == len(incremental.blocks) and not blocks:
+            return
+        sequence = self._next_sequence(message_id)
+        self._partial_in_flight.add(message_id)
+        future = self._executor.submit(convert_blocks, blocks)
+        future.add_done_callback(
+            lambda done: self._deliver_tail(message_id, start, blocks, sequence, done)
+        )
+
+    def shutdown(self) -> None:
+        """Detiene los trabajadores y descarta las conversiones pendientes."""
+        self._closed = True
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _next_sequence(self, message_id: int) -> int:
+        """Numera una nueva conversión de un mensaje, que deja obsoletas las anteriores."""
+        self._sequence += 1
+        self._latest[message_id] = self._sequence
+        return self._sequence
+
+    def _deliver(
+        self,
+        message_id: int,
+        content: str,
+        use_cache: bool,
+        sequence: int,
+        future: "concurrent.futures.Future[str]",
+    ) -> None:
+        """Pasa al hilo del grupo el resultado de un trabajador (se llama desde ese trabajador)."""
+        if self._closed or future.cancelled():
+            return
+        try:
+            html = future.result()
+        except Exception as e:
+            html = f"<pre>Error al convertir el mensaje: {e}</pre>"
+            use_cache = False
+        self._finished.emit(message_id, content, html, use_cache, sequence)
+
+    @pyqtSlot(int, str, str, bool, int)
+    def _on_finished(
+        self, message_id: int, content: str, html: str, use_cache: bool, sequence: int
+    ) -> None:
+        """Guarda el resultado en la caché y lo entrega si sigue siendo el más reciente."""
+        if use_cache:
+            self.cache.store(content, html)
+        if self._latest.get(message_id) != sequence:
+            return
+        del self._latest[message_id]
+        self.rendered.emit(message_id, html)
+
+    def _deliver_tail(
+        self,
+        message_id: int,
+        start: int,
+        blocks: List[str],
+        sequence: int,
+        future: "concurrent.futures.Future[List[str]]",
+    ) -> None:
+        """Pasa al hilo del grupo el resultado de una conversión por bloques."""
+        if self._closed or future.cancelled():
+            return
+        try:
+            html = future.result()
+        except Exception:
+            # Se descarta (secuencia 0): la siguiente actualización o el mensaje
+            # completo lo reintentan
+            self._tail_finished.emit(message_id, start, [], [], 0)
+            return
+        self._tail_finished.emit(message_id, start, blocks, html, sequence)
+
+    @pyqtSlot(int, int, list, list, int)
+    def _on_tail_finished(
+        self, message_id: int, start: int, blocks: list, html: list, sequence: int
+    ) -> None:
+        """
+        Registra los bloques mostrados, los entrega si siguen siendo los más
+        recientes y convierte el contenido que llegó mientras tanto.
+        """
+        self._partial_in_flight.discard(message_id)
+        incremental = self._incremental.get(message_id)
+        if incremental is not None and self._latest.get(message_id) == sequence:
+            del self._latest[message_id]
+            incremental.rendered(start, blocks)
+            self.tail_rendered.emit(message_id, start, html)
+        queued = self._queued_partial.pop(message_id, None)
+        if queued is not None and message_id in self._incremental:
+            self.submit_partial(message_id, queued)
@@ -1,29 +1,31 @@
 """
 Módulo para manejar los recursos de la aplicación.
+
+Los recursos (las fuentes) se compilan con `scripts/compile_resources.py` en un
+paquete binario, `resources.rcc`, que Qt mapea en memoria al registrarlo: su
+contenido no se copia al importar ningún módulo y solo se lee lo que se usa.
 """
 
-from PyQt6.QtCore import QFile, QIODevice
-from PyQt6.QtGui import QFontDatabase
+from pathlib import Path
 
-def load_resources():
-    """
-    Carga y registra las fuentes y otros recursos.
-    Esta función debe ser llamada al inicio de la aplicación.
+from PyQt6.QtCore import QResource
+
+# Paquete binario de recursos, junto a este módulo
+RESOURCE_BUNDLE = Path(__file__).with_name("resources.rcc")
+
+_registered = False
+
+
+def load_resources() -> bool:
     """
-    # Registrar fuentes
-    font_files = [
-        ":/fonts/Orbitron-Regular.ttf",
-        ":/fonts/ShareTechMono-Regular.ttf",
-        ":/fonts/Rajdhani-Medium.ttf",
-        ":/fonts/FiraCode-Regular.ttf",
-    ]
+    Registra el paquete de recursos para que sus archivos sean accesibles como ":/...".
     
-    for font_path in font_files:
-        font_file = QFile(font_path)
-        if font_file.open(QIODevice.OpenModeFlag.ReadOnly):
-            font_id = QFontDatabase.addApplicationFontFromData(font_file.readAll())
-            if font_id == -1:
-                print(f"Error: No se pudo cargar la fuente {font_path}")
-            font_file.close()
-        else:
-            print(f"Error: No se pudo abrir el archivo de fuente {font_path}")
+    Solo lo registra la primera vez; las llamadas posteriores no hacen nada.
+    
+    Returns:
+        True si los recursos están disponibles
+    """
+    global _registered
+    if not _registered and RESOURCE_BUNDLE.exists():
+        _registered = QResource.registerResource(str(RESOURCE_BUNDLE))
+    return _registered
@@ -0,0 +1,145 @@
+"""
+Escritura de paquetes binarios de recursos de Qt (.rcc) sin la herramienta `rcc`.
+
+PyQt6 no incluye `rcc` ni un compilador de recursos a Python, así que este módulo
+genera el mismo formato binario que `rcc --binary` (versión 1, sin compresión) a
+partir de un archivo .qrc. El paquete se registra con `QResource.registerResource`,
+que lo mapea en memoria.
+
+Formato: una cabecera con las posiciones de las tres secciones, los datos (cada
+archivo precedido de su longitud), los nombres (longitud, hash y texto UTF-16) y el
+árbol de nodos. Los hijos de cada directorio son nodos consecutivos ordenados por
+el hash de su nombre, que Qt busca por bisección.
+"""
+
+import struct
+from pathlib import Path
+from typing import Dict, List, Tuple, Union
+from xml.etree import ElementTree
+
+RCC_MAGIC = b"qres"
+RCC_VERSION = 1
+
+# Indicadores de los nodos del árbol
+DIRECTORY_FLAG = 0x02
+
+# Idioma y país de los archivos sin traducción (QLocale.Language.C, AnyTerritory)
+LANGUAGE_C = 1
+ANY_TERRITORY = 0
+
+# Un directorio es un diccionario de nombre a entrada; un archivo, su ruta en disco
+Entry = Union[Dict[str, "Entry"], Path]
+
+
+def qt_hash(name: str) -> int:
+    """
+    Calcula el hash con el que Qt ordena y busca los nombres de los recursos.
+
+    Args:
+        name: El nombre de un archivo o directorio (sin barras)
+    """
+    h = 0
+    for (unit,) in struct.iter_unpack(">H", name.encode("utf-16-be")):
+        h = ((h << 4) + unit) & 0xFFFFFFFF
+        h ^= (h & 0xF0000000) >> 23
+        h &= 0x0FFFFFFF
+    return h
+
+
+def read_qrc(qrc_path: Union[str, Path]) -> Dict[str, Entry]:
+    """
+    Lee el árbol de recursos de un archivo .qrc.
+
+    Args:
+        qrc_path: Ruta al archivo .qrc; las de sus archivos son relativas a él
+
+    Returns:
+        El directorio raíz
+
+    Raises:
+        ValueError: Si un archivo y un directorio tienen la misma ruta
+    """
+    qrc_path = Path(qrc_path)
+    root: Dict[str, Entry] = {}
+    for qresource in ElementTree.parse(qrc_path).getroot().iter("qresource"):
+        prefix = [part for part in qresource.get("prefix", "/").split("/") if part]
+        for element in qresource.iter("file"):
+            source = (element.text or "").strip()
+            alias = element.get("alias") or source
+            parts = prefix + [part for part in alias.split("/") if part]
+            directory = root
+            for part in parts[:-1]:
+                child = directory.setdefault(part, {})
+                if not isinstance(child, dict):
+                    raise ValueError(
+                        f"{'/'.join(parts)}: {part} es un archivo, no un directorio"
+                    )
+                directory = child
+            directory[parts[-1]] = qrc_path.parent / source
+    return root
+
+
+def build_rcc(root: Dict[str, Entry]) -> bytes:
+    """
+    Genera un paquete binario de recursos.
+
+    Args:
+        root: El directorio raíz, como lo devuelve `read_qrc`
+
+    Returns:
+        El contenido del archivo .rcc
+    """
+    data = bytearray()
+    names = bytearray()
+    name_offsets: Dict[str, int] = {}
+    tree = bytearray()
+
+    def name_offset(name: str) -> int:
+        if name not in name_offsets:
+            encoded = name.encode("utf-16-be")
+            name_offsets[name] = len(names)
+            names.extend(struct.pack(">HI", len(encoded) // 2, qt_hash(name)))
+            names.extend(encoded)
+        return name_offsets[name]
+
+    # Recorrido en anchura: los hijos de cada directorio quedan consecutivos
+    nodes: List[Tuple[str, Entry]] = [("", root)]
+    index = 0
+    while index < len(nodes):
+        name, entry = nodes[index]
+        offset = name_offset(name) if index else 0
+        if isinstance(entry, dict):
+            first_child = len(nodes)
+            nodes.extend(sorted(entry.items(), key=lambda item: qt_hash(item[0])))
+            tree.extend(struct.pack(">IHII", offset, DIRECTORY_FLAG, len(entry), first_child))
+        else:
+            content = entry.read_bytes()
+            tree.extend(struct.pack(">IHHHI", offset, 0, ANY_TERRITORY, LANGUAGE_C, len(data)))
+            data.extend(struct.pack(">I", len(content)))
+            data.extend(content)
+        index += 1
+
+    header_size = 20
+    data_offset = header_size
+    names_offset = data_offset + len(data)
+    tree_offset = names_offset + len(names)
+    header = RCC_MAGIC + struct.pack(
+        ">IIII", RCC_VERSION, tree_offset, data_offset, names_offset
+    )
+    return bytes(header + data + names + tree)
+
+
+def write_rcc(qrc_path: Union[str, Path], output_path: Union[str, Path]) -> int:
+    """
+    Compila un archivo .qrc a un paquete binario de recursos.
+
+    Args:
+        qrc_path: Ruta al archivo .qrc
+        output_path: Ruta del archivo .rcc a escribir
+
+    Returns:
+        El tamaño del paquete en bytes
+    """
+    bundle = build_rcc(read_qrc(qrc_path))
+    Path(output_path).write_bytes(bundle)
+    return len(bundle)
@@ -62,4 +62,9 @@ SPACING = {
     "lg": "15px",
     "xl": "20px",
     "xxl": "25px",
-}
\ No newline at end of file
+}
+
+
+def px(value: str) -> int:
+    """Convierte una medida CSS en píxeles (p. ej. "15px") en un entero."""
+    return int(value.strip().removesuffix("px"))
@@ -120,70 +120,62 @@ def get_main_window_style():
         }}
     """
 
-def get_header_styles():
+def get_header_style():
     """Retorna los estilos para los componentes del encabezado."""
-    styles = {
-        "title": f"""
-            color: {COLORS["accent_cyan"]}; 
-            font-size: 28px; 
+    return f"""
+        QLabel#title {{
+            color: {COLORS["accent_cyan"]};
+            font-size: 28px;
             font-weight: bold;
             letter-spacing: 3px;
             font-family: {FONTS["headers"]};
             background-color: transparent;
             padding: 5px 15px;
             border-bottom: 2px solid {COLORS["accent_cyan"]};
-        """,
-        "status": f"""
-            color: {COLORS["accent_green"]};
-            background-color: rgba(57, 255, 20, 0.1);
-            border: 1px solid {COLORS["accent_green"]};
+        }}
+        QLabel[badge="true"] {{
             border-radius: 4px;
             padding: 5px 10px;
             font-size: 12px;
             font-weight: bold;
             font-family: {FONTS["monospace"]};
-        """,
-        "mode": f"""
+        }}
+        QLabel[badge="true"][accent="green"] {{
+            color: {COLORS["accent_green"]};
+            background-color: rgba(57, 255, 20, 0.1);
+            border: 1px solid {COLORS["accent_green"]};
+        }}
+        QLabel[badge="true"][accent="magenta"] {{
             color: {COLORS["accent_magenta"]};
             background-color: rgba(255, 0, 255, 0.1);
             border: 1px solid {COLORS["accent_magenta"]};
-            border-radius: 4px;
-            padding: 5px 10px;
             margin-left: 10px;
-            font-size: 12px;
-            font-weight: bold;
-            font-family: {FONTS["monospace"]};
-        """
-    }
-    return styles
+        }}
+    """
 
-def get_input_area_styles():
+def get_input_area_style():
     """Retorna los estilos para el área de entrada de mensajes."""
-    styles = {
-        "container": f"""
-            QFrame {{
-                background-color: {COLORS["background_secondary"]};
-                border: 1px solid {COLORS["accent_cyan"]};
-                border-radius: {BORDER_RADIUS["extra_large"]};
-                padding: 2px;
-            }}
-        """,
-        "frame": """
-            QFrame {
-                background-color: rgba(18, 26, 34, 0.9);
-                border-radius: 14px;
-                padding: 5px;
-            }
-        """,
-        "prefix": f"""
+    return f"""
+        QFrame#inputContainer {{
+            background-color: {COLORS["background_secondary"]};
+            border: 1px solid {COLORS["accent_cyan"]};
+            border-radius: {BORDER_RADIUS["extra_large"]};
+            padding: 2px;
+        }}
+        QFrame#inputFrame {{
+            background-color: rgba(18, 26, 34, 0.9);
+            border-radius: 14px;
+            padding: 5px;
+        }}
+        QLabel#inputPrefix {{
             color: {COLORS["accent_cyan"]};
             font-size: 12px;
             font-family: {FONTS["monospace"]};
             background-color: rgba(0, 255, 255, 0.1);
             padding: 8px;
             border-radius: 4px;
-        """,
-        "input": f"""
+        }}
+        QTextEdit#messageInput {{
             border: none;
             background-color: {COLORS["widget_background"]};
             color: {COLORS["text_primary"]};
@@ -191,47 +183,57 @@ def get_input_area_styles():
             font-family: {FONTS["main"]};
             padding: 8px;
             border-radius: {BORDER_RADIUS["medium"]};
-        """,
-        "send_button": f"""
-            QPushButton {{
-                background: {GRADIENTS["button_background"]};
-                color: white;
-                border-radius: {BORDER_RADIUS["medium"]};
-                padding: 12px 25px;
-                font-weight: bold;
-                font-size: 14px;
-                font-family: {FONTS["headers"]};
-                letter-spacing: 1px;
-                border: none;
-            }}
-            QPushButton:hover {{
-                background: {GRADIENTS["button_background_hover"]};
-            }}
-            QPushButton:disabled {{
-                background: {GRADIENTS["button_background_disabled"]};
-                color: {COLORS["text_disabled"]};
-            }}
-        """
-    }
-    return styles
+        }}
+        QPushButton#sendButton {{
+            background: {GRADIENTS["button_background"]};
+            color: white;
+            border-radius: {BORDER_RADIUS["medium"]};
+            padding: 12px 25px;
+            font-weight: bold;
+            font-size: 14px;
+            font-family: {FONTS["headers"]};
+            letter-spacing: 1px;
+            border: none;
+        }}
+        QPushButton#sendButton:hover {{
+            background: {GRADIENTS["button_background_hover"]};
+        }}
+        QPushButton#sendButton:disabled {{
+            background: {GRADIENTS["button_background_disabled"]};
+            color: {COLORS["text_disabled"]};
+        }}
+        QPushButton#stopButton {{
+            background: transparent;
+            color: {COLORS["accent_magenta"]};
+            border: 1px solid {COLORS["accent_magenta"]};
+            border-radius: {BORDER_RADIUS["medium"]};
+            padding: 12px 25px;
+            font-weight: bold;
+            font-size: 14px;
+            font-family: {FONTS["headers"]};
+            letter-spacing: 1px;
+        }}
+        QPushButton#stopButton:hover {{
+            background: rgba(255, 0, 255, 0.15);
+        }}
+    """
 
-def get_scroll_area_styles():
-    """Retorna los estilos para el área de desplazamiento de mensajes."""
-    styles = {
-        "container": f"""
-            QFrame {{
-                background-color: {COLORS["background_secondary"]};
-                border: 1px solid {COLORS["accent_cyan"]};
-                border-radius: {BORDER_RADIUS["extra_large"]};
-                padding: 2px;
-            }}
-        """,
-        "scrollarea": """
-            QScrollArea {
-                background-color: transparent;
-                border: none;
-                border-radius: 14px;
-            }
-        """
-    }
-    return styles
\ No newline at end of file
+def get_scroll_area_style():
+    """Retorna los estilos para el área de mensajes."""
+    return f"""
+        QFrame#scrollContainer {{
+            background-color: {COLORS["background_secondary"]};
+            border: 1px solid {COLORS["accent_cyan"]};
+            border-radius: {BORDER_RADIUS["extra_large"]};
+            padding: 2px;
+        }}
+        QWebEngineView#transcript {{
+            background-color: transparent;
+        }}
+        QLabel#transcriptPlaceholder {{
+            color: {COLORS["text_disabled"]};
+            font-size: 12px;
+            font-family: {FONTS["monospace"]};
+            letter-spacing: 2px;
+        }}
+    """
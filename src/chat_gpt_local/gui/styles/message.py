@@ -5,87 +5,122 @@ Estilos para los widgets de mensajes y efectos visuales.
 from .base import BORDER_RADIUS, COLORS, FONTS, SPACING
 
 
-def get_message_frame_style(is_user=False):
+def get_message_css():
     """
-    Retorna el estilo para el marco del mensaje.
+    Retorna el CSS de los mensajes de la vista de la conversación.
     
-    Args:
-        is_user: Si el mensaje es del usuario o del asistente
+    Cada mensaje define la variable '--accent' con el color de su rol, que
+    usan también los estilos del contenido Markdown.
     """
-    # Configurar colores según si es usuario o asistente
-    if is_user:
-        bg_color = "#111927"
-        border_color = COLORS["accent_cyan"]
-    else:
-        bg_color = "#1A0F26"
-        border_color = COLORS["accent_magenta"]
-    
     return f"""
-        QFrame {{
-            background-color: {bg_color}; 
-            border: 1px solid {border_color};
-            border-radius: {BORDER_RADIUS["large"]}; 
+        #transcript {{
+            padding: {SPACING["xs"]};
+        }}
+        ::-webkit-scrollbar {{
+            width: 10px;
+            background-color: {COLORS["scrollbar_background"]};
+        }}
+        ::-webkit-scrollbar-thumb {{
+            background: linear-gradient(90deg, {COLORS["accent_magenta"]}, {COLORS["accent_cyan"]});
+            border-radius: 5px;
+        }}
+        .message {{
+            --accent: {COLORS["accent_magenta"]};
+            position: relative;
+            box-sizing: border-box;
+            overflow: hidden;
+            background-color: #1A0F26;
+            border: 1px solid var(--accent);
+            border-radius: {BORDER_RADIUS["large"]};
             padding: {SPACING["md"]};
+            margin-bottom: {SPACING["xl"]};
+            box-shadow: 0 0 15px -3px var(--accent);
+        }}
+        .message.user {{
+            --accent: {COLORS["accent_cyan"]};
+            background-color: #111927;
+        }}
+        /* Bloques de un mensaje que se recibe por streaming */
+        .block {{
+            display: contents;
+        }}
+        /* Texto sin formato mostrado mientras se convierte el Markdown */
+        .pending {{
+            white-space: pre-wrap;
+            opacity: 0.8;
+        }}
+        /* Mensaje alejado de la parte visible: solo conserva su altura */
+        .message.placeholder {{
+            box-shadow: none;
+        }}
+        .message.placeholder::before {{
+            display: none;
+        }}
+        .message > header {{
+            display: flex;
+            align-items: center;
+            gap: {SPACING["sm"]};
+            margin-bottom: {SPACING["sm"]};
+        }}
+        .avatar {{
+            width: 30px;
+            height: 30px;
+            line-height: 30px;
+            text-align: center;
+            background-color: var(--accent);
+            border-radius: 15px;
+            color: #000000;
+            font-weight: bold;
+            font-size: 14px;
+            box-shadow: 0 0 10px var(--accent);
+        }}
+        .role {{
+            flex: 1;
+            color: var(--accent);
+            font-weight: bold;
+            font-size: 12px;
+            font-family: {FONTS["headers"]};
+        }}
+        .message time {{
+            color: #A7B6C2;
+            font-size: 10px;
+            font-family: {FONTS["monospace"]};
+            background-color: rgba(0, 0, 0, 0.3);
+            padding: 2px 5px;
+            border-radius: 3px;
+            border-left: 1px solid var(--accent);
+        }}
+        /* Líneas de 'glitch' decorativas en el fondo de los mensajes del asistente */
+        .message.assistant::before {{
+            content: "";
+            position: absolute;
+            inset: 0;
+            pointer-events: none;
+            opacity: 0.2;
+            background:
+                linear-gradient({COLORS["accent_cyan"]}, {COLORS["accent_cyan"]}) 0 23% / 60px 1px no-repeat,
+                linear-gradient({COLORS["accent_magenta"]}, {COLORS["accent_magenta"]}) 0 61% / 35px 1px no-repeat,
+                linear-gradient({COLORS["accent_green"]}, {COLORS["accent_green"]}) 0 84% / 90px 1px no-repeat;
+            animation: glitch 4s steps(1) infinite;
+        }}
+        .paused .message.assistant::before {{
+            animation-play-state: paused;
+        }}
+        @keyframes glitch {{
+            50% {{ background-position: 0 41%, 0 12%, 0 70%; }}
         }}
     """
 
-def get_avatar_style(is_user=False):
-    """
-    Retorna el estilo para el avatar del mensaje.
-    
-    Args:
-        is_user: Si el mensaje es del usuario o del asistente
-    """
-    avatar_color = COLORS["accent_cyan"] if is_user else COLORS["accent_magenta"]
-    
-    return f"""
-        background-color: {avatar_color};
-        border-radius: 15px;
-        color: #000000;
-        font-weight: bold;
-        font-size: 14px;
-    """
-
-def get_role_label_style(is_user=False):
-    """
-    Retorna el estilo para la etiqueta de rol.
-    
-    Args:
-        is_user: Si el mensaje es del usuario o del asistente
-    """
-    color = COLORS["accent_cyan"] if is_user else COLORS["accent_magenta"]
-    
-    return f"""
-        color: {color}; 
-        font-weight: bold; 
-        font-size: 12px;
-        font-family: {FONTS["headers"]};
-    """
-
-def get_time_label_style(is_user=False):
-    """
-    Retorna el estilo para la etiqueta de tiempo.
-    
-    Args:
-        is_user: Si el mensaje es del usuario o del asistente
-    """
-    avatar_color = COLORS["accent_cyan"] if is_user else COLORS["accent_magenta"]
-    
-    return f"""
-        color: #A7B6C2; 
-        font-size: 10px;
-        font-family: {FONTS["monospace"]};
-        background-color: rgba(0, 0, 0, 0.3);
-        padding: 2px 5px;
-        border-radius: 3px;
-        border-left: 1px solid {avatar_color};
-    """
+def get_transcript_css():
+    """Retorna el CSS completo de la vista de la conversación."""
+    return get_markdown_css_template().format(avatar_color="var(--accent)") + get_message_css()
 
 def get_markdown_css_template():
     """
     Retorna la plantilla CSS para contenido Markdown.
     Incluye un parámetro de formateo 'avatar_color' que debe ser reemplazado
-    con el color correspondiente.
+    con el color correspondiente (en la vista de la conversación, la variable
+    CSS del rol de cada mensaje).
     """
     return """
         @font-face {{
@@ -235,28 +270,26 @@ def get_markdown_css_template():
         }}
     """
 
-def get_html_template():
+def get_transcript_html_template() -> str:
     """
-    Retorna la plantilla HTML para el contenido de mensajes.
-    Incluye tres parámetros de formateo:
+    Retorna la plantilla HTML de la página base de la conversación.
+    Incluye dos parámetros de formateo:
     - 'css_styles': Los estilos CSS
-    - 'html_content': El contenido HTML generado desde Markdown
+    - 'script': El código JavaScript que inserta y actualiza los mensajes
     """
     return """
     <html>
     <head>
+        <meta charset="utf-8">
         <style>
             {css_styles}
         </style>
     </head>
     <body>
-        {html_content}
+        <main id="transcript"></main>
+        <script>
+            {script}
+        </script>
     </body>
     </html>
     """
-
-def get_webview_style():
-    """Retorna el estilo para el componente WebView."""
-    return """
-        background-color: transparent;
-    """
\ No newline at end of file
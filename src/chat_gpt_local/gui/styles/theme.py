@@ -0,0 +1,28 @@
+"""
+Hoja de estilos compilada de la aplicación.
+
+Todos los estilos Qt se reúnen una sola vez en una hoja que se aplica a la
+`QApplication`. Los widgets se distinguen por su `objectName` (p. ej. `#sendButton`)
+o por propiedades dinámicas (p. ej. `accent="green"`), así que crear un widget no
+obliga a Qt a analizar una hoja de estilos propia.
+"""
+
+from functools import lru_cache
+
+from .main_window import (
+    get_header_style,
+    get_input_area_style,
+    get_main_window_style,
+    get_scroll_area_style,
+)
+
+
+@lru_cache(maxsize=None)
+def get_app_stylesheet() -> str:
+    """Retorna la hoja de estilos de toda la aplicación (se construye una sola vez)."""
+    return "\n".join((
+        get_main_window_style(),
+        get_header_style(),
+        get_scroll_area_style(),
+        get_input_area_style(),
+    ))
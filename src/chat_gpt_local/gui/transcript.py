@@ -0,0 +1,229 @@
+"""
+Vista única de la conversación.
+
+Toda la conversación se muestra en un solo `QWebEngineView` que carga una vez
+una página base; cada mensaje nuevo se inserta en el DOM mediante JavaScript.
+Así hay una sola superficie de Chromium para toda la conversación y cada mensaje
+ocupa solo lo que ocupen sus nodos del DOM, en lugar de una vista web completa.
+
+Además, solo los mensajes cercanos a la parte visible conservan sus nodos: el
+resto se reduce a un hueco con su altura medida, de modo que el coste de
+desplazarse y la memoria no crecen con la longitud de la conversación.
+"""
+
+import html
+from datetime import datetime
+from typing import Any, List, Mapping, Optional, Sequence
+
+from PyQt6.QtCore import QObject, Qt, QTimer, QUrl
+from PyQt6.QtWebEngineWidgets import QWebEngineView
+from PyQt6.QtWidgets import QSizePolicy, QWidget
+
+from chat_gpt_local.gui.rendering import RenderPool
+from chat_gpt_local.gui.transcript_page import ScriptBatcher, get_transcript_page
+
+# Intervalo mínimo entre renderizados de un mensaje que se recibe por streaming
+STREAM_RENDER_INTERVAL_MS = 50
+
+
+class TranscriptView(QWebEngineView):
+    """Vista web que muestra todos los mensajes de la conversación."""
+
+    def __init__(
+        self, render_pool: Optional[RenderPool] = None, parent: Optional[QWidget] = None
+    ) -> None:
+        """
+        Inicializa la vista y carga la página base.
+
+        Args:
+            render_pool: Grupo que convierte el Markdown fuera del hilo de la interfaz
+            parent: Widget padre
+        """
+        super().__init__(parent)
+        self.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
+        self.setObjectName("transcript")
+        page = self.page()
+        if page is not None:
+            page.setBackgroundColor(Qt.GlobalColor.transparent)
+
+        self.render_pool = render_pool or RenderPool(parent=self)
+        self.render_pool.rendered.connect(self.update_message)
+        self.render_pool.tail_rendered.connect(self.update_tail)
+
+        self._next_id = 0
+        # Llamadas a la página, agrupadas en un solo script por vuelta del bucle
+        self._script = ScriptBatcher(self._run_script, parent=self)
+        self.loadFinished.connect(self._on_load_finished)
+        # La URL base permite cargar las fuentes de los recursos Qt (qrc:)
+        self.setHtml(get_transcript_page(), QUrl("qrc:/"))
+
+    def add_message(self, content: str, is_user: bool = False) -> "TranscriptMessage":
+        """
+        Añade un mensaje al final de la conversación.
+
+        Args:
+            content: El contenido del mensaje en Markdown
+            is_user: Si el mensaje es del usuario o del asistente
+
+        Returns:
+            El mensaje añadido, para poder ampliarlo durante el streaming
+        """
+        role = "user" if is_user else "assistant"
+        return self.add_messages([{"role": role, "content": content}])[0]
+
+    def add_messages(self, messages: Sequence[Mapping[str, Any]]) -> List["TranscriptMessage"]:
+        """
+        Añade varios mensajes al final de la conversación con una sola inserción.
+
+        Args:
+            messages: Mensajes con las claves "role" y "content" y, opcionalmente,
+                "timestamp" (por defecto, la hora actual)
+
+        Returns:
+            Los mensajes añadidos, en el mismo orden
+        """
+        added = []
+        items = []
+        for data in messages:
+            content = data["content"]
+            is_user = data["role"] == "user"
+            self._next_id += 1
+            message = TranscriptMessage(self, self._next_id, content, is_user)
+            content_html = self.render_pool.cached(content) if content else ""
+            if content_html is None:
+                # Mostrar el texto sin formato hasta que llegue la conversión
+                content_html = f'<div class="pending">{html.escape(content)}</div>'
+                self.render_pool.submit(message.id, content)
+            items.append({
+                "id": message.id,
+                "user": is_user,
+                "time": (data.get("timestamp") or datetime.now()).strftime("%H:%M"),
+                "html": content_html,
+            })
+            added.append(message)
+        self._call("appendMany", items)
+        return added
+
+    def render_message(self, message_id: int, content: str, final: bool = True) -> None:
+        """
+        Encarga la conversión del contenido de un mensaje ya mostrado.
+
+        Args:
+            message_id: El identificador del mensaje
+            content: El nuevo contenido en Markdown
+            final: Si el contenido está completo; mientras no lo esté solo se
+                convierten los bloques que han cambiado
+        """
+        if final:
+            self.render_pool.submit(message_id, content)
+        else:
+            self.render_pool.submit_partial(message_id, content)
+
+    def update_message(self, message_id: int, html: str) -> None:
+        """
+        Sustituye el contenido de un mensaje ya mostrado.
+
+        Args:
+            message_id: El identificador del mensaje
+            html: El nuevo contenido en HTML
+        """
+        self._call("update", message_id, html)
+
+    def update_tail(self, message_id: int, start: int, blocks: List[str]) -> None:
+        """
+        Sustituye los bloques de un mensaje a partir de uno dado.
+
+        Args:
+            message_id: El identificador del mensaje
+            start: El índice del primer bloque que cambia
+            blocks: El HTML de los bloques desde ese índice hasta el final
+        """
+        self._call("updateTail", message_id, start, blocks)
+
+    def scroll_to_bottom(self) -> None:
+        """Desplaza la conversación para mostrar el mensaje más reciente."""
+        self._call("scrollToBottom")
+
+    def set_animations_paused(self, paused: bool) -> None:
+        """
+        Pausa o reanuda las animaciones CSS de la conversación.
+
+        Args:
+            paused: Si las animaciones deben detenerse
+        """
+        self._call("setPaused", paused)
+
+    def _call(self, function: str, *args: Any) -> None:
+        """
+        Llama a una función de `transcript` en la página.
+
+        Las llamadas seguidas se ejecutan juntas (véase `ScriptBatcher`).
+        """
+        self._script.call(function, *args)
+
+    def _run_script(self, script: str) -> None:
+        """Ejecuta un script en la página."""
+        page = self.page()
+        if page is not None:
+            page.runJavaScript(script)
+
+    def _on_load_finished(self, ok: bool) -> None:
+        """Ejecuta las llamadas acumuladas mientras cargaba la página base."""
+        self._script.set_ready()
+
+
+class TranscriptMessage(QObject):
+    """Un mensaje mostrado en la vista de la conversación."""
+
+    def __init__(
+        self, view: TranscriptView, message_id: int, content: str, is_user: bool
+    ) -> None:
+        """
+        Inicializa el mensaje.
+
+        Args:
+            view: La vista que lo muestra
+            message_id: El identificador del mensaje en la página
+            content: El contenido inicial en Markdown
+            is_user: Si el mensaje es del usuario o del asistente
+        """
+        super().__init__()
+        self.view = view
+        self.id = message_id
+        self.content = content
+        self.is_user = is_user
+
+        # Temporizador para agrupar los fragmentos recibidos durante el streaming
+        # y evitar renderizar el mensaje con cada token (solo se crea si hace falta)
+        self._render_timer: Optional[QTimer] = None
+
+    def append_content(self, text: str) -> None:
+        """
+        Añade texto al final del mensaje (usado durante el streaming).
+
+        Args:
+            text: El fragmento de texto a añadir
+        """
+        self.content += text
+        if self._render_timer is None:
+            self._render_timer = QTimer(self)
+            self._render_timer.setSingleShot(True)
+            self._render_timer.setInterval(STREAM_RENDER_INTERVAL_MS)
+            self._render_timer.timeout.connect(self._render_content)
+        if not self._render_timer.isActive():
+            self._render_timer.start()
+
+    def flush(self) -> None:
+        """Renderiza inmediatamente el contenido definitivo del mensaje."""
+        if self._render_timer is not None:
+            self._render_timer.stop()
+        self._render_content(final=True)
+
+    def _render_content(self, final: bool = False) -> None:
+        """
+        Encarga la conversión del contenido para mostrarlo en la vista.
+
+        Args:
+            final: Si el contenido está completo
+        """
+        self.view.render_message(self.id, self.content, final)
@@ -0,0 +1,271 @@
+"""
+Página base de la vista de la conversación.
+
+Contiene el HTML y el JavaScript que carga `TranscriptView`, y el agrupador de
+las llamadas a ese JavaScript, separados de la vista para poder usarlos sin
+QtWebEngine.
+"""
+
+import json
+from functools import lru_cache
+from typing import Any, Callable, List, Optional
+
+from PyQt6.QtCore import QObject, QTimer
+
+from chat_gpt_local.gui.styles.message import (
+    get_transcript_css,
+    get_transcript_html_template,
+)
+
+# Distancia (en píxeles) por encima y por debajo de la parte visible dentro de la
+# cual los mensajes conservan sus nodos del DOM
+VIRTUALIZATION_MARGIN_PX = 1500
+
+# Altura (en píxeles) que se reserva a un mensaje que aún no se ha construido; se
+# ajusta con la media de las alturas medidas
+ESTIMATED_MESSAGE_HEIGHT_PX = 120
+
+# Mensajes del final de cada inserción que se construyen en el acto (los que
+# quedan a la vista al desplazarse al final); el resto los construye el observador
+EAGER_TAIL_MESSAGES = 20
+
+# Funciones de la página base que insertan y actualizan los mensajes.
+# La lista está virtualizada: los mensajes alejados de la parte visible se
+# sustituyen por un hueco vacío con su altura medida, y se vuelven a construir
+# a partir de los datos guardados en `messages` cuando se acercan a ella. Los
+# mensajes insertados empiezan como huecos con una altura estimada.
+TRANSCRIPT_SCRIPT = """
+const transcript = {
+    root: null,
+    messages: new Map(),
+    observer: null,
+    scrollScheduled: false,
+    estimate: 0,
+    eagerTail: 0,
+
+    init(margin, estimate, eagerTail) {
+        this.root = document.getElementById('transcript');
+        this.estimate = estimate;
+        this.eagerTail = eagerTail;
+        this.observer = new IntersectionObserver(
+            (entries) => this.onIntersection(entries),
+            {rootMargin: margin + 'px 0px'}
+        );
+    },
+
+    nearBottom() {
+        const page = document.scrollingElement;
+        return page.scrollHeight - page.scrollTop - page.clientHeight < 40;
+    },
+
+    // Inserta varios mensajes de una vez: una sola actualización del DOM.
+    // Solo se construyen los últimos; los demás quedan como huecos hasta que el
+    // observador los acerca a la parte visible
+    appendMany(messages) {
+        const fragment = document.createDocumentFragment();
+        const articles = [];
+        for (const message of messages) {
+            const article = document.createElement('article');
+            article.id = 'm' + message.id;
+            article.className =
+                'message placeholder ' + (message.user ? 'user' : 'assistant');
+            article.style.height = this.estimate + 'px';
+            this.messages.set(article.id, message);
+            fragment.appendChild(article);
+            articles.push(article);
+        }
+        for (const article of articles.slice(-this.eagerTail)) {
+            this.materialize(article);
+        }
+        this.root.appendChild(fragment);
+        for (const article of articles) {
+            this.observer.observe(article);
+        }
+    },
+
+    update(id, html) {
+        const message = this.messages.get('m' + id);
+        if (!message) {
+            return;
+        }
+        message.html = html;
+        delete message.blocks;
+        this.refresh(id, (content) => {
+            content.innerHTML = html;
+        });
+    },
+
+    // Sustituye los bloques de un mensaje a partir del índice `start`
+    updateTail(id, start, blocks) {
+        const message = this.messages.get('m' + id);
+        if (!message) {
+            return;
+        }
+        message.blocks = (message.blocks || []).slice(0, start).concat(blocks);
+        this.refresh(id, (content) => {
+            if (start === 0) {
+                content.replaceChildren();
+            }
+            while (content.children.length > start) {
+                content.lastElementChild.remove();
+            }
+            for (const html of blocks) {
+                content.insertAdjacentHTML('beforeend', this.blockHtml(html));
+            }
+        });
+    },
+
+    blockHtml(html) {
+        return '<div class="block">' + html + '</div>';
+    },
+
+    // Aplica un cambio al contenido de un mensaje si tiene sus nodos en el DOM
+    refresh(id, change) {
+        const article = document.getElementById('m' + id);
+        if (article.classList.contains('placeholder')) {
+            return;
+        }
+        const follow = this.nearBottom();
+        change(article.querySelector('.content'));
+        if (follow) {
+            this.scrollToBottom();
+        }
+    },
+
+    // Las peticiones de desplazamiento se agrupan en una por fotograma
+    scrollToBottom() {
+        if (this.scrollScheduled) {
+            return;
+        }
+        this.scrollScheduled = true;
+        requestAnimationFrame(() => {
+            this.scrollScheduled = false;
+            window.scrollTo(0, document.scrollingElement.scrollHeight);
+        });
+    },
+
+    setPaused(paused) {
+        document.body.classList.toggle('paused', paused);
+    },
+
+    onIntersection(entries) {
+        for (const entry of entries) {
+            if (entry.isIntersecting) {
+                this.materialize(entry.target);
+            } else {
+                this.release(entry.target, entry.boundingClientRect.height);
+            }
+        }
+    },
+
+    materialize(article) {
+        if (article.firstChild) {
+            return;
+        }
+        const message = this.messages.get(article.id);
+
+        const header = document.createElement('header');
+        const avatar = document.createElement('span');
+        avatar.className = 'avatar';
+        avatar.textContent = message.user ? 'U' : 'A';
+        const role = document.createElement('span');
+        role.className = 'role';
+        role.textContent = message.user ? 'USUARIO' : 'ASISTENTE';
+        const time = document.createElement('time');
+        time.textContent = message.time;
+        header.append(avatar, role, time);
+
+        const content = document.createElement('div');
+        content.className = 'content';
+        content.innerHTML = message.blocks
+            ? message.blocks.map((html) => this.blockHtml(html)).join('')
+            : message.html;
+
+        article.append(header, content);
+        article.classList.remove('placeholder');
+        article.style.height = '';
+    },
+
+    // La altura viene del IntersectionObserver (medida en su pasada de
+    // maquetación): leer offsetHeight aquí, entre escrituras al DOM, forzaría
+    // una maquetación por cada mensaje liberado
+    release(article, height) {
+        if (!article.firstChild) {
+            return;
+        }
+        // Conservar la altura para que la barra de desplazamiento no cambie
+        article.style.height = height + 'px';
+        this.estimate = Math.round(0.9 * this.estimate + 0.1 * height);
+        article.classList.add('placeholder');
+        article.replaceChildren();
+    },
+};
+"""
+
+
+@lru_cache(maxsize=None)
+def get_transcript_page() -> str:
+    """
+    Devuelve el HTML de la página base de la conversación.
+
+    Los estilos de ambos roles van en la misma hoja (cada mensaje elige los suyos
+    con su clase), así que la página se construye una sola vez por proceso.
+    """
+    return get_transcript_html_template().format(
+        css_styles=get_transcript_css(),
+        script=(
+            f"{TRANSCRIPT_SCRIPT}\ntranscript.init({VIRTUALIZATION_MARGIN_PX}, "
+            f"{ESTIMATED_MESSAGE_HEIGHT_PX}, {EAGER_TAIL_MESSAGES});"
+        ),
+    )
+
+
+class ScriptBatcher(QObject):
+    """
+    Agrupa las llamadas a las funciones de `transcript` de la página.
+
+    Las llamadas se acumulan y se ejecutan juntas en la siguiente vuelta del bucle
+    de eventos (o al quedar lista la página), de modo que varias inserciones
+    seguidas producen un solo paso de JavaScript y de maquetación.
+    """
+
+    def __init__(self, run: Callable[[str], None], parent: Optional[QObject] = None) -> None:
+        """
+        Inicializa el agrupador sin llamadas pendientes.
+
+        Args:
+            run: Ejecuta un script en la página (p. ej. `QWebEnginePage.runJavaScript`)
+            parent: Objeto padre
+        """
+        super().__init__(parent)
+        self.run = run
+        self.ready = False
+        self._pending: List[str] = []
+        self._flush_scheduled = False
+
+    def call(self, function: str, *args: Any) -> None:
+        """
+        Encola una llamada a una función de `transcript`.
+
+        Args:
+            function: El nombre de la función
+            *args: Los argumentos, que se pasan como JSON
+        """
+        self._pending.append(f"transcript.{function}({', '.join(json.dumps(a) for a in args)});")
+        if self.ready and not self._flush_scheduled:
+            self._flush_scheduled = True
+            QTimer.singleShot(0, self.flush)
+
+    def set_ready(self) -> None:
+        """Marca la página como cargada y ejecuta las llamadas acumuladas mientras tanto."""
+        if self.ready:
+            return
+        self.ready = True
+        self.flush()
+
+    def flush(self) -> None:
+        """Ejecuta las llamadas acumuladas."""
+        self._flush_scheduled = False
+        pending, self._pending = self._pending, []
+        if pending:
+            self.run("\n".join(pending))
@@ -2,58 +2,176 @@
 Punto de entrada principal para la aplicación Chat GPT Local.
 """
 
+# El perfilador se importa primero: mide el arranque desde este punto
+from chat_gpt_local.utils.startup import startup_profiler  # isort: skip
+
+import argparse
 import sys
+import traceback
+from typing import TYPE_CHECKING, List, Optional
 
+from PyQt6.QtCore import QCoreApplication, QEvent, QObject, Qt, QTimer
 from PyQt6.QtWidgets import QApplication
 
-from chat_gpt_local.config.settings import settings
-from chat_gpt_local.gui.chat_window import ChatWindow
+from chat_gpt_local.config.settings import ConfigurationError, get_settings
+from chat_gpt_local.gui.fonts import register_fonts
+from chat_gpt_local.gui.resources import load_resources
+from chat_gpt_local.gui.styles.theme import get_app_stylesheet
 from chat_gpt_local.utils.helpers import handle_errors
 
-# Importar recursos si existen
-try:
-    from chat_gpt_local.gui.resources import (
-        load_resources,
-        resources_rc,  # Importa los recursos compilados
+# La ventana (y con ella QtWebEngine y el cliente de la API) se importa en `main`
+if TYPE_CHECKING:
+    from chat_gpt_local.gui.chat_window import ChatWindow
+
+# Espera máxima al primer pintado antes de completar el arranque de todos modos
+# (p. ej. si la ventana se abre minimizada)
+FIRST_PAINT_TIMEOUT_MS = 500
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Crea el analizador de los argumentos de la línea de órdenes."""
+    parser = argparse.ArgumentParser(
+        prog="chat-gpt-local",
+        description="Cliente de escritorio para la API de OpenAI.",
+    )
+    parser.add_argument(
+        "--profile-startup", action="store_true",
+        help="muestra en la salida de errores la duración de cada fase del arranque",
     )
-    HAS_RESOURCES = True
-except ImportError:
-    HAS_RESOURCES = False
-    print("Advertencia: No se encontraron recursos compilados.")
-    print("Las fuentes y otros recursos podrían no cargarse correctamente.")
-    print("Ejecuta 'scripts/compile_resources.py' para compilar los recursos.")
+    return parser
 
 
 @handle_errors
-def main() -> int:
+def main(argv: Optional[List[str]] = None) -> int:
     """
     Función principal que inicia la aplicación.
     
+    La ventana se muestra en cuanto su armazón está construido; el cliente de la
+    API y la vista de la conversación se crean después de que se pinte por
+    primera vez.
+    
+    Args:
+        argv: Los argumentos (por defecto, los de la línea de órdenes); los que no
+            reconoce la aplicación se pasan a Qt
+    
     Returns:
         Código de salida de la aplicación
     """
+    args, qt_args = build_parser().parse_known_args(argv)
+    if args.profile_startup:
+        startup_profiler.enabled = True
+        startup_profiler.mark("módulos importados")
+    
     # Verificar que la clave API esté configurada
+    with startup_profiler.phase("configuración"):
+        try:
+            settings = get_settings()
+        except ConfigurationError as e:
+            print(f"Error de configuración: {e}")
+            return 1
     if not settings.openai_api_key:
         print("Error: No se ha configurado la clave API de OpenAI.")
         print("Configura la variable de entorno OPENAI_API_KEY o crea un archivo .env")
         return 1
     
-    # Crear la aplicación Qt
-    app = QApplication(sys.argv)
-    app.setApplicationName("Chat GPT Local")
-    app.setStyle("Fusion")  # Usar estilo Fusion para una apariencia moderna
+    # QtWebEngine se importa después de crear la aplicación, lo que exige
+    # activar antes los contextos OpenGL compartidos
+    QCoreApplication.setAttribute(Qt.ApplicationAttribute.AA_ShareOpenGLContexts)
     
-    # Cargar recursos (fuentes, etc.)
-    if HAS_RESOURCES:
-        load_resources()
+    # Crear la aplicación Qt
+    with startup_profiler.phase("aplicación Qt"):
+        app = QApplication([sys.argv[0], *qt_args])
+        app.setApplicationName("Chat GPT Local")
+        app.setStyle("Fusion")  # Usar estilo Fusion para una apariencia moderna
+        app.setStyleSheet(get_app_stylesheet())  # Tema cyberpunk, analizado una sola vez
+        
+        # Registrar el paquete de recursos (mapeado en memoria) y las fuentes
+        if not load_resources():
+            print("Advertencia: No se encontraron recursos compilados.")
+            print("Las fuentes y otros recursos podrían no cargarse correctamente.")
+            print("Ejecuta 'scripts/compile_resources.py' para compilar los recursos.")
+        register_fonts()
     
-    # Crear y mostrar la ventana principal
-    window = ChatWindow()
-    window.show()
+    # Crear y mostrar el armazón de la ventana principal
+    with startup_profiler.phase("ventana"):
+        from chat_gpt_local.gui.chat_window import ChatWindow
+        
+        window = ChatWindow(defer_startup=True)
+        window.show()
+    _StartupTrigger(window)
     
     # Ejecutar el bucle principal de la aplicación
     return app.exec()
 
 
+class _StartupTrigger(QObject):
+    """Completa el arranque de la ventana en cuanto se ha pintado por primera vez."""
+    
+    def __init__(self, window: "ChatWindow") -> None:
+        """
+        Espera al primer pintado de la ventana (o a FIRST_PAINT_TIMEOUT_MS).
+        
+        Args:
+            window: La ventana principal, ya mostrada
+        """
+        super().__init__(window)
+        self._window = window
+        self._done = False
+        handle = window.windowHandle()
+        if handle is not None:
+            handle.installEventFilter(self)
+        QTimer.singleShot(FIRST_PAINT_TIMEOUT_MS, self._finish)
+    
+    def eventFilter(self, watched: Optional[QObject], event: Optional[QEvent]) -> bool:
+        """Programa el arranque para después del primer pintado de la ventana."""
+        if event is not None and event.type() == QEvent.Type.Paint and not self._done:
+            # El evento aún no se ha procesado: el arranque va en la vuelta siguiente
+            QTimer.singleShot(0, self._finish)
+        return False
+    
+    def _finish(self) -> None:
+        """Completa el arranque una sola vez."""
+        if self._done:
+            return
+        self._done = True
+        _finish_startup(self._window)
+
+
+def _finish_startup(window: "ChatWindow") -> None:
+    """
+    Completa el arranque de la ventana una vez mostrada.
+    
+    Si falla (p. ej. la configuración de los endpoints no es válida), muestra el
+    error y termina la aplicación con código 1, como si hubiera fallado `main`.
+    
+    Args:
+        window: La ventana principal
+    """
+    startup_profiler.mark("ventana mostrada")
+    try:
+        window.finish_startup()
+    except ConfigurationError as e:
+        print(f"Error de configuración: {e}")
+        QApplication.exit(1)
+        return
+    except Exception as e:
+        print(f"Error inesperado: {str(e)}")
+        traceback.print_exc()
+        QApplication.exit(1)
+        return
+    if startup_profiler.enabled and window.transcript is not None:
+        # La conversación es visible cuando la vista web termina de cargar
+        window.transcript.loadFinished.connect(lambda ok: _report_startup())
+
+
+def _report_startup() -> None:
+    """Imprime el desglose del arranque una sola vez."""
+    if not startup_profiler.enabled:
+        return
+    startup_profiler.mark("conversación cargada")
+    startup_profiler.print_report()
+    startup_profiler.enabled = False
+
+
 if __name__ == "__main__":
-    sys.exit(main())
\ No newline at end of file
+    sys.exit(main())
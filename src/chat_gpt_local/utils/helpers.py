@@ -3,9 +3,10 @@ Módulo de utilidades para funciones compartidas.
 """
 
 import functools
+import math
 import threading
 import traceback
-from typing import Any, Callable, TypeVar
+from typing import Any, Callable, Sequence, TypeVar
 
 T = TypeVar('T')
 
@@ -48,4 +49,22 @@ def handle_errors(func: Callable[..., T]) -> Callable[..., T]:
             traceback.print_exc()
             raise
     
-    return wrapper
\ No newline at end of file
+    return wrapper
+
+
+def percentile(values: Sequence[float], fraction: float) -> float:
+    """
+    Calcula un percentil por el método del rango más cercano.
+    
+    Args:
+        values: Los valores (no necesitan estar ordenados)
+        fraction: El percentil como fracción entre 0 y 1 (p. ej. 0.95)
+        
+    Returns:
+        El valor del percentil, o 0.0 si no hay valores
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(math.ceil(fraction * len(ordered)), 1)
+    return ordered[min(rank, len(ordered)) - 1]
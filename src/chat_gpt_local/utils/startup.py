@@ -0,0 +1,86 @@
+"""
+Medición del arranque de la aplicación por fases.
+
+`main()` activa el perfilador con `--profile-startup`; cada parte del arranque se
+envuelve en `startup_profiler.phase(...)` y, cuando la ventana termina de
+inicializarse, se imprime el desglose de tiempos. Desactivado no mide nada.
+"""
+
+import sys
+import time
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, TextIO, Tuple
+
+
+class StartupProfiler:
+    """Registra la duración de las fases del arranque."""
+
+    def __init__(self, enabled: bool = False) -> None:
+        """
+        Inicializa el perfilador.
+
+        Args:
+            enabled: Si debe medir las fases
+        """
+        self.enabled = enabled
+        # Instante de referencia: la importación de este módulo, al inicio de main
+        self.started = time.perf_counter()
+        self.phases: List[Tuple[str, float, float]] = []
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """
+        Mide la duración de un bloque del arranque.
+
+        Args:
+            name: El nombre de la fase
+        """
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self.phases.append((name, start - self.started, end - start))
+
+    def mark(self, name: str) -> None:
+        """
+        Registra un hito del arranque (una fase de duración cero).
+
+        Args:
+            name: El nombre del hito
+        """
+        if self.enabled:
+            self.phases.append((name, time.perf_counter() - self.started, 0.0))
+
+    def report(self) -> str:
+        """
+        Formatea el desglose de tiempos.
+
+        Returns:
+            Una línea por fase, por orden de inicio, con su inicio y su duración
+            en milisegundos
+        """
+        lines = ["Arranque (ms):", f"{'inicio':>10}  {'duración':>10}  fase"]
+        # Las fases anidadas terminan (y se registran) antes que la que las contiene
+        for name, offset, duration in sorted(self.phases, key=lambda phase: phase[1]):
+            lines.append(f"{offset * 1000:>10.1f}  {duration * 1000:>10.1f}  {name}")
+        total = max((offset + duration for _, offset, duration in self.phases), default=0.0)
+        lines.append(f"{total * 1000:>10.1f}  {'':>10}  total")
+        return "\n".join(lines)
+
+    def print_report(self, stream: Optional[TextIO] = None) -> None:
+        """
+        Imprime el desglose si el perfilador está activo.
+
+        Args:
+            stream: Dónde escribirlo (por defecto, la salida de errores)
+        """
+        if self.enabled:
+            print(self.report(), file=stream or sys.stderr)
+
+
+# Perfilador del arranque de la aplicación gráfica
+startup_profiler = StartupProfiler()
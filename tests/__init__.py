@@ -1,3 +1,18 @@
 """
 Paquete de pruebas para chat_gpt_local.
-"""
\ No newline at end of file
+"""
+
+import os
+
+
+def qt_application():
+    """
+    Devuelve la aplicación de Qt de las pruebas, creándola si hace falta.
+
+    Es una `QApplication` sin pantalla (plataforma "offscreen") para que las
+    pruebas de widgets y de las que solo usan QtCore compartan el mismo proceso.
+    """
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6.QtWidgets import QApplication
+    
+    return QApplication.instance() or QApplication([])
@@ -0,0 +1,76 @@
+"""
+Pruebas para el reloj de animación compartido.
+"""
+
+import unittest
+
+from PyQt6.QtCore import QEventLoop, QTimer
+from PyQt6.QtWidgets import QWidget
+
+from chat_gpt_local.gui.animation import AnimationClock
+from tests import qt_application
+
+
+class TestAnimationClock(unittest.TestCase):
+    """Pruebas para AnimationClock."""
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.app = qt_application()
+    
+    def test_runs_only_with_subscribers(self):
+        """Prueba que el reloj solo avanza mientras hay suscriptores."""
+        clock = AnimationClock(10)
+        callback = lambda: None
+        
+        self.assertFalse(clock.is_running)
+        clock.subscribe(callback)
+        self.assertTrue(clock.is_running)
+        clock.unsubscribe(callback)
+        self.assertFalse(clock.is_running)
+    
+    def test_single_timer_drives_all_subscribers(self):
+        """Prueba que todos los suscriptores avanzan con el mismo fotograma."""
+        clock = AnimationClock(5)
+        ticks = {"a": 0, "b": 0}
+        clock.subscribe(lambda: ticks.__setitem__("a", ticks["a"] + 1))
+        clock.subscribe(lambda: ticks.__setitem__("b", ticks["b"] + 1))
+        
+        loop = QEventLoop()
+        QTimer.singleShot(60, loop.quit)
+        loop.exec()
+        clock.set_paused(True)
+        
+        self.assertGreater(ticks["a"], 0)
+        self.assertEqual(ticks["a"], ticks["b"])
+    
+    def test_pause_stops_the_timer(self):
+        """Prueba que la pausa detiene el reloj y se notifica una sola vez."""
+        clock = AnimationClock(10)
+        changes = []
+        clock.paused_changed.connect(changes.append)
+        clock.subscribe(lambda: None)
+        
+        clock.set_paused(True)
+        clock.set_paused(True)
+        self.assertFalse(clock.is_running)
+        clock.set_paused(False)
+        
+        self.assertTrue(clock.is_running)
+        self.assertEqual(changes, [True, False])
+    
+    def test_hidden_window_pauses(self):
+        """Prueba que vigilar una ventana oculta pausa las animaciones."""
+        window = QWidget()
+        self.addCleanup(window.deleteLater)
+        clock = AnimationClock(10)
+        clock.subscribe(lambda: None)
+        
+        clock.watch(window)
+        
+        self.assertTrue(clock.paused)
+        self.assertFalse(clock.is_running)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,161 @@
+"""
+Pruebas para el backend con varios servidores.
+"""
+
+import asyncio
+import unittest
+
+from chat_gpt_local.api.backends import (
+    MIN_HEDGE_SAMPLES,
+    LatencyTracker,
+    MultiEndpointBackend,
+)
+from chat_gpt_local.api.errors import OpenAIClientError
+
+
+class FakeClient:
+    """Cliente simulado con un retardo, un error y una respuesta en caché opcionales."""
+    
+    def __init__(self, name, delay=0.0, error=None, cached=None):
+        self.name = name
+        self.delay = delay
+        self.error = error
+        self.response_cache = cached
+        self.calls = 0
+        self.closed = 0
+        self.headers_listener = None
+    
+    def cached(self, messages):
+        return self.response_cache
+    
+    async def acomplete(self, messages, use_cache=True):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return self.name
+    
+    async def astream(self, messages, use_cache=True):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+            if self.error:
+                raise self.error
+            for chunk in (self.name, "-fin"):
+                yield chunk
+        finally:
+            self.closed += 1
+
+
+class TestMultiEndpointBackend(unittest.IsolatedAsyncioTestCase):
+    """Pruebas para MultiEndpointBackend."""
+    
+    async def test_uses_primary(self):
+        """Prueba que se usa el primer servidor si responde."""
+        primary, secondary = FakeClient("a"), FakeClient("b")
+        backend = MultiEndpointBackend([primary, secondary], hedge=False)
+        
+        self.assertEqual(await backend.acomplete([]), "a")
+        self.assertEqual(secondary.calls, 0)
+    
+    async def test_failover(self):
+        """Prueba que un error pasa la petición al siguiente servidor."""
+        primary = FakeClient("a", error=OpenAIClientError("caído", retryable=True))
+        secondary = FakeClient("b")
+        backend = MultiEndpointBackend([primary, secondary], hedge=False)
+        
+        self.assertEqual(await backend.acomplete([]), "b")
+        self.assertEqual(backend.failovers, 1)
+        
+        # El servidor que falló queda al final de la lista
+        self.assertEqual(await backend.acomplete([]), "b")
+        self.assertEqual(primary.calls, 1)
+    
+    async def test_all_fail(self):
+        """Prueba que se propaga el último error si fallan todos los servidores."""
+        backend = MultiEndpointBackend([
+            FakeClient("a", error=OpenAIClientError("a")),
+            FakeClient("b", error=OpenAIClientError("b")),
+        ], hedge=False)
+        
+        with self.assertRaisesRegex(OpenAIClientError, "b"):
+            await backend.acomplete([])
+    
+    async def test_hedging(self):
+        """Prueba que una respuesta lenta se cubre con el siguiente servidor."""
+        primary, secondary = FakeClient("a", delay=1.0), FakeClient("b")
+        backend = MultiEndpointBackend([primary, secondary], hedge=True, hedge_delay=0.01)
+        
+        self.assertEqual(await backend.acomplete([]), "b")
+        self.assertEqual(backend.hedged_requests, 1)
+    
+    async def test_hedge_delay_uses_p95(self):
+        """Prueba que la espera de cobertura pasa a ser el p95 medido."""
+        backend = MultiEndpointBackend([FakeClient("a"), FakeClient("b")], hedge_delay=5.0)
+        endpoint = backend.endpoints[0]
+        self.assertEqual(backend._delay_for(endpoint), 5.0)
+        
+        for _ in range(MIN_HEDGE_SAMPLES):
+            endpoint.latency.record(0.2)
+        
+        self.assertAlmostEqual(backend._delay_for(endpoint), 0.2)
+    
+    async def test_cached_response_is_not_timed(self):
+        """Prueba que una respuesta de la caché no cuenta como latencia del servidor."""
+        primary = FakeClient("a", cached="guardada")
+        backend = MultiEndpointBackend([primary, FakeClient("b")], hedge=False)
+        
+        self.assertEqual(await backend.acomplete([]), "guardada")
+        self.assertEqual([chunk async for chunk in backend.astream([])], ["guardada"])
+        self.assertEqual(primary.calls, 0)
+        self.assertEqual(len(backend.endpoints[0].latency), 0)
+        
+        self.assertEqual(await backend.acomplete([], use_cache=False), "a")
+        self.assertEqual(len(backend.endpoints[0].latency), 1)
+    
+    async def test_stream_hedging_closes_loser(self):
+        """Prueba que el stream descartado se cierra al ganar la cobertura."""
+        primary, secondary = FakeClient("a", delay=1.0), FakeClient("b")
+        backend = MultiEndpointBackend([primary, secondary], hedge=True, hedge_delay=0.01)
+        
+        chunks = [chunk async for chunk in backend.astream([])]
+        
+        self.assertEqual(chunks, ["b", "-fin"])
+        self.assertEqual(primary.closed, 1)
+        self.assertEqual(secondary.closed, 1)
+    
+    async def test_stream_failover(self):
+        """Prueba que un stream que falla antes del primer fragmento cambia de servidor."""
+        primary = FakeClient("a", error=OpenAIClientError("caído"))
+        backend = MultiEndpointBackend([primary, FakeClient("b")], hedge=False)
+        
+        chunks = [chunk async for chunk in backend.astream([])]
+        
+        self.assertEqual(chunks, ["b", "-fin"])
+    
+    async def test_headers_listener_reaches_every_client(self):
+        """Prueba que el oyente de cabeceras se registra en todos los clientes."""
+        clients = [FakeClient("a"), FakeClient("b")]
+        backend = MultiEndpointBackend(clients)
+        listener = lambda headers: None
+        
+        backend.headers_listener = listener
+        
+        self.assertTrue(all(c.headers_listener is listener for c in clients))
+
+
+class TestLatencyTracker(unittest.TestCase):
+    """Pruebas para LatencyTracker."""
+    
+    def test_keeps_recent_samples(self):
+        """Prueba que solo se conservan las muestras recientes."""
+        tracker = LatencyTracker(max_samples=3)
+        for value in (10.0, 1.0, 2.0, 3.0):
+            tracker.record(value)
+        
+        self.assertEqual(len(tracker), 3)
+        self.assertEqual(tracker.percentile(1.0), 3.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
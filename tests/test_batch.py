@@ -0,0 +1,160 @@
+"""
+Pruebas para el comando de lotes sin interfaz gráfica.
+"""
+
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from chat_gpt_local.batch import (
+    BatchRequest,
+    load_completed_ids,
+    open_for_resume,
+    parse_requests,
+    run_batch,
+)
+from chat_gpt_local.utils.helpers import percentile
+
+
+def _prompt(text):
+    return [{"role": "user", "content": text}]
+
+
+class TestParseRequests(unittest.TestCase):
+    """Pruebas para la lectura de la entrada JSONL."""
+    
+    def test_prompts_and_messages(self):
+        """Prueba que se aceptan prompts y listas de mensajes."""
+        lines = [
+            '{"id": "a", "prompt": "hola"}',
+            '',
+            '{"messages": [{"role": "user", "content": "adiós"}]}',
+        ]
+        
+        requests = list(parse_requests(lines, _prompt))
+        
+        self.assertEqual(requests[0], BatchRequest("a", _prompt("hola")))
+        self.assertEqual(requests[1].id, "3")
+        self.assertEqual(requests[1].messages, _prompt("adiós"))
+    
+    def test_invalid_line(self):
+        """Prueba que una línea sin prompt produce un error claro."""
+        with self.assertRaises(ValueError):
+            list(parse_requests(['{"id": 1}'], _prompt))
+    
+    def test_load_completed_ids(self):
+        """Prueba que al reanudar solo se omiten las peticiones con respuesta."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "salida.jsonl")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write('{"id": "1", "response": "ok"}\n')
+                f.write('{"id": "2", "error": "fallo"}\n')
+                f.write('{"id": "3", "respo')  # Línea truncada
+            
+            self.assertEqual(load_completed_ids(path), {"1"})
+            self.assertEqual(load_completed_ids(path + ".no"), set())
+    
+    def test_resume_drops_truncated_line(self):
+        """Prueba que al reanudar se elimina la línea truncada antes de añadir."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "salida.jsonl")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write('{"id": "1", "response": "ok"}\n')
+                f.write('{"id": "3", "respo')  # Línea truncada
+            
+            with open_for_resume(path) as f:
+                f.write('{"id": "3", "response": "ok"}\n')
+            
+            self.assertEqual(load_completed_ids(path), {"1", "3"})
+            with open(path, encoding="utf-8") as f:
+                self.assertEqual(len(f.readlines()), 2)
+            with open_for_resume(os.path.join(directory, "nuevo.jsonl")) as f:
+                self.assertEqual(f.mode, "a")
+
+
+class TestRunBatch(unittest.IsolatedAsyncioTestCase):
+    """Pruebas para run_batch."""
+    
+    def _requests(self, count):
+        return [BatchRequest(str(i), _prompt(str(i))) for i in range(count)]
+    
+    async def test_respects_concurrency(self):
+        """Prueba que nunca hay más peticiones en curso que el límite."""
+        active = 0
+        peak = 0
+        results = []
+        
+        async def complete(messages):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.005)
+            active -= 1
+            return messages[0]["content"]
+        
+        summary = await run_batch(self._requests(10), complete, results.append, concurrency=3)
+        
+        self.assertEqual(peak, 3)
+        self.assertEqual(summary.succeeded, 10)
+        self.assertEqual(len(summary.latencies), 10)
+        self.assertEqual(len(results), 10)
+    
+    async def test_ordered_output(self):
+        """Prueba que con ordered=True los resultados siguen el orden de entrada."""
+        results = []
+        
+        async def complete(messages):
+            # Las primeras peticiones terminan las últimas
+            await asyncio.sleep(0.002 * (5 - int(messages[0]["content"])))
+            return "ok"
+        
+        await run_batch(self._requests(5), complete, results.append, concurrency=5, ordered=True)
+        
+        self.assertEqual([r["id"] for r in results], ["0", "1", "2", "3", "4"])
+    
+    async def test_errors_are_recorded(self):
+        """Prueba que un error se registra en el resultado sin detener el lote."""
+        results = []
+        
+        async def complete(messages):
+            if messages[0]["content"] == "1":
+                raise RuntimeError("fallo")
+            return "ok"
+        
+        summary = await run_batch(self._requests(3), complete, results.append, concurrency=2)
+        
+        self.assertEqual(summary.failed, 1)
+        self.assertEqual(summary.succeeded, 2)
+        errors = [r for r in results if "error" in r]
+        self.assertEqual(errors[0]["id"], "1")
+
+
+class TestBatchModule(unittest.TestCase):
+    """Pruebas del módulo completo."""
+    
+    def test_percentile(self):
+        """Prueba el cálculo de percentiles por rango más cercano."""
+        values = [float(v) for v in range(1, 101)]
+        self.assertEqual(percentile(values, 0.50), 50.0)
+        self.assertEqual(percentile(values, 0.95), 95.0)
+        self.assertEqual(percentile([], 0.95), 0.0)
+    
+    def test_does_not_import_qt(self):
+        """Prueba que el comando de lotes no importa PyQt6."""
+        code = (
+            "import sys, chat_gpt_local.batch; "
+            "print(any(m.startswith('PyQt6') for m in sys.modules))"
+        )
+        output = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True, text=True, check=True, env=os.environ.copy(),
+        )
+        self.assertEqual(json.loads(output.stdout.strip().lower()), False)
+
+
+if __name__ == "__main__":
+    unittest.main()
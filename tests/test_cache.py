@@ -0,0 +1,127 @@
+"""
+Pruebas para la caché persistente de respuestas.
+"""
+
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from chat_gpt_local.api import cache as cache_module
+from chat_gpt_local.api.cache import ResponseCache, request_fingerprint
+from chat_gpt_local.api.openai_client import OpenAIClient
+
+
+class TestResponseCache(unittest.TestCase):
+    """Pruebas para ResponseCache."""
+    
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp_dir.name) / "responses.sqlite3"
+    
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+    
+    def test_fingerprint_depends_on_parameters(self):
+        """Prueba que la huella cambia con cualquier parámetro de la petición."""
+        messages = [{"role": "user", "content": "Hola"}]
+        base = request_fingerprint("gpt-4", 0.7, None, messages)
+        
+        self.assertEqual(base, request_fingerprint("gpt-4", 0.7, None, list(messages)))
+        self.assertNotEqual(base, request_fingerprint("gpt-4o", 0.7, None, messages))
+        self.assertNotEqual(base, request_fingerprint("gpt-4", 0.2, None, messages))
+        self.assertNotEqual(base, request_fingerprint("gpt-4", 0.7, 100, messages))
+        self.assertNotEqual(
+            base, request_fingerprint("gpt-4", 0.7, None, [{"role": "user", "content": "Hola!"}])
+        )
+    
+    def test_get_set_and_counters(self):
+        """Prueba que se guardan respuestas y se cuentan aciertos y fallos."""
+        cache = ResponseCache(self.path)
+        
+        self.assertIsNone(cache.get("clave"))
+        cache.set("clave", "respuesta")
+        self.assertEqual(cache.get("clave"), "respuesta")
+        self.assertEqual(cache.stats, {"hits": 1, "misses": 1})
+        cache.close()
+        
+        # La caché persiste entre instancias
+        reopened = ResponseCache(self.path)
+        self.assertEqual(reopened.get("clave"), "respuesta")
+        reopened.close()
+    
+    def test_expired_entries_are_misses(self):
+        """Prueba que las respuestas caducadas no se devuelven."""
+        cache = ResponseCache(self.path, max_age=10)
+        cache.set("clave", "respuesta")
+        
+        with patch.object(cache_module.time, "time", return_value=time.time() + 60):
+            self.assertIsNone(cache.get("clave"))
+        cache.close()
+    
+    def test_lru_eviction_by_count(self):
+        """Prueba que se expulsan las entradas menos usadas al superar el límite."""
+        cache = ResponseCache(self.path, max_entries=2)
+        now = time.time()
+        with patch.object(cache_module.time, "time", return_value=now):
+            cache.set("a", "1")
+        with patch.object(cache_module.time, "time", return_value=now + 1):
+            cache.set("b", "2")
+        # Acceder a "a" la convierte en la más reciente
+        with patch.object(cache_module.time, "time", return_value=now + 120):
+            cache.get("a")
+            cache.set("c", "3")
+        
+        self.assertEqual(cache.get("a"), "1")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), "3")
+        cache.close()
+    
+    def test_eviction_by_size(self):
+        """Prueba que se respeta el tamaño máximo total."""
+        cache = ResponseCache(self.path, max_bytes=10)
+        cache.set("a", "x" * 6)
+        cache.set("b", "y" * 6)
+        
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.get("b"), "y" * 6)
+        cache.close()
+
+
+class TestOpenAIClientCache(unittest.TestCase):
+    """Pruebas de la integración de la caché en el cliente."""
+    
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+    
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+    
+    @patch('openai.OpenAI')
+    def test_repeated_request_is_served_from_cache(self, mock_openai_class):
+        """Prueba que una petición repetida no vuelve a llamar a la API."""
+        mock_client = MagicMock()
+        mock_openai_class.return_value = mock_client
+        mock_response = MagicMock()
+        mock_response.choices = [MagicMock()]
+        mock_response.choices[0].message.content = "Respuesta simulada"
+        mock_client.chat.completions.create.return_value = mock_response
+        
+        client = OpenAIClient()
+        client.cache = ResponseCache(Path(self.tmp_dir.name) / "responses.sqlite3")
+        
+        self.assertEqual(client.send_message("Hola"), "Respuesta simulada")
+        self.assertEqual(client.send_message("Hola"), "Respuesta simulada")
+        self.assertEqual(list(client.stream_message("Hola")), ["Respuesta simulada"])
+        mock_client.chat.completions.create.assert_called_once()
+        
+        # Con use_cache=False la petición siempre llega a la API
+        client.complete(client.build_messages("Hola"), use_cache=False)
+        self.assertEqual(mock_client.chat.completions.create.call_count, 2)
+        self.assertEqual(client.cache.stats, {"hits": 2, "misses": 1})
+        client.cache.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
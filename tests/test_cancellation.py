@@ -0,0 +1,124 @@
+"""
+Pruebas para la cancelación de peticiones en curso.
+"""
+
+import asyncio
+import threading
+import unittest
+
+from chat_gpt_local.api.cancellation import CancellationToken, cancel_scope
+from chat_gpt_local.api.errors import DeadlineExceededError, RequestCancelledError
+
+
+class TestCancellationToken(unittest.TestCase):
+    """Pruebas para CancellationToken."""
+    
+    def test_cancel_runs_callbacks_once(self):
+        """Prueba que cancelar llama a las funciones registradas una sola vez."""
+        token = CancellationToken()
+        calls = []
+        token.add_callback(lambda: calls.append(1))
+        
+        token.cancel()
+        token.cancel()
+        
+        self.assertTrue(token.cancelled)
+        self.assertFalse(token.timed_out)
+        self.assertEqual(calls, [1])
+    
+    def test_callback_after_cancel_runs_immediately(self):
+        """Prueba que una función registrada tras cancelar se llama al momento."""
+        token = CancellationToken()
+        token.cancel()
+        calls = []
+        
+        token.add_callback(lambda: calls.append(1))
+        
+        self.assertEqual(calls, [1])
+    
+    def test_unregister(self):
+        """Prueba que se puede anular el registro de una función."""
+        token = CancellationToken()
+        calls = []
+        unregister = token.add_callback(lambda: calls.append(1))
+        
+        unregister()
+        token.cancel()
+        
+        self.assertEqual(calls, [])
+    
+    def test_expired_deadline(self):
+        """Prueba que un plazo agotado cuenta como cancelación por tiempo."""
+        token = CancellationToken(timeout=0.001)
+        threading.Event().wait(0.01)
+        
+        with self.assertRaises(DeadlineExceededError):
+            token.raise_if_cancelled()
+        self.assertTrue(token.timed_out)
+
+
+class TestCancelScope(unittest.IsolatedAsyncioTestCase):
+    """Pruebas para CancellationToken.scope."""
+    
+    async def test_cancel_from_another_thread(self):
+        """Prueba que cancelar desde otro hilo interrumpe la espera en curso."""
+        token = CancellationToken()
+        threading.Timer(0.01, token.cancel).start()
+        
+        with self.assertRaises(RequestCancelledError):
+            async with token.scope():
+                await asyncio.sleep(5)
+        
+        # La tarea sigue siendo utilizable tras la cancelación
+        await asyncio.sleep(0)
+    
+    async def test_deadline(self):
+        """Prueba que el plazo del token cancela el bloque con DeadlineExceededError."""
+        token = CancellationToken(timeout=0.01)
+        
+        with self.assertRaises(DeadlineExceededError):
+            async with token.scope():
+                await asyncio.sleep(5)
+    
+    async def test_nested_scopes(self):
+        """Prueba que los bloques anidados sobre el mismo token no interfieren."""
+        token = CancellationToken()
+        asyncio.get_running_loop().call_later(0.01, token.cancel)
+        
+        with self.assertRaises(RequestCancelledError):
+            async with token.scope():
+                async with token.scope():
+                    await asyncio.sleep(5)
+    
+    async def test_completed_scope_is_not_cancelled_later(self):
+        """Prueba que cancelar después del bloque no afecta a la tarea."""
+        token = CancellationToken()
+        async with token.scope():
+            await asyncio.sleep(0)
+        
+        token.cancel()
+        await asyncio.sleep(0.01)
+    
+    async def test_without_token(self):
+        """Prueba que cancel_scope sin token no hace nada."""
+        async with cancel_scope(None):
+            await asyncio.sleep(0)
+    
+    async def test_other_cancellations_propagate(self):
+        """Prueba que las cancelaciones ajenas al token no se convierten."""
+        token = CancellationToken()
+        
+        async def body():
+            async with token.scope():
+                await asyncio.sleep(5)
+        
+        task = asyncio.ensure_future(body())
+        await asyncio.sleep(0)
+        task.cancel()
+        
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+
+
+if __name__ == "__main__":
+    unittest.main()
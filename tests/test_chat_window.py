@@ -0,0 +1,64 @@
+"""
+Pruebas para la ventana principal antes y después de crear la vista de la conversación.
+"""
+
+import unittest
+from datetime import datetime
+from unittest.mock import MagicMock
+
+from chat_gpt_local.gui.chat_window import ChatWindow
+from tests import qt_application
+
+
+class TestAddMessages(unittest.TestCase):
+    """Pruebas para ChatWindow.add_messages."""
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.app = qt_application()
+    
+    def setUp(self):
+        # Solo el armazón: sin cliente de la API ni vista web
+        self.window = ChatWindow(defer_startup=True)
+        self.addCleanup(self.window.deleteLater)
+    
+    def test_messages_before_startup_are_queued(self):
+        """Prueba que los mensajes añadidos antes de crear la vista se guardan para después."""
+        self.window.add_messages([
+            {"role": "user", "content": "Hola"},
+            {"role": "assistant", "content": "¿Qué tal?", "in_context": False},
+        ])
+        
+        self.assertIsNone(self.window.transcript)
+        self.assertEqual([m["content"] for m in self.window.messages], ["Hola", "¿Qué tal?"])
+        self.assertEqual(self.window._pending_messages, self.window.messages)
+        self.assertFalse(self.window.messages[1]["in_context"])
+    
+    def test_messages_are_added_in_one_call(self):
+        """Prueba que con la vista creada se insertan todos los mensajes de una vez."""
+        transcript = self.window.transcript = MagicMock()
+        timestamp = datetime(2024, 1, 1, 12, 30)
+        
+        self.window.add_messages([
+            {"role": "user", "content": "Uno", "timestamp": timestamp},
+            {"role": "assistant", "content": "Dos"},
+        ])
+        
+        transcript.add_messages.assert_called_once()
+        added = transcript.add_messages.call_args.args[0]
+        self.assertEqual([m["content"] for m in added], ["Uno", "Dos"])
+        self.assertEqual(added[0]["timestamp"], timestamp)
+        transcript.scroll_to_bottom.assert_called_once()
+        self.assertEqual(self.window._pending_messages, [])
+    
+    def test_empty_list_does_nothing(self):
+        """Prueba que una lista vacía no toca la vista."""
+        transcript = self.window.transcript = MagicMock()
+        
+        self.window.add_messages([])
+        
+        transcript.add_messages.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
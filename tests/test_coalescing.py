@@ -0,0 +1,348 @@
+"""
+Pruebas para la agrupación de peticiones idénticas en curso.
+"""
+
+import asyncio
+import threading
+import time
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from chat_gpt_local.api.cancellation import CancellationToken
+from chat_gpt_local.api.coalescing import RequestCoalescer
+from chat_gpt_local.api.errors import DeadlineExceededError, RequestCancelledError
+from chat_gpt_local.api.openai_client import OpenAIClient
+
+
+class TestRequestCoalescer(unittest.IsolatedAsyncioTestCase):
+    """Pruebas para RequestCoalescer."""
+    
+    async def test_identical_calls_share_one_request(self):
+        """Prueba que las llamadas idénticas simultáneas hacen una sola petición."""
+        coalescer = RequestCoalescer()
+        calls = []
+        
+        async def operation():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "respuesta"
+        
+        results = await asyncio.gather(
+            *(coalescer.run("clave", operation) for _ in range(5))
+        )
+        
+        self.assertEqual(results, ["respuesta"] * 5)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(coalescer.stats, {"upstream": 1, "coalesced": 4})
+    
+    async def test_different_keys_are_not_coalesced(self):
+        """Prueba que las peticiones distintas no se agrupan."""
+        coalescer = RequestCoalescer()
+        
+        async def operation():
+            await asyncio.sleep(0)
+            return "respuesta"
+        
+        await asyncio.gather(coalescer.run("a", operation), coalescer.run("b", operation))
+        
+        self.assertEqual(coalescer.stats, {"upstream": 2, "coalesced": 0})
+    
+    async def test_errors_reach_every_caller(self):
+        """Prueba que un error se entrega a todos los llamantes agrupados."""
+        coalescer = RequestCoalescer()
+        
+        async def operation():
+            await asyncio.sleep(0.01)
+            raise ValueError("fallo")
+        
+        results = await asyncio.gather(
+            coalescer.run("clave", operation),
+            coalescer.run("clave", operation),
+            return_exceptions=True,
+        )
+        
+        self.assertTrue(all(isinstance(r, ValueError) for r in results))
+    
+    async def test_request_survives_while_a_caller_waits(self):
+        """Prueba que cancelar un llamante no cancela la petición compartida."""
+        coalescer = RequestCoalescer()
+        
+        async def operation():
+            await asyncio.sleep(0.02)
+            return "respuesta"
+        
+        first = asyncio.ensure_future(coalescer.run("clave", operation))
+        second = asyncio.ensure_future(coalescer.run("clave", operation))
+        await asyncio.sleep(0)
+        first.cancel()
+        
+        self.assertEqual(await second, "respuesta")
+    
+    async def test_abandoned_request_is_not_joined(self):
+        """Prueba que una petición idéntica no se une a la que se acaba de cancelar."""
+        coalescer = RequestCoalescer()
+        
+        async def operation():
+            await asyncio.sleep(0.02)
+            return "respuesta"
+        
+        first = asyncio.ensure_future(coalescer.run("clave", operation))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        
+        self.assertEqual(await coalescer.run("clave", operation), "respuesta")
+        self.assertEqual(coalescer.stats, {"upstream": 2, "coalesced": 0})
+    
+    async def test_abandoned_stream_is_not_joined(self):
+        """Prueba que un stream idéntico no se une al que se acaba de cancelar."""
+        coalescer = RequestCoalescer()
+        
+        async def source():
+            yield "Hola"
+            await asyncio.sleep(0.01)
+            yield " mundo"
+        
+        stream = coalescer.stream("clave", source)
+        self.assertEqual(await stream.__anext__(), "Hola")
+        await stream.aclose()
+        
+        chunks = [chunk async for chunk in coalescer.stream("clave", source)]
+        
+        self.assertEqual(chunks, ["Hola", " mundo"])
+        self.assertEqual(coalescer.stats, {"upstream": 2, "coalesced": 0})
+    
+    async def test_late_stream_subscriber_gets_full_text(self):
+        """Prueba que quien se une tarde a un stream recibe todos los fragmentos."""
+        coalescer = RequestCoalescer()
+        release = asyncio.Event()
+        
+        async def source():
+            yield "Hola"
+            await release.wait()
+            yield " mundo"
+        
+        async def consume():
+            return [chunk async for chunk in coalescer.stream("clave", source)]
+        
+        first = asyncio.ensure_future(consume())
+        await asyncio.sleep(0.01)
+        second = asyncio.ensure_future(consume())
+        await asyncio.sleep(0.01)
+        release.set()
+        
+        self.assertEqual(await first, ["Hola", " mundo"])
+        self.assertEqual(await second, ["Hola", " mundo"])
+        self.assertEqual(coalescer.stats, {"upstream": 1, "coalesced": 1})
+    
+    async def test_stream_cancelled_when_abandoned(self):
+        """Prueba que el stream de origen se cancela si nadie lo consume."""
+        coalescer = RequestCoalescer()
+        cancelled = asyncio.Event()
+        
+        async def source():
+            try:
+                yield "Hola"
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+        
+        stream = coalescer.stream("clave", source)
+        self.assertEqual(await stream.__anext__(), "Hola")
+        await stream.aclose()
+        
+        await asyncio.wait_for(cancelled.wait(), timeout=1)
+
+
+class TestRequestCoalescerSync(unittest.TestCase):
+    """Pruebas para la agrupación de llamadas síncronas."""
+    
+    def test_threads_share_one_request(self):
+        """Prueba que varios hilos con la misma petición hacen una sola llamada."""
+        coalescer = RequestCoalescer()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+        
+        def operation():
+            calls.append(1)
+            started.set()
+            release.wait(timeout=2)
+            return "respuesta"
+        
+        results = []
+        leader = threading.Thread(
+            target=lambda: results.append(coalescer.call("clave", operation))
+        )
+        leader.start()
+        started.wait(timeout=2)
+        followers = [
+            threading.Thread(target=lambda: results.append(coalescer.call("clave", operation)))
+            for _ in range(3)
+        ]
+        for thread in followers:
+            thread.start()
+        while coalescer.coalesced_requests < 3:
+            time.sleep(0.001)
+        release.set()
+        for thread in [leader, *followers]:
+            thread.join(timeout=2)
+        
+        self.assertEqual(results, ["respuesta"] * 4)
+        self.assertEqual(len(calls), 1)
+    
+    def test_leader_cancel_only_reaches_the_leader(self):
+        """Prueba que si cancela quien inició la petición, el resto recibe la respuesta."""
+        coalescer = RequestCoalescer()
+        started = threading.Event()
+        release = threading.Event()
+        
+        def operation():
+            started.set()
+            release.wait(timeout=2)
+            return "respuesta"
+        
+        leader_token = CancellationToken()
+        outcomes = {}
+        
+        def leader():
+            try:
+                outcomes["líder"] = coalescer.call("clave", operation, leader_token)
+            except RequestCancelledError as e:
+                outcomes["líder"] = e
+        
+        def follower():
+            outcomes["seguidor"] = coalescer.call("clave", operation, CancellationToken())
+        
+        threads = [threading.Thread(target=leader)]
+        threads[0].start()
+        started.wait(timeout=2)
+        threads.append(threading.Thread(target=follower))
+        threads[1].start()
+        while coalescer.coalesced_requests < 1:
+            time.sleep(0.001)
+        
+        leader_token.cancel()
+        threads[0].join(timeout=2)
+        self.assertIsInstance(outcomes["líder"], RequestCancelledError)
+        release.set()
+        threads[1].join(timeout=2)
+        
+        self.assertEqual(outcomes["seguidor"], "respuesta")
+    
+    def test_follower_waits_with_its_own_deadline(self):
+        """Prueba que quien se une a una petición en curso respeta su propio plazo."""
+        coalescer = RequestCoalescer()
+        started = threading.Event()
+        release = threading.Event()
+        
+        def operation():
+            started.set()
+            release.wait(timeout=2)
+            return "respuesta"
+        
+        results = []
+        leader = threading.Thread(
+            target=lambda: results.append(coalescer.call("clave", operation))
+        )
+        leader.start()
+        started.wait(timeout=2)
+        
+        begin = time.monotonic()
+        with self.assertRaises(DeadlineExceededError):
+            coalescer.call("clave", operation, CancellationToken(timeout=0.05))
+        self.assertLess(time.monotonic() - begin, 1.0)
+        release.set()
+        leader.join(timeout=2)
+        
+        self.assertEqual(results, ["respuesta"])
+    
+    def test_abandoned_call_is_not_joined(self):
+        """Prueba que una llamada idéntica no se une a una que todos han abandonado."""
+        coalescer = RequestCoalescer()
+        release = threading.Event()
+        calls = []
+        
+        def operation():
+            calls.append(1)
+            release.wait(timeout=2)
+            return "respuesta"
+        
+        token = CancellationToken()
+        token.cancel()
+        with self.assertRaises(RequestCancelledError):
+            coalescer.call("clave", operation, token)
+        release.set()
+        
+        self.assertEqual(coalescer.call("clave", operation), "respuesta")
+        self.assertEqual(coalescer.stats, {"upstream": 2, "coalesced": 0})
+
+
+class TestOpenAIClientCoalescing(unittest.IsolatedAsyncioTestCase):
+    """Pruebas de la agrupación integrada en el cliente."""
+    
+    @patch('openai.OpenAI')
+    async def test_duplicate_acomplete_calls_upstream_once(self, mock_openai_class):
+        """Prueba que dos envíos idénticos simultáneos hacen una sola petición."""
+        client = OpenAIClient()
+        
+        async def upstream(messages, key):
+            await asyncio.sleep(0.01)
+            return "respuesta"
+        
+        with patch.object(client, "_acomplete_upstream", new=AsyncMock(side_effect=upstream)) as mock:
+            messages = client.build_messages("Hola")
+            results = await asyncio.gather(
+                client.acomplete(messages), client.acomplete(list(messages))
+            )
+        
+        self.assertEqual(results, ["respuesta", "respuesta"])
+        mock.assert_awaited_once()
+        self.assertEqual(client.coalescer.stats["coalesced"], 1)
+    
+    @patch('openai.OpenAI')
+    def test_complete_cancel_only_reaches_its_caller(self, mock_openai_class):
+        """Prueba que cancelar un envío síncrono agrupado no interrumpe a los demás."""
+        client = OpenAIClient()
+        started = threading.Event()
+        release = threading.Event()
+        
+        def upstream(messages, key):
+            started.set()
+            release.wait(timeout=2)
+            return "respuesta"
+        
+        messages = client.build_messages("Hola")
+        token = CancellationToken()
+        results = []
+        errors = []
+        
+        def cancelled_caller():
+            try:
+                client.complete(messages, use_cache=False, token=token)
+            except RequestCancelledError as e:
+                errors.append(e)
+        
+        with patch.object(client, "_complete_upstream", side_effect=upstream) as mock:
+            other = threading.Thread(
+                target=lambda: results.append(client.complete(list(messages), use_cache=False))
+            )
+            cancelled = threading.Thread(target=cancelled_caller)
+            cancelled.start()
+            started.wait(timeout=2)
+            other.start()
+            while client.coalescer.coalesced_requests < 1:
+                time.sleep(0.001)
+            token.cancel()
+            cancelled.join(timeout=2)
+            release.set()
+            other.join(timeout=2)
+        
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(results, ["respuesta"])
+        mock.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
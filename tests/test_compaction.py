@@ -0,0 +1,108 @@
+"""
+Pruebas para la compactación del historial.
+"""
+
+import unittest
+
+from chat_gpt_local.api.compaction import (
+    SUMMARY_PREFIX,
+    HistoryCompactor,
+    HistorySummary,
+)
+
+
+class FakeCounter:
+    """Contador que asigna 10 tokens a cada mensaje."""
+    
+    def count(self, message):
+        return 10
+
+
+def make_history(count):
+    return [
+        {"role": "user" if i % 2 == 0 else "assistant", "content": f"mensaje {i}"}
+        for i in range(count)
+    ]
+
+
+class TestHistoryCompactor(unittest.IsolatedAsyncioTestCase):
+    """Pruebas para HistoryCompactor."""
+    
+    def make_compactor(self, threshold=50, keep_recent=2):
+        self.requests = []
+        
+        async def complete(messages):
+            self.requests.append(messages)
+            return f"  resumen {len(self.requests)}  "
+        
+        return HistoryCompactor(
+            complete, "gpt-4", threshold=threshold,
+            keep_recent=keep_recent, counter=FakeCounter(),
+        )
+    
+    async def test_below_threshold(self):
+        """Prueba que no se compacta por debajo del umbral."""
+        compactor = self.make_compactor()
+        history = make_history(5)
+        
+        self.assertEqual(compactor.pending(history, None), [])
+        self.assertIsNone(await compactor.compact(history, None))
+        self.assertEqual(self.requests, [])
+    
+    async def test_folds_old_messages(self):
+        """Prueba que se resumen todos los mensajes salvo los más recientes."""
+        compactor = self.make_compactor()
+        history = make_history(8)
+        
+        summary = await compactor.compact(history, None)
+        
+        self.assertEqual(summary, HistorySummary("resumen 1", 6))
+        transcript = self.requests[0][1]["content"]
+        self.assertIn("Usuario: mensaje 0", transcript)
+        self.assertIn("Asistente: mensaje 5", transcript)
+        self.assertNotIn("mensaje 6", transcript)
+    
+    async def test_rolling_summary(self):
+        """Prueba que el resumen anterior se incluye y solo se pliegan mensajes nuevos."""
+        compactor = self.make_compactor()
+        history = make_history(14)
+        previous = HistorySummary("lo anterior", 6)
+        
+        summary = await compactor.compact(history, previous)
+        
+        self.assertEqual(summary.covers, 12)
+        transcript = self.requests[0][1]["content"]
+        self.assertTrue(transcript.startswith(SUMMARY_PREFIX + "lo anterior"))
+        self.assertNotIn("mensaje 5", transcript)
+        self.assertIn("mensaje 6", transcript)
+    
+    async def test_skips_messages_out_of_context(self):
+        """Prueba que los mensajes fuera de contexto no cuentan ni se resumen."""
+        compactor = self.make_compactor()
+        history = [{"role": "assistant", "content": "bienvenida", "in_context": False}]
+        history += make_history(5)
+        
+        self.assertEqual(compactor.pending(history, None), [])
+        
+        history += make_history(3)
+        folded = compactor.pending(history, None)
+        self.assertNotIn(history[0], folded)
+        self.assertEqual(len(folded), 6)
+    
+    def test_summary_message(self):
+        """Prueba el mensaje de sistema que sustituye a los mensajes resumidos."""
+        message = HistorySummary("hechos", 4).as_message()
+        
+        self.assertEqual(message, {"role": "system", "content": SUMMARY_PREFIX + "hechos"})
+    
+    def test_default_threshold(self):
+        """Prueba que el umbral por defecto depende de la ventana del modelo."""
+        async def complete(messages):
+            return ""
+        
+        self.assertEqual(HistoryCompactor(complete, "gpt-4o").threshold, 4000)
+        self.assertEqual(HistoryCompactor(complete, "desconocido").threshold, 2048)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,141 @@
+"""
+Pruebas para la construcción de la ventana de contexto.
+"""
+
+import unittest
+from unittest.mock import patch
+
+from chat_gpt_local.api import context
+from chat_gpt_local.api.context import (
+    MESSAGE_OVERHEAD_TOKENS,
+    ContextBuilder,
+    TokenCounter,
+    get_context_window,
+)
+
+
+def make_history(count, size=40):
+    """Crea un historial alternando usuario y asistente."""
+    return [
+        {"role": "user" if i % 2 == 0 else "assistant", "content": f"{i:04d}" + "x" * size}
+        for i in range(count)
+    ]
+
+
+@patch.object(context, "HAS_TIKTOKEN", False)
+class TestContextBuilder(unittest.TestCase):
+    """Pruebas para ContextBuilder."""
+    
+    def test_context_window_lookup(self):
+        """Prueba la resolución de la ventana de contexto por prefijo."""
+        self.assertEqual(get_context_window("gpt-4o-mini-2024-07-18"), 128000)
+        self.assertEqual(get_context_window("gpt-4-0613"), 8192)
+        self.assertEqual(get_context_window("modelo-local"), context.DEFAULT_CONTEXT_WINDOW)
+    
+    def test_keeps_recent_messages_within_budget(self):
+        """Prueba que solo se envían los mensajes más recientes que caben."""
+        builder = ContextBuilder("gpt-4", max_tokens=100, context_window=200)
+        history = make_history(50)
+        pending = [{"role": "user", "content": "nuevo"}]
+        
+        messages = builder.build(history, pending=pending)
+        
+        total = sum(builder.counter.count(m) for m in messages)
+        self.assertLessEqual(total, builder.budget)
+        self.assertEqual(messages[-1], pending[0])
+        # Los mensajes seleccionados son los últimos del historial, en orden
+        selected = messages[:-1]
+        self.assertEqual(selected, history[-len(selected):])
+        self.assertGreater(len(selected), 0)
+    
+    def test_pinned_messages_always_first(self):
+        """Prueba que los mensajes fijados se incluyen siempre al principio."""
+        builder = ContextBuilder("gpt-4", max_tokens=100, context_window=200)
+        pinned = [{"role": "system", "content": "Eres un asistente."}]
+        
+        messages = builder.build(make_history(50), pinned=pinned)
+        
+        self.assertEqual(messages[0], pinned[0])
+    
+    def test_skips_messages_out_of_context(self):
+        """Prueba que se omiten los mensajes marcados como fuera de contexto."""
+        builder = ContextBuilder("gpt-4")
+        history = [
+            {"role": "assistant", "content": "Bienvenido", "in_context": False},
+            {"role": "user", "content": "Hola"},
+        ]
+        
+        messages = builder.build(history)
+        
+        self.assertEqual(messages, [{"role": "user", "content": "Hola"}])
+    
+    def test_work_is_bounded_by_window(self):
+        """Prueba que solo se cuentan los mensajes que entran en la ventana."""
+        builder = ContextBuilder("gpt-4", max_tokens=100, context_window=200)
+        history = make_history(10000)
+        
+        with patch.object(builder.counter, "count", wraps=builder.counter.count) as count:
+            builder.build(history)
+        
+        self.assertLess(count.call_count, 20)
+    
+    def test_prefix_is_stable_across_turns(self):
+        """Prueba que el inicio de la ventana se mantiene mientras el historial cabe."""
+        builder = ContextBuilder("gpt-4", max_tokens=100, context_window=400)
+        pinned = [{"role": "system", "content": "Eres un asistente."}]
+        history = make_history(40)
+        
+        first = builder.build(history, pinned=pinned)
+        history.extend(make_history(2))
+        second = builder.build(history, pinned=pinned)
+        
+        # La petición siguiente empieza exactamente con los mensajes de la anterior
+        self.assertEqual(second[:len(first)], first)
+        self.assertLessEqual(
+            sum(builder.counter.count(m) for m in second), builder.budget
+        )
+    
+    def test_window_advances_when_full(self):
+        """Prueba que la ventana avanza al llenarse y deja margen para otros turnos."""
+        builder = ContextBuilder("gpt-4", max_tokens=100, context_window=400)
+        history = make_history(40)
+        starts = []
+        
+        for _ in range(10):
+            messages = builder.build(history)
+            starts.append(len(history) - len(messages))
+            history.extend(make_history(2))
+        
+        # El inicio solo cambia de vez en cuando, no en cada turno
+        self.assertGreater(starts[-1], starts[0])
+        self.assertLess(len(set(starts)), len(starts) // 2)
+
+
+@patch.object(context, "HAS_TIKTOKEN", False)
+class TestTokenCounter(unittest.TestCase):
+    """Pruebas para TokenCounter."""
+    
+    def test_counts_are_cached(self):
+        """Prueba que el recuento de cada mensaje se calcula una sola vez."""
+        counter = TokenCounter("gpt-4")
+        message = {"role": "user", "content": "x" * 40}
+        
+        with patch.object(counter, "_count_text", wraps=counter._count_text) as count_text:
+            first = counter.count(message)
+            second = counter.count(dict(message))
+        
+        self.assertEqual(first, second)
+        self.assertEqual(first, MESSAGE_OVERHEAD_TOKENS + 10)
+        count_text.assert_called_once()
+    
+    def test_cache_is_bounded(self):
+        """Prueba que la caché descarta las entradas menos usadas."""
+        counter = TokenCounter("gpt-4", max_entries=2)
+        for i in range(5):
+            counter.count({"role": "user", "content": str(i)})
+        
+        self.assertEqual(len(counter._cache), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+"""
+Pruebas para el motor de peticiones asíncronas.
+"""
+
+import asyncio
+import threading
+import unittest
+
+from chat_gpt_local.api.engine import RequestEngine
+
+
+class TestRequestEngine(unittest.TestCase):
+    """Pruebas para RequestEngine."""
+    
+    def setUp(self):
+        self.engine = RequestEngine(max_concurrency=2)
+        self.engine.start()
+    
+    def tearDown(self):
+        self.engine.stop()
+    
+    def test_submit_returns_result(self):
+        """Prueba que submit devuelve el resultado de la corrutina."""
+        async def compute():
+            await asyncio.sleep(0)
+            return threading.current_thread().name
+        
+        result = self.engine.submit(compute()).result(timeout=2)
+        
+        # La corrutina se ejecuta en el hilo del motor, no en el que la envía
+        self.assertEqual(result, "chat-gpt-local-engine")
+    
+    def test_concurrency_is_bounded(self):
+        """Prueba que no se ejecutan más corrutinas que max_concurrency a la vez."""
+        state = {"running": 0, "peak": 0}
+        
+        async def task():
+            state["running"] += 1
+            state["peak"] = max(state["peak"], state["running"])
+            await asyncio.sleep(0.01)
+            state["running"] -= 1
+        
+        futures = [self.engine.submit(task()) for _ in range(10)]
+        for future in futures:
+            future.result(timeout=2)
+        
+        self.assertEqual(state["peak"], 2)
+    
+    def test_cancel_future_cancels_coroutine(self):
+        """Prueba que cancelar el futuro cancela la corrutina en el bucle."""
+        cancelled = threading.Event()
+        started = threading.Event()
+        
+        async def slow():
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+        
+        future = self.engine.submit(slow())
+        started.wait(timeout=2)
+        future.cancel()
+        
+        self.assertTrue(cancelled.wait(timeout=2))
+    
+    def test_submit_after_stop_raises(self):
+        """Prueba que no se aceptan corrutinas con el motor detenido."""
+        self.engine.stop()
+        
+        async def noop():
+            return None
+        
+        with self.assertRaises(RuntimeError):
+            self.engine.submit(noop())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+"""
+Pruebas para los resplandores precalculados.
+"""
+
+import unittest
+
+from PyQt6.QtCore import QRect, Qt
+from PyQt6.QtGui import QColor, QFont, QImage, QPainter, QPixmap
+
+from chat_gpt_local.gui.glow import draw_nine_patch, glow_border, glow_frame, glow_text
+from tests import qt_application
+
+
+def solid_pixmap(side, color="#FF0000"):
+    """Crea una imagen cuadrada de un solo color."""
+    pixmap = QPixmap(side, side)
+    pixmap.fill(QColor(color))
+    return pixmap
+
+
+def paint_nine_patch(canvas_size, target, pixmap, border):
+    """Pinta una imagen de nueve partes sobre un lienzo transparente y lo devuelve."""
+    image = QImage(canvas_size[0], canvas_size[1], QImage.Format.Format_ARGB32_Premultiplied)
+    image.fill(Qt.GlobalColor.transparent)
+    painter = QPainter(image)
+    draw_nine_patch(painter, target, pixmap, border)
+    painter.end()
+    return image
+
+
+def covered(image):
+    """Devuelve el rectángulo de los píxeles no transparentes de una imagen."""
+    points = [
+        (x, y)
+        for y in range(image.height())
+        for x in range(image.width())
+        if image.pixelColor(x, y).alpha()
+    ]
+    xs = [x for x, _ in points]
+    ys = [y for _, y in points]
+    return QRect(min(xs), min(ys), max(xs) - min(xs) + 1, max(ys) - min(ys) + 1), len(points)
+
+
+class TestNinePatch(unittest.TestCase):
+    """Pruebas para draw_nine_patch y glow_border."""
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.app = qt_application()
+    
+    def test_border_contains_corner_and_blur(self):
+        """Prueba que el borde mide dos alcances más el radio de la esquina."""
+        self.assertEqual(glow_border(8, 6), 22)
+        self.assertEqual(glow_border(0, 0), 0)
+    
+    def test_fills_exactly_the_target(self):
+        """Prueba que las nueve partes cubren el destino sin salirse de él."""
+        target = QRect(3, 4, 40, 25)
+        
+        image = paint_nine_patch((60, 40), target, solid_pixmap(11), 5)
+        
+        self.assertEqual(covered(image), (target, 40 * 25))
+    
+    def test_small_target_shrinks_corners(self):
+        """Prueba que un destino menor que las esquinas se sigue cubriendo entero."""
+        target = QRect(2, 2, 6, 4)
+        
+        image = paint_nine_patch((12, 10), target, solid_pixmap(21), 10)
+        
+        self.assertEqual(covered(image), (target, 6 * 4))
+
+
+class TestGlowCache(unittest.TestCase):
+    """Pruebas para la caché de glow_frame y glow_text."""
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.app = qt_application()
+    
+    def test_frame_is_built_once(self):
+        """Prueba que cada color y radio se difumina una sola vez."""
+        first = glow_frame("#00FFFF", 4, 6)
+        
+        self.assertIs(glow_frame("#00FFFF", 4, 6), first)
+        self.assertIsNot(glow_frame("#FF00FF", 4, 6), first)
+    
+    def test_frame_layout(self):
+        """Prueba que la imagen es cuadrada, opaca en el centro y transparente en la esquina."""
+        pixmap = glow_frame("#00FFFF", 4, 6)
+        image = pixmap.toImage()
+        center = glow_border(4, 6)
+        
+        self.assertEqual((pixmap.width(), pixmap.height()), (2 * center + 1, 2 * center + 1))
+        self.assertEqual(image.pixelColor(center, center).name(), "#00ffff")
+        self.assertEqual(image.pixelColor(0, 0).alpha(), 0)
+    
+    def test_text_is_cached_per_text(self):
+        """Prueba que el resplandor de un texto se reutiliza mientras no cambie."""
+        font_key = QFont().toString()
+        first = glow_text("Hola", font_key, "#00FFFF", 4)
+        
+        self.assertIs(glow_text("Hola", font_key, "#00FFFF", 4), first)
+        self.assertIsNot(glow_text("Adiós", font_key, "#00FFFF", 4), first)
+        self.assertGreater(first.width(), 2 * 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+"""
+Pruebas para el pool de conexiones HTTP compartido.
+"""
+
+import unittest
+from unittest.mock import patch
+
+import httpx
+
+from chat_gpt_local.api import http_pool
+from chat_gpt_local.api.openai_client import OpenAIClient
+
+
+class TestHttpPool(unittest.TestCase):
+    """Pruebas para el cliente HTTP síncrono compartido."""
+    
+    def tearDown(self):
+        http_pool.close_http_client()
+    
+    def test_clients_share_the_pool(self):
+        """Prueba que todos los clientes OpenAI usan el mismo cliente HTTP."""
+        first = OpenAIClient()
+        second = OpenAIClient()
+        
+        self.assertIs(first.client._client, second.client._client)
+        self.assertIs(first.client._client, http_pool.get_http_client())
+    
+    def test_closed_client_is_recreated(self):
+        """Prueba que se crea un cliente nuevo si el compartido se cerró."""
+        client = http_pool.get_http_client()
+        http_pool.close_http_client()
+        
+        self.assertTrue(client.is_closed)
+        self.assertIsNot(http_pool.get_http_client(), client)
+    
+    def test_http2_requires_h2(self):
+        """Prueba que HTTP/2 solo se activa si el paquete h2 está disponible."""
+        with patch.object(http_pool.settings, "http2", True):
+            with patch.object(http_pool, "HAS_HTTP2", False):
+                self.assertFalse(http_pool.use_http2())
+            with patch.object(http_pool, "HAS_HTTP2", True):
+                self.assertTrue(http_pool.use_http2())
+
+
+class TestAsyncHttpPool(unittest.IsolatedAsyncioTestCase):
+    """Pruebas para el cliente HTTP asíncrono compartido."""
+    
+    async def asyncTearDown(self):
+        await http_pool.aclose_async_http_client()
+    
+    async def test_one_client_per_loop(self):
+        """Prueba que el bucle actual reutiliza su cliente asíncrono."""
+        self.assertIs(
+            http_pool.get_async_http_client(), http_pool.get_async_http_client()
+        )
+    
+    async def test_warm_up_ignores_errors(self):
+        """Prueba que un fallo al calentar la conexión no se propaga."""
+        client = http_pool.get_async_http_client()
+        with patch.object(client, "head", side_effect=httpx.ConnectError("sin red")):
+            await http_pool.awarm_up("https://api.openai.com/v1/")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,179 @@
+"""
+Pruebas del cliente contra el servidor local compatible con OpenAI.
+
+A diferencia de test_openai_client.py, aquí se recorre el camino HTTP real
+(incluido el streaming SSE) sin salir de la máquina.
+"""
+
+import unittest
+from unittest.mock import patch
+
+from benchmarks.mock_server import MockOpenAIServer, MockServerConfig
+from chat_gpt_local.api.cancellation import CancellationToken
+from chat_gpt_local.api.errors import (
+    DeadlineExceededError,
+    OpenAIClientError,
+    RequestCancelledError,
+)
+from chat_gpt_local.api.http_pool import aclose_async_http_client
+from chat_gpt_local.api.openai_client import OpenAIClient
+from chat_gpt_local.api.scheduler import RateLimitScheduler
+from chat_gpt_local.api.telemetry import Telemetry
+from chat_gpt_local.api.usage import PromptCacheStats
+from chat_gpt_local.config.settings import settings
+
+EXPECTED = "token0 token1 token2 token3 token4"
+
+
+class MockServerTestCase(unittest.IsolatedAsyncioTestCase):
+    """Arranca un servidor simulado y apunta el cliente a él."""
+    
+    config = MockServerConfig(completion_tokens=5)
+    
+    def setUp(self):
+        self.server = MockOpenAIServer(MockServerConfig(**vars(self.config))).start()
+        self.addCleanup(self.server.stop)
+        for name, value in {
+            "base_url": self.server.base_url,
+            "openai_api_key": "sk-mock",
+            "cache_enabled": False,
+            "coalesce_requests": False,
+        }.items():
+            patcher = patch.object(settings, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.client = OpenAIClient()
+    
+    async def asyncTearDown(self):
+        await aclose_async_http_client()
+
+
+class TestMockServer(MockServerTestCase):
+    """Pruebas del cliente contra un servidor sin fallos."""
+    
+    def test_complete(self):
+        """Prueba una petición sin streaming por el cliente síncrono."""
+        self.assertEqual(self.client.send_message("hola"), EXPECTED)
+    
+    def test_stream(self):
+        """Prueba el streaming SSE por el cliente síncrono."""
+        chunks = list(self.client.stream_message("hola"))
+        
+        self.assertEqual(len(chunks), 5)
+        self.assertEqual("".join(chunks), EXPECTED)
+    
+    async def test_async_stream(self):
+        """Prueba el streaming SSE por el cliente asíncrono."""
+        chunks = [chunk async for chunk in self.client.astream_message("hola")]
+        
+        self.assertEqual("".join(chunks), EXPECTED)
+        self.assertEqual(self.server.requests, 1)
+    
+    async def test_cached_tokens_are_recorded(self):
+        """Prueba que se contabilizan los tokens de prompt servidos desde la caché."""
+        stats = PromptCacheStats()
+        self.client.usage_listener = stats.record
+        history = []
+        
+        for text in ["hola", "¿qué tal?"]:
+            messages = self.client.build_messages(text, history)
+            reply = "".join([chunk async for chunk in self.client.astream(messages)])
+            history += [{"role": "user", "content": text},
+                        {"role": "assistant", "content": reply}]
+        
+        self.assertEqual(stats.requests, 2)
+        self.assertGreater(stats.cached_tokens, 0)
+        self.assertLess(stats.cached_tokens, stats.prompt_tokens)
+        self.assertGreater(stats.hit_ratio, 0.0)
+
+
+class TestMockServerTelemetry(MockServerTestCase):
+    """Pruebas de la telemetría contra un servidor que genera a ritmo fijo."""
+    
+    config = MockServerConfig(latency=0.05, completion_tokens=5, tokens_per_second=50)
+    
+    async def test_stream_metrics(self):
+        """Prueba que se miden la conexión, el primer token y los tokens de una petición."""
+        self.client.telemetry = Telemetry()
+        scheduler = RateLimitScheduler(self.client)
+        
+        chunks = [chunk async for chunk in scheduler.stream(self.client.build_messages("hola"))]
+        
+        self.assertEqual("".join(chunks), EXPECTED)
+        (metrics,) = self.client.telemetry.recent
+        self.assertEqual(metrics.outcome, "ok")
+        self.assertGreater(metrics.connect, 0.0)
+        self.assertGreaterEqual(metrics.ttft, 0.05)
+        self.assertGreater(metrics.total, metrics.ttft)
+        self.assertEqual(metrics.completion_tokens, 5)
+        self.assertGreater(metrics.prompt_tokens, 0)
+        self.assertGreater(metrics.tokens_per_second, 0.0)
+    
+    async def test_reused_connection(self):
+        """Prueba que una conexión reutilizada no suma tiempo de conexión."""
+        self.client.telemetry = Telemetry()
+        
+        for _ in range(2):
+            await self.client.asend_message("hola")
+        
+        first, second = self.client.telemetry.recent
+        self.assertGreater(first.connect, 0.0)
+        self.assertEqual(second.connect, 0.0)
+        self.assertEqual(second.ttft, second.total)
+
+
+class TestMockServerCancellation(MockServerTestCase):
+    """Pruebas de cancelación contra un servidor que genera despacio."""
+    
+    config = MockServerConfig(latency=0.2, completion_tokens=100, tokens_per_second=20)
+    
+    async def test_cancel_closes_stream(self):
+        """Prueba que cancelar a mitad del stream lo interrumpe de inmediato."""
+        token = CancellationToken()
+        chunks = []
+        
+        with self.assertRaises(RequestCancelledError):
+            async for chunk in self.client.astream(
+                self.client.build_messages("hola"), token=token
+            ):
+                chunks.append(chunk)
+                token.cancel()
+        
+        self.assertEqual(len(chunks), 1)
+    
+    async def test_deadline(self):
+        """Prueba que el plazo del token interrumpe una respuesta lenta."""
+        scheduler = RateLimitScheduler(self.client)
+        
+        with self.assertRaises(DeadlineExceededError):
+            await scheduler.complete(
+                self.client.build_messages("hola"), token=CancellationToken(timeout=0.05)
+            )
+
+
+class TestMockServerRateLimit(MockServerTestCase):
+    """Pruebas del cliente contra un servidor que siempre responde 429."""
+    
+    config = MockServerConfig(rate_limit_rate=1.0, retry_after=0.001)
+    
+    async def test_rate_limit_error(self):
+        """Prueba que un 429 se convierte en un error reintentable."""
+        with self.assertRaises(OpenAIClientError) as context:
+            await self.client.asend_message("hola")
+        
+        self.assertTrue(context.exception.is_rate_limit)
+        self.assertTrue(context.exception.retryable)
+    
+    async def test_scheduler_retries(self):
+        """Prueba que el planificador reintenta hasta agotar los intentos."""
+        scheduler = RateLimitScheduler(self.client, max_retries=2, base_delay=0.001)
+        
+        with self.assertRaises(OpenAIClientError):
+            await scheduler.complete(self.client.build_messages("hola"))
+        
+        self.assertEqual(scheduler.retries, 2)
+        self.assertEqual(self.server.requests, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,7 +3,7 @@ Pruebas básicas para el cliente de OpenAI.
 """
 
 import unittest
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 from chat_gpt_local.api.openai_client import OpenAIClient
 
@@ -49,6 +49,69 @@ class TestOpenAIClient(unittest.TestCase):
         
         self.assertIn("Error al comunicarse con OpenAI", str(context.exception))
 
+    @patch('openai.OpenAI')
+    def test_stream_message(self, mock_openai_class):
+        """Prueba que stream_message entrega los fragmentos en orden."""
+        mock_client = MagicMock()
+        mock_openai_class.return_value = mock_client
+        
+        # Simular los fragmentos del stream (el último sin contenido)
+        chunks = []
+        for text in ["Hola", ", ", "mundo", None]:
+            chunk = MagicMock()
+            chunk.choices = [MagicMock()]
+            chunk.choices[0].delta.content = text
+            chunks.append(chunk)
+        mock_stream = MagicMock()
+        mock_stream.__iter__.return_value = iter(chunks)
+        mock_client.chat.completions.create.return_value = mock_stream
+        
+        client = OpenAIClient()
+        result = list(client.stream_message("Hola"))
+        
+        self.assertEqual(result, ["Hola", ", ", "mundo"])
+        _, kwargs = mock_client.chat.completions.create.call_args
+        self.assertTrue(kwargs["stream"])
+        mock_stream.close.assert_called_once()
+
+
+
+class TestOpenAIClientAsync(unittest.IsolatedAsyncioTestCase):
+    """Pruebas para la interfaz asíncrona del cliente OpenAI."""
+    
+    @patch('openai.AsyncOpenAI')
+    @patch('openai.OpenAI')
+    async def test_astream_message(self, mock_openai_class, mock_async_class):
+        """Prueba que astream_message entrega los fragmentos en orden."""
+        mock_async_client = MagicMock()
+        mock_async_class.return_value = mock_async_client
+        
+        chunks = []
+        for text in ["Hola", " mundo"]:
+            chunk = MagicMock()
+            chunk.choices = [MagicMock()]
+            chunk.choices[0].delta.content = text
+            chunks.append(chunk)
+        
+        mock_stream = MagicMock()
+        mock_stream.__aiter__.return_value = chunks
+        mock_stream.close = AsyncMock()
+        mock_raw = MagicMock()
+        mock_raw.headers = {"x-ratelimit-remaining-requests": "99"}
+        mock_raw.parse.return_value = mock_stream
+        mock_async_client.chat.completions.with_raw_response.create = AsyncMock(
+            return_value=mock_raw
+        )
+        
+        client = OpenAIClient()
+        received_headers = []
+        client.headers_listener = received_headers.append
+        result = [chunk async for chunk in client.astream_message("Hola")]
+        
+        self.assertEqual(result, ["Hola", " mundo"])
+        mock_stream.close.assert_awaited_once()
+        self.assertEqual(received_headers, [mock_raw.headers])
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
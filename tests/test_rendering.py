@@ -0,0 +1,232 @@
+"""
+Pruebas para la conversión de Markdown a HTML.
+"""
+
+import unittest
+
+from PyQt6.QtCore import QEventLoop, QTimer
+
+from chat_gpt_local.gui.rendering import (
+    IncrementalRenderer,
+    RenderCache,
+    RenderPool,
+    convert_blocks,
+    convert_markdown,
+    split_blocks,
+)
+from tests import qt_application
+
+
+def wait_for_results(pool, count, timeout_ms=5000):
+    """Procesa eventos de Qt hasta recibir `count` resultados del grupo."""
+    results = []
+    loop = QEventLoop()
+    
+    def on_rendered(message_id, html):
+        results.append((message_id, html))
+        if len(results) >= count:
+            loop.quit()
+    
+    pool.rendered.connect(on_rendered)
+    QTimer.singleShot(timeout_ms, loop.quit)
+    loop.exec()
+    pool.rendered.disconnect(on_rendered)
+    return results
+
+
+def wait_for_tail(pool, timeout_ms=5000):
+    """Procesa eventos de Qt hasta recibir una conversión por bloques del grupo."""
+    loop = QEventLoop()
+    pool.tail_rendered.connect(loop.quit)
+    QTimer.singleShot(timeout_ms, loop.quit)
+    loop.exec()
+    pool.tail_rendered.disconnect(loop.quit)
+
+
+class TestConvertMarkdown(unittest.TestCase):
+    """Pruebas para convert_markdown."""
+    
+    def test_renders_extensions(self):
+        """Prueba que se cargan las extensiones de bloques de código y tablas."""
+        html = convert_markdown("```\ncódigo\n```\n\n| a | b |\n|---|---|\n| 1 | 2 |")
+        
+        self.assertIn("<pre><code>código", html)
+        self.assertIn("<table>", html)
+    
+    def test_converter_is_reset_between_calls(self):
+        """Prueba que el estado de una conversión no se filtra a la siguiente."""
+        convert_markdown("[enlace][r]\n\n[r]: https://example.com")
+        
+        self.assertEqual(convert_markdown("[enlace][r]"), "<p>[enlace][r]</p>")
+
+
+class TestRenderCache(unittest.TestCase):
+    """Pruebas para RenderCache."""
+    
+    def test_cache_hits(self):
+        """Prueba que un contenido guardado se sirve desde la caché."""
+        cache = RenderCache()
+        
+        self.assertIsNone(cache.cached("**hola**"))
+        cache.store("**hola**", "<p><strong>hola</strong></p>")
+        
+        self.assertEqual(cache.cached("**hola**"), "<p><strong>hola</strong></p>")
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+    
+    def test_lru_eviction(self):
+        """Prueba que la caché descarta el contenido usado hace más tiempo."""
+        cache = RenderCache(max_entries=2)
+        cache.store("a", "<p>a</p>")
+        cache.store("b", "<p>b</p>")
+        cache.cached("a")
+        cache.store("c", "<p>c</p>")
+        
+        self.assertEqual(cache.cached("a"), "<p>a</p>")
+        self.assertIsNone(cache.cached("b"))
+
+
+class TestSplitBlocks(unittest.TestCase):
+    """Pruebas para split_blocks."""
+    
+    def test_blocks_rejoin_to_content(self):
+        """Prueba que los bloques separados por líneas en blanco conservan el texto."""
+        content = "# Título\n\nPárrafo\nseguido\n\n\n| a | b |\n|---|---|\n| 1 | 2 |\n"
+        
+        blocks = split_blocks(content)
+        
+        self.assertEqual(blocks, [
+            "# Título\n\n",
+            "Párrafo\nseguido\n\n\n",
+            "| a | b |\n|---|---|\n| 1 | 2 |\n",
+        ])
+        self.assertEqual("".join(blocks), content)
+    
+    def test_fenced_code_is_one_block(self):
+        """Prueba que las líneas en blanco dentro de un bloque de código no lo dividen."""
+        content = "```python\na = 1\n\nb = 2\n```\n\nFin"
+        
+        self.assertEqual(split_blocks(content), ["```python\na = 1\n\nb = 2\n```\n\n", "Fin"])
+    
+    def test_lists_and_indented_lines_are_not_split(self):
+        """Prueba que una lista con elementos separados y sus párrafos sangrados van juntos."""
+        content = "- uno\n\n    detalle\n\n- dos\n\nFin"
+        
+        self.assertEqual(split_blocks(content), ["- uno\n\n    detalle\n\n- dos\n\n", "Fin"])
+
+
+class TestIncrementalRenderer(unittest.TestCase):
+    """Pruebas para IncrementalRenderer y convert_blocks."""
+    
+    def test_only_last_block_is_pending(self):
+        """Prueba que al crecer el mensaje solo cambia el último bloque."""
+        incremental = IncrementalRenderer()
+        start, blocks = incremental.pending("Uno\n\nDo")
+        incremental.rendered(start, blocks)
+        
+        self.assertEqual(incremental.pending("Uno\n\nDos"), (1, ["Dos"]))
+        self.assertEqual(incremental.pending("Uno\n\nDos\n\nTres"), (1, ["Dos\n\n", "Tres"]))
+    
+    def test_edit_restarts_from_changed_block(self):
+        """Prueba que editar un bloque anterior vuelve a convertir desde él."""
+        incremental = IncrementalRenderer()
+        incremental.rendered(0, ["Uno\n\n", "Dos\n\n", "Tres"])
+        
+        self.assertEqual(incremental.pending("Uno\n\nDoS\n\nTres"), (1, ["DoS\n\n", "Tres"]))
+        self.assertEqual(incremental.pending("Uno\n\n"), (1, []))
+    
+    def test_growth_reuses_stable_blocks(self):
+        """Prueba que al crecer el mensaje no se vuelven a dividir los bloques estables."""
+        incremental = IncrementalRenderer()
+        incremental.rendered(0, ["Uno\n\n", "Dos\n\n", "Tres"])
+        incremental.rendered(2, ["Tres\n\n", "Cuatro"])
+        
+        self.assertEqual(
+            incremental.pending("Uno\n\nDos\n\nTres\n\nCuatro\n\nCinco"),
+            (3, ["Cuatro\n\n", "Cinco"]),
+        )
+    
+    def test_open_fence_is_rendered_as_code(self):
+        """Prueba que un bloque de código sin cerrar se muestra ya como código."""
+        html = convert_blocks(["Texto\n\n", "```\nprint(1)"])
+        
+        self.assertEqual(html[0], "<p>Texto</p>")
+        self.assertIn("<pre><code>print(1)", html[1])
+
+
+class TestRenderPool(unittest.TestCase):
+    """Pruebas para RenderPool."""
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.app = qt_application()
+    
+    def test_result_is_delivered_and_cached(self):
+        """Prueba que el HTML llega con la señal y queda guardado en la caché."""
+        pool = RenderPool(workers=2, cache=RenderCache())
+        self.addCleanup(pool.shutdown)
+        
+        pool.submit(1, "**hola**")
+        results = wait_for_results(pool, 1)
+        
+        self.assertEqual(results, [(1, "<p><strong>hola</strong></p>")])
+        self.assertEqual(pool.cached("**hola**"), "<p><strong>hola</strong></p>")
+    
+    def test_only_latest_result_is_delivered(self):
+        """Prueba que se descartan las conversiones superadas de un mismo mensaje."""
+        pool = RenderPool(workers=2, cache=RenderCache())
+        self.addCleanup(pool.shutdown)
+        
+        pool.submit(1, "parcial", use_cache=False)
+        pool.submit(1, "parcial y final")
+        pool.submit(2, "otro")
+        results = wait_for_results(pool, 2)
+        
+        self.assertCountEqual(results, [(1, "<p>parcial y final</p>"), (2, "<p>otro</p>")])
+    
+    def test_partial_updates_send_changed_blocks(self):
+        """Prueba que las actualizaciones parciales solo entregan los bloques nuevos."""
+        pool = RenderPool(workers=1, cache=RenderCache())
+        self.addCleanup(pool.shutdown)
+        received = []
+        pool.tail_rendered.connect(lambda *args: received.append(args))
+        
+        pool.submit_partial(1, "Uno\n\nDo")
+        wait_for_tail(pool)
+        pool.submit_partial(1, "Uno\n\nDos")
+        wait_for_tail(pool)
+        
+        self.assertEqual(received, [(1, 0, ["<p>Uno</p>", "<p>Do</p>"]), (1, 1, ["<p>Dos</p>"])])
+    
+    def test_fast_partial_updates_are_coalesced(self):
+        """Prueba que los fragmentos que llegan durante una conversión no la descartan."""
+        pool = RenderPool(workers=1, cache=RenderCache())
+        self.addCleanup(pool.shutdown)
+        received = []
+        pool.tail_rendered.connect(lambda *args: received.append(args))
+        
+        pool.submit_partial(1, "Uno\n\nD")
+        pool.submit_partial(1, "Uno\n\nDo")
+        pool.submit_partial(1, "Uno\n\nDos")
+        wait_for_tail(pool)
+        wait_for_tail(pool)
+        
+        self.assertEqual(received, [(1, 0, ["<p>Uno</p>", "<p>D</p>"]), (1, 1, ["<p>Dos</p>"])])
+    
+    def test_process_backend(self):
+        """Prueba la conversión en un grupo de procesos."""
+        pool = RenderPool("process", workers=1, cache=RenderCache())
+        self.addCleanup(pool.shutdown)
+        
+        pool.submit(7, "# título")
+        results = wait_for_results(pool, 1, timeout_ms=30000)
+        
+        self.assertEqual(results, [(7, "<h1>título</h1>")])
+    
+    def test_unknown_backend(self):
+        """Prueba que se rechaza una implementación desconocida."""
+        with self.assertRaises(ValueError):
+            RenderPool("gpu")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+"""
+Pruebas para el paquete binario de recursos.
+"""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from PyQt6.QtCore import QDir, QFile, QIODevice, QResource
+
+from chat_gpt_local.gui.resources.rcc import read_qrc, write_rcc
+
+QRC = """<!DOCTYPE RCC>
+<RCC version="1.0">
+    <qresource prefix="/prueba">
+        <file>fonts/a.ttf</file>
+        <file>fonts/b.ttf</file>
+        <file alias="otra/c.bin">datos/c.bin</file>
+    </qresource>
+</RCC>
+"""
+
+
+def read_resource(path):
+    """Lee un archivo de los recursos registrados."""
+    resource_file = QFile(path)
+    if not resource_file.open(QIODevice.OpenModeFlag.ReadOnly):
+        return None
+    try:
+        return bytes(resource_file.readAll())
+    finally:
+        resource_file.close()
+
+
+class TestResourceBundle(unittest.TestCase):
+    """Pruebas para la escritura de paquetes .rcc."""
+    
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = Path(directory.name)
+        self.files = {
+            "fonts/a.ttf": b"fuente a",
+            "fonts/b.ttf": b"fuente b" * 1000,
+            "datos/c.bin": bytes(range(256)),
+        }
+        for name, content in self.files.items():
+            (self.root / name).parent.mkdir(parents=True, exist_ok=True)
+            (self.root / name).write_bytes(content)
+        (self.root / "resources.qrc").write_text(QRC)
+        self.bundle = str(self.root / "resources.rcc")
+        write_rcc(self.root / "resources.qrc", self.bundle)
+    
+    def test_qt_registers_the_bundle(self):
+        """Prueba que Qt registra el paquete y lee cada archivo intacto."""
+        self.assertTrue(QResource.registerResource(self.bundle))
+        self.addCleanup(QResource.unregisterResource, self.bundle)
+        
+        self.assertEqual(read_resource(":/prueba/fonts/a.ttf"), self.files["fonts/a.ttf"])
+        self.assertEqual(read_resource(":/prueba/fonts/b.ttf"), self.files["fonts/b.ttf"])
+        self.assertEqual(read_resource(":/prueba/otra/c.bin"), self.files["datos/c.bin"])
+        self.assertEqual(sorted(QDir(":/prueba/fonts").entryList()), ["a.ttf", "b.ttf"])
+    
+    def test_missing_files_are_not_found(self):
+        """Prueba que las rutas que no están en el paquete no existen."""
+        self.assertTrue(QResource.registerResource(self.bundle))
+        self.addCleanup(QResource.unregisterResource, self.bundle)
+        
+        self.assertIsNone(read_resource(":/prueba/fonts/c.ttf"))
+        self.assertIsNone(read_resource(":/prueba/datos/c.bin"))
+    
+    def test_files_are_not_compressed(self):
+        """Prueba que los archivos se leen del paquete mapeado, sin descomprimirlos."""
+        self.assertTrue(QResource.registerResource(self.bundle))
+        self.addCleanup(QResource.unregisterResource, self.bundle)
+        
+        resource = QResource(":/prueba/fonts/b.ttf")
+        
+        self.assertEqual(
+            resource.compressionAlgorithm(), QResource.Compression.NoCompression
+        )
+        self.assertEqual(resource.size(), len(self.files["fonts/b.ttf"]))
+    
+    def test_file_used_as_directory_is_rejected(self):
+        """Prueba que un archivo no puede contener otros archivos."""
+        (self.root / "conflicto.qrc").write_text(
+            '<RCC><qresource prefix="/">'
+            '<file alias="a">fonts/a.ttf</file><file alias="a/b">fonts/b.ttf</file>'
+            '</qresource></RCC>'
+        )
+        
+        with self.assertRaises(ValueError):
+            read_qrc(self.root / "conflicto.qrc")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,221 @@
+"""
+Pruebas para el planificador de peticiones con límites de uso.
+"""
+
+import asyncio
+import time
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+
+import httpx
+import openai
+
+from chat_gpt_local.api.backends import MultiEndpointBackend
+from chat_gpt_local.api.errors import OpenAIClientError
+from chat_gpt_local.api.scheduler import RateLimitScheduler, TokenBucket, parse_duration
+
+
+def make_rate_limit_error(retry_after="0"):
+    """Crea un error 429 de la librería de OpenAI."""
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    response = httpx.Response(429, headers={"retry-after": retry_after}, request=request)
+    return openai.RateLimitError("Rate limit", response=response, body=None)
+
+
+class TestParseDuration(unittest.TestCase):
+    """Pruebas para parse_duration."""
+    
+    def test_formats(self):
+        """Prueba los formatos de duración usados por OpenAI."""
+        self.assertEqual(parse_duration("20ms"), 0.02)
+        self.assertEqual(parse_duration("6m0s"), 360.0)
+        self.assertEqual(parse_duration("1h2m3.5s"), 3723.5)
+        self.assertEqual(parse_duration("2"), 2.0)
+        self.assertIsNone(parse_duration(None))
+        self.assertIsNone(parse_duration("pronto"))
+
+
+class TestOpenAIClientError(unittest.TestCase):
+    """Pruebas para la clasificación de errores."""
+    
+    def test_rate_limit_is_retryable(self):
+        """Prueba que un 429 es reintentable y conserva sus cabeceras."""
+        error = OpenAIClientError.from_exception(make_rate_limit_error("3"))
+        
+        self.assertTrue(error.retryable)
+        self.assertTrue(error.is_rate_limit)
+        self.assertEqual(error.headers["retry-after"], "3")
+        self.assertIn("Error al comunicarse con OpenAI", str(error))
+    
+    def test_generic_error_is_not_retryable(self):
+        """Prueba que un error desconocido no se reintenta."""
+        self.assertFalse(OpenAIClientError.from_exception(ValueError("x")).retryable)
+
+
+class TestTokenBucket(unittest.IsolatedAsyncioTestCase):
+    """Pruebas para TokenBucket."""
+    
+    async def test_unlimited_never_waits(self):
+        """Prueba que una cubeta sin límite no espera."""
+        bucket = TokenBucket(0)
+        for _ in range(100):
+            self.assertEqual(await bucket.acquire(10), 0.0)
+    
+    async def test_waits_when_empty(self):
+        """Prueba que se espera a la recarga cuando no quedan tokens."""
+        bucket = TokenBucket(6000)  # 100 tokens por segundo
+        await bucket.acquire(6000)
+        
+        waited = await bucket.acquire(1)
+        
+        self.assertGreater(waited, 0.005)
+        self.assertLess(waited, 0.5)
+    
+    async def test_learns_limit_from_headers(self):
+        """Prueba que una cubeta sin límite aprende el del servidor."""
+        bucket = TokenBucket(0)
+        bucket.update(limit=500, remaining=10, reset=None)
+        
+        self.assertEqual(bucket.capacity, 500)
+        self.assertEqual(bucket.tokens, 10)
+    
+    async def test_blocks_until_reset_when_exhausted(self):
+        """Prueba que se bloquea hasta el reinicio si el servidor no deja margen."""
+        bucket = TokenBucket(100)
+        bucket.update(limit=100, remaining=0, reset=5.0)
+        
+        self.assertGreater(bucket._blocked_until, time.monotonic() + 4)
+
+
+class TestRateLimitScheduler(unittest.IsolatedAsyncioTestCase):
+    """Pruebas para RateLimitScheduler."""
+    
+    def make_scheduler(self, **kwargs):
+        client = MagicMock()
+        client.estimate_tokens.return_value = 10
+        scheduler = RateLimitScheduler(
+            client, requests_per_minute=0, tokens_per_minute=0,
+            base_delay=0.001, max_delay=0.01, **kwargs
+        )
+        return client, scheduler
+    
+    async def test_retries_rate_limited_requests(self):
+        """Prueba que un 429 se reintenta hasta obtener respuesta."""
+        client, scheduler = self.make_scheduler(max_retries=3)
+        error = OpenAIClientError.from_exception(make_rate_limit_error())
+        client.acomplete = AsyncMock(side_effect=[error, error, "Respuesta"])
+        
+        result = await scheduler.complete([{"role": "user", "content": "Hola"}])
+        
+        self.assertEqual(result, "Respuesta")
+        self.assertEqual(scheduler.retries, 2)
+    
+    async def test_gives_up_after_max_retries(self):
+        """Prueba que el error se propaga al agotar los reintentos."""
+        client, scheduler = self.make_scheduler(max_retries=1)
+        error = OpenAIClientError.from_exception(make_rate_limit_error())
+        client.acomplete = AsyncMock(side_effect=error)
+        
+        with self.assertRaises(OpenAIClientError):
+            await scheduler.complete([{"role": "user", "content": "Hola"}])
+        self.assertEqual(client.acomplete.await_count, 2)
+    
+    async def test_stream_does_not_retry_after_first_chunk(self):
+        """Prueba que no se reintenta un stream que ya entregó texto."""
+        client, scheduler = self.make_scheduler(max_retries=3)
+        error = OpenAIClientError("caída", retryable=True)
+        calls = []
+        
+        async def failing_stream(messages):
+            calls.append(messages)
+            yield "Hola"
+            raise error
+        
+        client.astream = failing_stream
+        received = []
+        with self.assertRaises(OpenAIClientError):
+            async for chunk in scheduler.stream([{"role": "user", "content": "Hola"}]):
+                received.append(chunk)
+        
+        self.assertEqual(received, ["Hola"])
+        self.assertEqual(len(calls), 1)
+    
+    async def test_registers_as_headers_listener(self):
+        """Prueba que el planificador recibe las cabeceras del cliente."""
+        client, scheduler = self.make_scheduler()
+        
+        client.headers_listener({
+            "x-ratelimit-limit-requests": "60",
+            "x-ratelimit-remaining-requests": "59",
+        })
+        
+        self.assertEqual(scheduler.requests.capacity, 60)
+
+
+class TestPerEndpointLimits(unittest.IsolatedAsyncioTestCase):
+    """Pruebas para los límites de uso por servidor con varios servidores."""
+    
+    def make_client(self, name, **kwargs):
+        client = MagicMock()
+        client.name = name
+        client.estimate_tokens.return_value = 10
+        client.cached.return_value = None
+        client.acomplete = AsyncMock(**kwargs)
+        return client
+    
+    def make_scheduler(self, primary, secondary):
+        backend = MultiEndpointBackend([primary, secondary], hedge=False)
+        return RateLimitScheduler(
+            backend, requests_per_minute=0, tokens_per_minute=0,
+            base_delay=0.001, max_delay=5.0, max_retries=3
+        )
+    
+    async def test_rate_limit_only_blocks_that_endpoint(self):
+        """Prueba que un 429 de un servidor no frena a los demás."""
+        error = OpenAIClientError.from_exception(make_rate_limit_error(retry_after="30"))
+        primary = self.make_client("a", side_effect=error)
+        secondary = self.make_client("b", return_value="b")
+        scheduler = self.make_scheduler(primary, secondary)
+        
+        result = await scheduler.complete([{"role": "user", "content": "Hola"}])
+        
+        self.assertEqual(result, "b")
+        self.assertGreater(scheduler.limits_for("a").wait_time(), 1.0)
+        self.assertEqual(scheduler.limits_for("b").wait_time(), 0.0)
+    
+    async def test_failover_counts_towards_max_retries(self):
+        """Prueba que los reintentos no multiplican la conmutación por error del backend."""
+        error = OpenAIClientError("caído", retryable=True)
+        primary = self.make_client("a", side_effect=error)
+        secondary = self.make_client("b", side_effect=error)
+        scheduler = self.make_scheduler(primary, secondary)
+        
+        with self.assertRaises(OpenAIClientError):
+            await scheduler.complete([{"role": "user", "content": "Hola"}])
+        
+        # max_retries=3: cuatro intentos en total entre los dos servidores
+        attempts = primary.acomplete.await_count + secondary.acomplete.await_count
+        self.assertEqual(attempts, 4)
+        self.assertEqual(scheduler.retries, 1)
+    
+    async def test_prefers_endpoint_with_quota(self):
+        """Prueba que se salta al servidor que tendría que esperar por sus cabeceras."""
+        primary = self.make_client("a", return_value="a")
+        secondary = self.make_client("b", return_value="b")
+        scheduler = self.make_scheduler(primary, secondary)
+        primary.headers_listener({
+            "x-ratelimit-limit-requests": "60",
+            "x-ratelimit-remaining-requests": "0",
+            "x-ratelimit-reset-requests": "30s",
+        })
+        
+        result = await asyncio.wait_for(
+            scheduler.complete([{"role": "user", "content": "Hola"}]), timeout=1.0
+        )
+        
+        self.assertEqual(result, "b")
+        primary.acomplete.assert_not_awaited()
+
+
+if __name__ == '__main__':
+    unittest.main()
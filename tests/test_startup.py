@@ -0,0 +1,178 @@
+"""
+Pruebas para la medición del arranque y la configuración perezosa.
+"""
+
+import contextlib
+import io
+import os
+import unittest
+from unittest.mock import patch
+
+from PyQt6.QtCore import QTimer
+from PyQt6.QtWidgets import QMainWindow
+
+from chat_gpt_local import main as main_module
+from chat_gpt_local.config import settings as settings_module
+from chat_gpt_local.utils.startup import StartupProfiler
+from tests import qt_application
+
+
+class FakeWindow(QMainWindow):
+    """Ventana que solo registra cuándo se completa su arranque."""
+    
+    def __init__(self, error=None):
+        super().__init__()
+        self.transcript = None
+        self.error = error
+        self.calls = 0
+    
+    def finish_startup(self):
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+
+
+class TestStartupProfiler(unittest.TestCase):
+    """Pruebas para StartupProfiler."""
+    
+    def test_disabled_profiler_records_nothing(self):
+        """Prueba que sin activar no se registran fases ni se imprime nada."""
+        profiler = StartupProfiler()
+        stream = io.StringIO()
+        
+        with profiler.phase("ventana"):
+            pass
+        profiler.mark("primer pintado")
+        profiler.print_report(stream)
+        
+        self.assertEqual(profiler.phases, [])
+        self.assertEqual(stream.getvalue(), "")
+    
+    def test_phases_are_recorded_in_order(self):
+        """Prueba que cada fase guarda su inicio y su duración."""
+        profiler = StartupProfiler(enabled=True)
+        
+        with profiler.phase("importaciones"):
+            pass
+        profiler.mark("ventana visible")
+        
+        names = [name for name, _, _ in profiler.phases]
+        self.assertEqual(names, ["importaciones", "ventana visible"])
+        self.assertEqual(profiler.phases[1][2], 0.0)
+        self.assertGreaterEqual(profiler.phases[1][1], profiler.phases[0][1])
+    
+    def test_phase_is_recorded_when_it_fails(self):
+        """Prueba que una fase que lanza una excepción también se mide."""
+        profiler = StartupProfiler(enabled=True)
+        
+        with self.assertRaises(RuntimeError):
+            with profiler.phase("motor"):
+                raise RuntimeError("fallo")
+        
+        self.assertEqual(profiler.phases[0][0], "motor")
+    
+    def test_report_lists_every_phase(self):
+        """Prueba que el informe incluye cada fase y el total."""
+        profiler = StartupProfiler(enabled=True)
+        with profiler.phase("transcripción"):
+            pass
+        stream = io.StringIO()
+        
+        profiler.print_report(stream)
+        
+        self.assertIn("transcripción", stream.getvalue())
+        self.assertIn("total", stream.getvalue())
+
+
+class TestLazySettings(unittest.TestCase):
+    """Pruebas de la creación perezosa de la configuración."""
+    
+    def test_settings_is_the_cached_instance(self):
+        """Prueba que `settings` es la misma instancia que devuelve `get_settings`."""
+        self.assertIs(settings_module.settings, settings_module.get_settings())
+    
+    def test_unknown_attribute_raises(self):
+        """Prueba que otros atributos desconocidos siguen fallando."""
+        with self.assertRaises(AttributeError):
+            settings_module.no_existe
+
+
+class TestEndpointSettings(unittest.TestCase):
+    """Pruebas de la lectura de OPENAI_ENDPOINTS."""
+    
+    def test_reads_endpoint_list(self):
+        """Prueba que se leen los servidores de la lista JSON."""
+        value = '[{"name": "azure", "base_url": "https://example.com/v1"}]'
+        with patch.dict(os.environ, {"OPENAI_ENDPOINTS": value}):
+            endpoints = settings_module.Settings.from_env().endpoints
+        
+        self.assertEqual([endpoint.name for endpoint in endpoints], ["azure"])
+    
+    def test_invalid_json_is_a_configuration_error(self):
+        """Prueba que un JSON mal formado da un error de configuración claro."""
+        with patch.dict(os.environ, {"OPENAI_ENDPOINTS": "{mal"}):
+            with self.assertRaisesRegex(settings_module.ConfigurationError, "OPENAI_ENDPOINTS"):
+                settings_module.Settings.from_env()
+    
+    def test_invalid_endpoint_is_a_configuration_error(self):
+        """Prueba que un servidor con campos no válidos da un error de configuración."""
+        with patch.dict(os.environ, {"OPENAI_ENDPOINTS": '[{"name": 1}]'}):
+            with self.assertRaises(settings_module.ConfigurationError):
+                settings_module.Settings.from_env()
+
+
+
+class TestStartupTrigger(unittest.TestCase):
+    """Pruebas del arranque diferido de la ventana principal."""
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.app = qt_application()
+    
+    def run_startup(self, window, timeout_ms=1000):
+        """Muestra la ventana, espera a su arranque y devuelve el código de salida y la salida."""
+        self.addCleanup(window.deleteLater)
+        window.show()
+        main_module._StartupTrigger(window)
+        timeout = QTimer()
+        timeout.setSingleShot(True)
+        timeout.timeout.connect(lambda: self.app.exit(0))
+        timeout.start(timeout_ms)
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            code = self.app.exec()
+        timeout.stop()
+        window.hide()
+        return code, stdout.getvalue()
+    
+    def test_startup_runs_once_after_the_window_is_shown(self):
+        """Prueba que el arranque se completa una sola vez tras mostrar la ventana."""
+        window = FakeWindow()
+        
+        code, _ = self.run_startup(window)
+        
+        self.assertEqual(code, 0)
+        self.assertEqual(window.calls, 1)
+    
+    def test_configuration_error_quits_the_application(self):
+        """Prueba que un error de configuración se muestra y termina la aplicación."""
+        window = FakeWindow(settings_module.ConfigurationError("OPENAI_ENDPOINTS no válido"))
+        
+        code, output = self.run_startup(window)
+        
+        self.assertEqual(code, 1)
+        self.assertIn("Error de configuración: OPENAI_ENDPOINTS no válido", output)
+    
+    def test_unexpected_error_quits_the_application(self):
+        """Prueba que cualquier otro error también se muestra y termina la aplicación."""
+        window = FakeWindow(RuntimeError("sin motor"))
+        
+        with contextlib.redirect_stderr(io.StringIO()):
+            code, output = self.run_startup(window)
+        
+        self.assertEqual(code, 1)
+        self.assertIn("Error inesperado: sin motor", output)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,156 @@
+"""
+Pruebas para la telemetría de las peticiones.
+"""
+
+import asyncio
+import json
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+from chat_gpt_local.api.errors import RequestCancelledError
+from chat_gpt_local.api.telemetry import (
+    LATENCY_BUCKETS,
+    Histogram,
+    JsonlWriter,
+    RequestMetrics,
+    Telemetry,
+    queued,
+)
+
+
+def make_metrics(endpoint="a", outcome="ok", total=0.4, ttft=0.1, completion_tokens=30):
+    """Crea unas mediciones de prueba."""
+    return RequestMetrics(
+        endpoint=endpoint,
+        model="gpt-4",
+        streamed=True,
+        outcome=outcome,
+        queue_wait=0.0,
+        connect=0.02,
+        ttft=ttft,
+        total=total,
+        prompt_tokens=100,
+        completion_tokens=completion_tokens,
+        cached_tokens=64,
+        timestamp=time.time(),
+    )
+
+
+class TestHistogram(unittest.TestCase):
+    """Pruebas para Histogram."""
+    
+    def test_buckets_are_cumulative(self):
+        """Prueba que cada cubo cuenta las muestras menores o iguales que su límite."""
+        histogram = Histogram((1, 5, 10))
+        for value in (0.5, 3, 3, 7, 20):
+            histogram.observe(value)
+        
+        self.assertEqual(histogram.bucket_counts, [1, 3, 4])
+        self.assertEqual(histogram.count, 5)
+        self.assertEqual(histogram.sum, 33.5)
+    
+    def test_percentiles_use_recent_samples(self):
+        """Prueba que los percentiles solo consideran la ventana reciente."""
+        histogram = Histogram(LATENCY_BUCKETS, window=3)
+        for value in (100.0, 1.0, 2.0, 3.0):
+            histogram.observe(value)
+        
+        self.assertEqual(histogram.percentile(1.0), 3.0)
+        self.assertEqual(histogram.count, 4)
+
+
+class TestTelemetry(unittest.TestCase):
+    """Pruebas para Telemetry."""
+    
+    def test_tokens_per_second_excludes_ttft(self):
+        """Prueba que el ritmo de generación se mide desde el primer token."""
+        metrics = make_metrics(total=1.1, ttft=0.1, completion_tokens=50)
+        
+        self.assertAlmostEqual(metrics.tokens_per_second, 50.0)
+    
+    def test_errors_are_counted_apart(self):
+        """Prueba que los errores se cuentan pero no entran en los histogramas."""
+        telemetry = Telemetry()
+        telemetry.record(make_metrics())
+        telemetry.record(make_metrics(outcome="error", total=30.0))
+        
+        self.assertEqual(telemetry.requests, {("a", "ok"): 1, ("a", "error"): 1})
+        self.assertEqual(telemetry.percentile("total_seconds", 1.0), 0.4)
+    
+    def test_prometheus_format(self):
+        """Prueba la exportación en el formato de texto de Prometheus."""
+        telemetry = Telemetry()
+        telemetry.record(make_metrics(endpoint="local"))
+        
+        text = telemetry.prometheus()
+        
+        self.assertIn("# TYPE chat_gpt_local_request_ttft_seconds histogram", text)
+        self.assertIn(
+            'chat_gpt_local_request_ttft_seconds_bucket{endpoint="local",le="0.1"} 1', text
+        )
+        self.assertIn(
+            'chat_gpt_local_request_ttft_seconds_bucket{endpoint="local",le="+Inf"} 1', text
+        )
+        self.assertIn('chat_gpt_local_request_total{endpoint="local",outcome="ok"} 1', text)
+        self.assertIn('chat_gpt_local_request_cached_tokens_total{endpoint="local"} 64', text)
+    
+    def test_jsonl_export(self):
+        """Prueba que cada petición añade una línea al archivo JSONL."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "metricas" / "peticiones.jsonl"
+            telemetry = Telemetry(path)
+            telemetry.record(make_metrics())
+            telemetry.record(make_metrics(outcome="cancelled"))
+            telemetry.flush()
+            
+            lines = [json.loads(line) for line in path.read_text().splitlines()]
+        
+        self.assertEqual([line["outcome"] for line in lines], ["ok", "cancelled"])
+        self.assertEqual(lines[0]["tokens_per_second"], 100.0)
+    
+    def test_jsonl_is_written_off_the_calling_thread(self):
+        """Prueba que el JSONL lo escribe el hilo del escritor, en orden."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "peticiones.jsonl"
+            writer = JsonlWriter(path)
+            for i in range(200):
+                writer.write(str(i))
+            writer.flush()
+            
+            lines = path.read_text().splitlines()
+        
+        self.assertEqual(lines, [str(i) for i in range(200)])
+        self.assertNotEqual(writer._thread, threading.current_thread())
+    
+    def test_measure_records_outcome(self):
+        """Prueba que `measure` registra las peticiones canceladas como tales."""
+        telemetry = Telemetry()
+        
+        with self.assertRaises(RequestCancelledError):
+            with telemetry.measure("a", "gpt-4", streamed=True):
+                raise RequestCancelledError("Petición cancelada")
+        
+        self.assertEqual(telemetry.requests, {("a", "cancelled"): 1})
+
+
+class TestQueueWait(unittest.IsolatedAsyncioTestCase):
+    """Pruebas de la medición de la espera en cola."""
+    
+    async def test_outer_block_wins(self):
+        """Prueba que la espera se mide desde el bloque `queued` más externo."""
+        telemetry = Telemetry()
+        
+        with queued():
+            await asyncio.sleep(0.05)
+            with queued():
+                with telemetry.measure("a", "gpt-4", streamed=False):
+                    pass
+        
+        self.assertGreaterEqual(telemetry.recent[0].queue_wait, 0.05)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+"""
+Pruebas para la hoja de estilos compilada de la aplicación.
+"""
+
+import re
+import unittest
+
+from chat_gpt_local.gui.styles.theme import get_app_stylesheet
+
+
+class TestAppStylesheet(unittest.TestCase):
+    """Pruebas para get_app_stylesheet."""
+    
+    def test_built_once(self):
+        """Prueba que la hoja se construye una sola vez."""
+        self.assertIs(get_app_stylesheet(), get_app_stylesheet())
+    
+    def test_braces_are_balanced(self):
+        """Prueba que las plantillas no dejan llaves sin cerrar ni sin sustituir."""
+        stylesheet = get_app_stylesheet()
+        
+        self.assertEqual(stylesheet.count("{"), stylesheet.count("}"))
+        self.assertNotIn("{{", stylesheet)
+        self.assertIsNone(re.search(r"\{[A-Z_]+\[", stylesheet))
+    
+    def test_selectors_for_named_widgets(self):
+        """Prueba que hay reglas para los widgets identificados por nombre o propiedad."""
+        stylesheet = get_app_stylesheet()
+        
+        for selector in (
+            "QLabel#title",
+            'QLabel[badge="true"][accent="green"]',
+            'QLabel[badge="true"][accent="magenta"]',
+            "QFrame#scrollContainer",
+            "QFrame#inputContainer",
+            "QTextEdit#messageInput",
+            "QPushButton#sendButton:disabled",
+            "QPushButton#stopButton",
+        ):
+            self.assertIn(selector, stylesheet)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,234 @@
+"""
+Pruebas para la página base de la vista de la conversación.
+"""
+
+import json
+import re
+import shutil
+import subprocess
+import unittest
+
+from PyQt6.QtCore import QEventLoop, QTimer
+
+from chat_gpt_local.gui.transcript_page import (
+    EAGER_TAIL_MESSAGES,
+    TRANSCRIPT_SCRIPT,
+    ScriptBatcher,
+    get_transcript_page,
+)
+from tests import qt_application
+
+
+def script_method(name):
+    """Devuelve el cuerpo de un método del objeto `transcript` de la página."""
+    match = re.search(rf"^    {name}\(.*?^    \}},", TRANSCRIPT_SCRIPT, re.M | re.S)
+    assert match is not None, name
+    return match.group(0)
+
+
+# DOM mínimo para ejecutar el script de la página con Node: solo lo que usa `transcript`
+FAKE_DOM = """
+class Element {
+    constructor(tag) {
+        this.tagName = tag;
+        this.children = [];
+        this.style = {};
+        this.id = '';
+        this.classes = new Set();
+        this.textContent = '';
+        this.innerHTML = '';
+    }
+    get className() { return [...this.classes].join(' '); }
+    set className(value) { this.classes = new Set(value.split(' ').filter(Boolean)); }
+    get classList() {
+        const classes = this.classes;
+        return {
+            add: (name) => classes.add(name),
+            remove: (name) => classes.delete(name),
+            contains: (name) => classes.has(name),
+            toggle: (name, on) => (on ? classes.add(name) : classes.delete(name)),
+        };
+    }
+    get firstChild() { return this.children[0] || null; }
+    append(...nodes) { nodes.forEach((node) => this.appendChild(node)); }
+    appendChild(node) {
+        if (node.tagName === '#fragment') {
+            node.children.forEach((child) => this.children.push(child));
+            node.children = [];
+        } else {
+            this.children.push(node);
+        }
+        return node;
+    }
+    replaceChildren() { this.children = []; }
+    querySelector() { return this.children[1] || null; }
+}
+const root = new Element('div');
+globalThis.document = {
+    body: new Element('body'),
+    scrollingElement: {scrollHeight: 0, scrollTop: 0, clientHeight: 0},
+    createElement: (tag) => new Element(tag),
+    createDocumentFragment: () => new Element('#fragment'),
+    getElementById: (id) => (id === 'transcript' ? root : null),
+};
+globalThis.window = {scrollTo: () => {}};
+globalThis.requestAnimationFrame = () => {};
+globalThis.IntersectionObserver = class {
+    constructor(callback) { this.callback = callback; this.observed = []; }
+    observe(element) { this.observed.push(element); }
+};
+"""
+
+
+def run_transcript_script(code):
+    """Ejecuta el script de la página con Node sobre el DOM mínimo y devuelve lo que imprime."""
+    source = f"{FAKE_DOM}\n{TRANSCRIPT_SCRIPT}\n{code}"
+    result = subprocess.run(
+        ["node", "-e", source], capture_output=True, text=True, timeout=30, check=True
+    )
+    return json.loads(result.stdout)
+
+
+def process_events(timeout_ms=50):
+    """Procesa eventos de Qt durante un momento."""
+    loop = QEventLoop()
+    QTimer.singleShot(timeout_ms, loop.quit)
+    loop.exec()
+
+
+class TestTranscriptPage(unittest.TestCase):
+    """Pruebas para la página base y su script."""
+    
+    def test_built_once(self):
+        """Prueba que la página se construye una sola vez."""
+        self.assertIs(get_transcript_page(), get_transcript_page())
+    
+    def test_page_initializes_transcript(self):
+        """Prueba que la página incluye el script y lo inicializa."""
+        page = get_transcript_page()
+        
+        self.assertIn("const transcript = {", page)
+        self.assertIn("transcript.init(", page)
+    
+    def test_release_does_not_read_layout(self):
+        """Prueba que liberar mensajes no fuerza una maquetación por cada uno."""
+        release = script_method("release")
+        on_intersection = script_method("onIntersection")
+        
+        self.assertNotIn("offsetHeight", release)
+        self.assertNotIn("getBoundingClientRect", release)
+        self.assertIn("entry.boundingClientRect.height", on_intersection)
+
+
+
+
+@unittest.skipUnless(shutil.which("node"), "hace falta Node para ejecutar el script")
+class TestTranscriptScript(unittest.TestCase):
+    """Pruebas del script de la página ejecutado con Node."""
+    
+    def test_bulk_load_leaves_placeholders(self):
+        """Prueba que una carga grande solo construye los últimos mensajes."""
+        built = run_transcript_script(
+            f"""
+            transcript.init(1500, 120, {EAGER_TAIL_MESSAGES});
+            const messages = [];
+            for (let i = 1; i <= 2000; i++) {{
+                messages.push({{id: i, user: i % 2 === 0, time: '12:00', html: '<p>x</p>'}});
+            }}
+            transcript.appendMany(messages);
+            const articles = root.children;
+            console.log(JSON.stringify({{
+                total: articles.length,
+                observed: transcript.observer.observed.length,
+                built: articles.filter((a) => a.firstChild).map((a) => a.id),
+                heights: [...new Set(articles.filter((a) => !a.firstChild)
+                    .map((a) => a.style.height))],
+            }}));
+            """
+        )
+        
+        self.assertEqual(built["total"], 2000)
+        self.assertEqual(built["observed"], 2000)
+        self.assertEqual(
+            built["built"], [f"m{i}" for i in range(2001 - EAGER_TAIL_MESSAGES, 2001)]
+        )
+        self.assertEqual(built["heights"], ["120px"])
+    
+    def test_observer_builds_messages_near_the_viewport(self):
+        """Prueba que los huecos se construyen cuando el observador los acerca."""
+        state = run_transcript_script(
+            """
+            transcript.init(1500, 120, 1);
+            transcript.appendMany([
+                {id: 1, user: true, time: '12:00', html: '<p>a</p>'},
+                {id: 2, user: false, time: '12:00', html: '<p>b</p>'},
+                {id: 3, user: true, time: '12:00', html: '<p>c</p>'},
+            ]);
+            const [first, second, third] = root.children;
+            transcript.onIntersection([
+                {target: first, isIntersecting: true},
+                {target: third, isIntersecting: false, boundingClientRect: {height: 300}},
+            ]);
+            console.log(JSON.stringify({
+                built: root.children.map((a) => Boolean(a.firstChild)),
+                placeholder: root.children.map((a) => a.classList.contains('placeholder')),
+                thirdHeight: third.style.height,
+            }));
+            """
+        )
+        
+        self.assertEqual(state["built"], [True, False, False])
+        self.assertEqual(state["placeholder"], [False, True, True])
+        self.assertEqual(state["thirdHeight"], "300px")
+
+
+class TestScriptBatcher(unittest.TestCase):
+    """Pruebas para ScriptBatcher."""
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.app = qt_application()
+    
+    def test_calls_wait_until_ready(self):
+        """Prueba que las llamadas anteriores a la carga se ejecutan juntas al cargar."""
+        scripts = []
+        batcher = ScriptBatcher(scripts.append)
+        batcher.call("appendMany", [{"id": 1}])
+        batcher.call("scrollToBottom")
+        process_events()
+        
+        self.assertEqual(scripts, [])
+        batcher.set_ready()
+        
+        self.assertEqual(scripts, [
+            'transcript.appendMany([{"id": 1}]);\ntranscript.scrollToBottom();'
+        ])
+    
+    def test_calls_in_one_tick_run_once(self):
+        """Prueba que varias llamadas en una vuelta del bucle dan un solo script."""
+        scripts = []
+        batcher = ScriptBatcher(scripts.append)
+        batcher.set_ready()
+        
+        batcher.call("update", 1, "<p>a</p>")
+        batcher.call("update", 2, "<p>b</p>")
+        batcher.call("setPaused", True)
+        self.assertEqual(scripts, [])
+        process_events()
+        
+        self.assertEqual(len(scripts), 1)
+        self.assertEqual(scripts[0].count("transcript."), 3)
+        self.assertTrue(scripts[0].endswith("transcript.setPaused(true);"))
+    
+    def test_nothing_runs_without_calls(self):
+        """Prueba que no se ejecuta ningún script vacío."""
+        scripts = []
+        batcher = ScriptBatcher(scripts.append)
+        batcher.set_ready()
+        process_events()
+        
+        self.assertEqual(scripts, [])
+
+
+if __name__ == '__main__':
+    unittest.main()